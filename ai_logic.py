@@ -3,70 +3,167 @@ import json
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 import re
-from config import OPENAI_API_KEY, OPENAI_MODEL, TEMPERATURE, MAX_TOKENS, TOP_P, BAN_WORDS
+import time
+import threading
+from config import (OPENAI_API_KEY, OPENAI_MODEL, TEMPERATURE, MAX_TOKENS, TOP_P, BAN_WORDS,
+                    LONG_ANSWER_TIMEOUT, CONTEXT_TOKEN_BUDGET, LONG_CONTEXT_TOKEN_BUDGET, RAG_TOP_K,
+                    RAG_ATTACHMENT_TOP_K)
 from database import DatabaseManager
+import metrics
+import rate_limit
+from circuit_breaker import CircuitBreaker
+from semantic_cache import SemanticCache, normalize
+from single_flight import SingleFlight
+from kakao_payloads import extract_link_from_text
+from retrieval import Retriever, pack_context, truncate_to_tokens
+from qa_snapshot import (DATASET_PATH, load_snapshot, source_fingerprint, build_state as build_qa_state,
+                         compute_data_version)
 
 # 한국 시간대 설정 (UTC+9)
 KST = timezone(timedelta(hours=9))
 
+# OpenAI 장애/지연 시 5초씩 기다리지 않도록 서킷 브레이커로 감쌈
+OPENAI_BREAKER = CircuitBreaker("openai")
+OPENAI_SLOW_SEC = 3.0  # 짧은 답변 모드에서 이보다 오래 걸리면 '느린 호출'로 집계
+OPENAI_FALLBACK = "죄송합니다. 해당 질문에 대한 답변을 찾을 수 없습니다. 다른 질문을 해주세요."
+
+# 비슷한 질문이 반복해서 OpenAI까지 가지 않도록 폴백 답변을 의미 캐시에 보관
+ANSWER_CACHE = SemanticCache()
+# 같은 질문이 동시에 몰리면 의미 캐시 조회 + OpenAI 호출은 한 번만 (나머지는 결과 대기)
+FALLBACK_FLIGHT = SingleFlight("fallback")
+
+# 이전 대화를 가리키는 후속 질문 ("그럼 그건 언제까지야?", "왜요?")만 대화 기록을 프롬프트에 넣음
+FOLLOW_UP_RE = re.compile(r"^(그럼|그러면|그래서|그리고|그때)|그거|그건|그게|그것|거기|아까|방금|위에서|이거|저거|그중|그 중")
+FOLLOW_UP_MAX_CHARS = 4  # 공백/문장부호를 뺀 길이가 이 이하인 짧은 말도 후속 질문으로 봄
+
 def get_kst_now():
     """현재 한국 시간 반환"""
     return datetime.now(KST)
 
-def extract_link_from_text(text: str):
-    """텍스트에서 첫 번째 URL을 추출하고, 본문과 링크를 분리"""
-    url_pattern = r'(https?://[\w\-./?%&=:#@]+)'
-    match = re.search(url_pattern, text)
-    if match:
-        url = match.group(1)
-        # 본문에서 URL 제거(공백도 정리)
-        text_wo_url = text.replace(url, '').strip()
-        # 본문 끝에 불필요한 구두점/공백 제거
-        text_wo_url = re.sub(r'[\s\-:·,]+$', '', text_wo_url)
-        
-        # 본문이 비어있으면 기본 안내문 추가
-        if not text_wo_url:
-            if "ktbookmall.com" in url:
-                text_wo_url = "교과서 구매는 아래 링크에서 가능합니다."
-            elif "goepj.kr" in url:
-                text_wo_url = "자세한 내용은 아래 링크에서 확인하실 수 있습니다."
-            elif "docs.google.com" in url:
-                text_wo_url = "학사일정은 아래 링크에서 확인하실 수 있습니다."
-            else:
-                text_wo_url = "자세한 내용은 아래 링크를 참고해주세요."
-        
-        return text_wo_url, url
-    return text, None
+def is_follow_up(message: str) -> bool:
+    """앞선 대화를 이어 묻는 질문인지 (지시어/접속어로 시작하거나 아주 짧은 말)"""
+    text = message.strip()
+    if FOLLOW_UP_RE.search(text):
+        return True
+    return len(re.sub(r"[\s\W_]", "", text)) <= FOLLOW_UP_MAX_CHARS
 
 class AILogic:
-    def __init__(self):
+    def __init__(self, db_path: str = None):
         openai.api_key = OPENAI_API_KEY
-        self.db = DatabaseManager()
-        self.qa_data = None
+        self.db = DatabaseManager(db_path)
+        # QA 데이터와 파생 구조(검색 색인, 응답 bytes 등)는 dict 하나로 묶어 참조만 교체 (핫 리로드)
+        self._state = {}
+        self._pinned = threading.local()
+        self._reload_lock = threading.Lock()
         self._initialized = False
+        self.loaded_from_snapshot = False  # 마지막 로드가 빌드 스냅샷에서 복원됐는지 (벤치마크/진단용)
         
     def _ensure_initialized(self):
         """필요할 때만 QA 데이터를 로드하는 지연 초기화"""
         if not self._initialized:
-            self.load_qa_data()
-            self._initialized = True
+            with self._reload_lock:
+                if not self._initialized:
+                    self.load_qa_data()
+                    self._initialized = True
+
+    # ---- 현재 데이터 버전 (처리 중인 요청은 시작 시점 버전을 계속 사용) ----
+    def _current_state(self) -> Dict:
+        return getattr(self._pinned, "state", None) or self._state
+
+    @property
+    def qa_data(self) -> List[Dict]:
+        return self._current_state().get("qa_data")
+
+    @property
+    def data_version(self) -> Optional[str]:
+        return self._current_state().get("data_version")
+
+    @property
+    def prebuilt_payloads(self) -> Dict:
+        return self._current_state().get("payloads") or {}
         
     def load_qa_data(self):
-        """QA 데이터 로드 (최적화된 버전)"""
+        """QA 데이터 로드 (빌드 스냅샷이 있으면 파생 구조까지 한 번에 복원)"""
+        state = load_snapshot(db_path=self.db.db_path)
+        self.loaded_from_snapshot = state is not None
+        if state:
+            self.apply_state(state)
+            print(f"QA 스냅샷 로드 완료: {len(self.qa_data)}개 항목 (버전 {self.data_version})")
+            return
+        self.apply_state(self.build_state())
+
+    def build_state(self) -> Dict:
+        """원본(JSON, 실패 시 DB)에서 QA 데이터를 읽어 파생 구조까지 새로 생성"""
+        fingerprint = source_fingerprint(DATASET_PATH, self.db.db_path)  # 읽기 전에 떠 둬야 도중 변경을 놓치지 않음
         try:
             # JSON 파일에서 데이터 로드
-            with open('school_dataset.json', 'r', encoding='utf-8') as f:
-                self.qa_data = json.load(f)
-                print(f"QA 데이터 로드 완료: {len(self.qa_data)}개 항목")
+            with open(DATASET_PATH, 'r', encoding='utf-8') as f:
+                qa_data = json.load(f)
+                print(f"QA 데이터 로드 완료: {len(qa_data)}개 항목")
         except Exception as e:
             print(f"JSON 파일 로드 실패: {e}")
             try:
                 # DB에서 데이터 로드 (fallback)
-                self.qa_data = self.db.get_qa_data()
-                print(f"DB에서 QA 데이터 로드 완료: {len(self.qa_data)}개 항목")
+                qa_data = self.db.get_qa_data()
+                print(f"DB에서 QA 데이터 로드 완료: {len(qa_data)}개 항목")
             except Exception as e2:
                 print(f"DB 로드도 실패: {e2}")
-                self.qa_data = []
+                qa_data = []
+        state = build_qa_state(qa_data, self.db.db_path)
+        state["fingerprint"] = fingerprint
+        return state
+
+    def apply_state(self, state: Dict):
+        """qa_snapshot.build_state() 결과(또는 스냅샷)로 참조를 한 번에 교체"""
+        ANSWER_CACHE.set_version(state["data_version"], idf=state["idf"])
+        self._state = state
+
+    def reload_if_changed(self) -> bool:
+        """원본(QA 파일/DB 세대)이 바뀌었으면 새 상태를 만들어 교체. 교체했으면 True
+
+        새 색인을 만드는 동안에도 요청은 기존 상태로 계속 처리된다.
+        """
+        if not self._initialized:
+            return False
+        if source_fingerprint(DATASET_PATH, self.db.db_path) == self._state.get("fingerprint"):
+            return False
+        with self._reload_lock:
+            old_version = self._state.get("data_version")
+            state = self.build_state()
+            self.apply_state(state)
+        print(f"QA 데이터 다시 로드: 버전 {old_version} -> {state['data_version']}, "
+              f"검색 문서 {len(state['retriever'].docs)}개")
+        return True
+
+    def warm_up(self):
+        """워커 부팅 시 호출: QA 데이터와 검색 색인을 첫 요청 전에 준비"""
+        self._ensure_initialized()
+
+    @staticmethod
+    def compute_data_version(qa_data) -> str:
+        """QA 데이터 내용 해시 (바뀌면 캐시 무효화, qa_snapshot.compute_data_version)"""
+        return compute_data_version(qa_data)
+    
+    def get_retriever(self) -> Retriever:
+        """QA + 페이지 문단 검색 색인 (데이터와 함께 만들어져 함께 교체됨)"""
+        self._ensure_initialized()
+        return self._current_state()["retriever"]
+
+    def build_rag_context(self, user_message: str, budget: int) -> str:
+        """질문과 관련된 QA/페이지 자료와 공지 첨부파일 본문을 토큰 예산 안에서 골라 붙인 문자열"""
+        try:
+            hits = list(self.get_retriever().search(user_message, k=RAG_TOP_K))
+        except Exception as e:
+            print(f"검색 실패: {e}")
+            hits = []
+        if RAG_ATTACHMENT_TOP_K:
+            try:
+                for a in self.db.search_attachments(user_message, limit=RAG_ATTACHMENT_TOP_K):
+                    title = f"{a['notice_title'] or '공지'} 첨부 {a['file_name']}"
+                    hits.append((0.0, {"kind": "attachment", "title": title, "text": a["snippet"]}))
+            except Exception as e:
+                print(f"첨부파일 검색 실패: {e}")
+        return pack_context(hits, budget)
     
     def is_banned_content(self, text: str) -> bool:
         """금지된 내용인지 확인 (학교 관련 문의는 예외)"""
@@ -96,15 +193,23 @@ class AILogic:
 - 위치: 경기도
 - 주요 서비스: 급식 정보, 공지사항, 학교 생활 안내"""
     
-    def build_conversation_context(self, user_id: str, current_message: str) -> List[Dict]:
-        """대화 컨텍스트 구축 (최적화된 버전)"""
-        # 간단한 시스템 프롬프트만 사용
+    def build_conversation_context(self, user_id: str, current_message: str,
+                                   context: str = "", history_limit: int = 1,
+                                   history: List[Dict] = None) -> List[Dict]:
+        """대화 컨텍스트 구축 (최적화된 버전)
+
+        context: 검색으로 찾은 학교 자료 (시스템 프롬프트 뒤에 붙임)
+        history: 이미 조회한 대화 기록 (주면 history_limit로 다시 조회하지 않음)
+        """
         system_prompt = self.get_system_prompt()
+        if context:
+            system_prompt += f"\n\n학교 데이터베이스 자료:\n{context}"
         
         messages = [{"role": "system", "content": system_prompt}]
         
         # 최근 대화 히스토리는 1개만 가져오기 (성능 향상)
-        history = self.db.get_conversation_history(user_id, limit=1)
+        if history is None:
+            history = self.db.get_conversation_history(user_id, limit=history_limit) if history_limit else []
         
         for conv in reversed(history):
             messages.append({"role": "user", "content": conv['message']})
@@ -224,10 +329,10 @@ class AILogic:
             
             # 우선순위 QA가 있으면 그것만 확인, 없으면 전체 확인
             qa_list = self.qa_data  # 전체 QA 데이터 확인
+            # 소문자 질문 목록은 스냅샷/상태에 미리 만들어 둠 (예전 상태면 여기서 생성)
+            questions = self._current_state().get("questions_lower") or [qa['question'].lower() for qa in qa_list]
             
-            for qa in qa_list:
-                question_lower = qa['question'].lower()
-                
+            for qa, question_lower in zip(qa_list, questions):
                 # 1. 정확한 매칭 (가장 높은 점수)
                 if user_message_lower == question_lower:
                     return qa
@@ -574,19 +679,37 @@ class AILogic:
         
         return None
 
-    def process_message(self, user_message: str, user_id: str) -> Tuple[bool, dict]:
-        """메인 메시지 처리 로직 (최적화된 버전)"""
+    def process_message(self, user_message: str, user_id: str,
+                        long_answer: bool = False) -> Tuple[bool, dict]:
+        """메인 메시지 처리 로직 (단계별 소요 시간/응답 단계는 metrics로 기록)
+
+        long_answer=True는 콜백 모드용: 5초 제한이 없으므로 OpenAI 답변을 길게 받는다.
+        """
+        metrics.begin_message()
+        self._ensure_initialized()
+        self._pinned.state = self._state  # 처리 중 리로드돼도 이 요청은 같은 버전 사용
+        try:
+            return self._process_message(user_message, user_id, long_answer)
+        finally:
+            self._pinned.state = None
+            metrics.finish_message()
+
+    def _process_message(self, user_message: str, user_id: str,
+                         long_answer: bool = False) -> Tuple[bool, dict]:
         print(f"사용자 메시지: {user_message}")
         
         # 금지된 내용 확인
+        metrics.enter_stage("ban_check")
         if self.is_banned_content(user_message):
             return False, {"type": "text", "text": "부적절한 내용이 포함되어 있습니다. 다른 질문을 해주세요."}
         
         # 와석초 관련 질문인지 판별
+        metrics.enter_stage("relevance")
         if not self.is_school_related(user_message):
             return False, {"type": "text", "text": "와석초등학교 관련 질문에만 답변할 수 있습니다."}
         
         # 1. 식단 관련 질문 확인 (우선순위 높음)
+        metrics.enter_stage("meal")
         if any(keyword in user_message for keyword in ["급식", "식단", "밥", "점심", "메뉴"]):
             # 급식 관련 질문에서만 날짜 추출 (오늘, 내일, 어제, 모레 등)
             date = self.get_date_from_message(user_message)
@@ -615,6 +738,7 @@ class AILogic:
                 return True, {"type": "text", "text": answer}
         
         # 2. 공지사항 관련 질문 확인
+        metrics.enter_stage("notices")
         if any(keyword in user_message for keyword in ["공지", "알림", "소식", "뉴스"]):
             response = self.get_notices_info()
             # 공지사항 응답은 저장 생략 (타임아웃 방지)
@@ -622,6 +746,7 @@ class AILogic:
             return True, {"type": "text", "text": response}
         
         # 3. 유치원 관련 질문 특별 처리 (새로 추가)
+        metrics.enter_stage("rules")
         if "유치원" in user_message:
             user_message_lower = user_message.lower()
             
@@ -729,6 +854,7 @@ class AILogic:
                 return True, resp
         
         # 5. 간단한 키워드 기반 답변 (우선순위 높음) - 더 상세하고 친근하게 개선
+        metrics.enter_stage("simple")
         simple_responses = {
             # 인사 관련 - 더 친근하고 상세하게
             "안녕": "안녕하세요! 👋 와석초등학교 챗봇입니다. 유치원과 초등학교 관련 정보를 도와드려요! 무엇을 궁금해하시나요?",
@@ -773,6 +899,7 @@ class AILogic:
                 return True, resp
         
         # 6. QA 데이터베이스에서 유사한 질문 찾기
+        metrics.enter_stage("qa")
         qa_match = self.find_qa_match(user_message)
         if qa_match:
             answer = qa_match['answer']
@@ -792,44 +919,104 @@ class AILogic:
             
             # 중요한 QA 응답만 저장 (타임아웃 방지)
             try:
-                self.db.save_conversation(user_id, user_message, response)
+                self.db.save_conversation(user_id, user_message, response,
+                                          category=qa_match.get('category'), stage='qa',
+                                          outcome='answered')
             except:
                 pass  # 저장 실패해도 응답은 계속
             return True, response
         
-        # 7. OpenAI를 통한 응답 (마지막 수단, 타임아웃 방지를 위해 간단하게)
-        return self.call_openai_api(user_message, user_id)
+        # 7~8. 의미 캐시 -> OpenAI. 같은 질문이 동시에 처리 중이면 그 결과를 기다려 함께 씀
+        metrics.enter_stage("semantic_cache")
+        self._ensure_initialized()
+        scope = "long" if long_answer else "short"
+        history = []
+        if long_answer and is_follow_up(user_message):
+            history = self.db.get_conversation_history(user_id, limit=1)
+        if history:
+            # 이전 대화가 들어간 답변은 이 사용자 전용이라 의미 캐시/single-flight로 나누지 않음
+            metrics.enter_stage("openai")
+            return self.call_openai_api(user_message, user_id, long_answer=True, history=history)
+        key = (scope, self.data_version, normalize(user_message) or user_message.strip())
+        result, shared = FALLBACK_FLIGHT.do(
+            key, lambda: self._fallback_answer(user_message, user_id, long_answer, scope),
+            on_wait=lambda: metrics.enter_stage("single_flight"))
+        if shared and result[1] == rate_limit.RATE_LIMITED_TEXT:
+            # 먼저 온 사용자의 OpenAI 예산 초과는 그 사용자 사정이므로 직접 처리
+            result = self._fallback_answer(user_message, user_id, long_answer, scope)
+        return result
+
+    def _fallback_answer(self, user_message: str, user_id: str, long_answer: bool,
+                         scope: str) -> Tuple[bool, str]:
+        # 7. 이전에 OpenAI로 답한 비슷한 질문이 있으면 그 답변 재사용
+        cached = ANSWER_CACHE.get(user_message, scope=scope)
+        if cached:
+            return True, cached
+
+        # 8. OpenAI를 통한 응답 (마지막 수단, 타임아웃 방지를 위해 간단하게)
+        metrics.enter_stage("openai")
+        ok, answer = self.call_openai_api(user_message, user_id, long_answer=long_answer)
+        if ok:
+            ANSWER_CACHE.put(user_message, answer, scope=scope)
+        return ok, answer
     
-    def call_openai_api(self, user_message: str, user_id: str) -> Tuple[bool, str]:
-        """OpenAI API 호출 (타임아웃 방지 최적화)"""
+    def call_openai_api(self, user_message: str, user_id: str,
+                        long_answer: bool = False, history: List[Dict] = ()) -> Tuple[bool, str]:
+        """OpenAI API 호출 (기본은 5초 스킬 제한에 맞춘 짧은 답변, 콜백 모드는 길게)
+
+        history: 프롬프트에 넣을 이 사용자의 이전 대화. 없으면 답변이 사용자와 무관해
+        의미 캐시/single-flight로 다른 사용자와 나눠 쓸 수 있다.
+        """
+        if long_answer:
+            timeout, max_tokens, max_chars = LONG_ANSWER_TIMEOUT, MAX_TOKENS, 1000
+        else:
+            timeout, max_tokens, max_chars = 5, 50, 100  # 타임아웃 방지용 최소 설정
+        if not OPENAI_BREAKER.allow():
+            # 서킷 open: 호출 없이 즉시 폴백 (거절 수는 chatbot_circuit_rejected_total)
+            # 호출하지 않을 요청으로 사용자의 OpenAI 예산을 깎지 않도록 예산보다 먼저 확인
+            return False, OPENAI_FALLBACK
+        if not rate_limit.LLM.allow(user_id):
+            # 이 사용자의 OpenAI 예산 소진: 다른 사용자 몫의 한도를 지키기 위해 호출하지 않음
+            OPENAI_BREAKER.cancel()
+            return False, rate_limit.RATE_LIMITED_TEXT
+        started = time.perf_counter()
         try:
-            # 매우 간단한 프롬프트 사용
-            simple_prompt = f"와석초등학교 관련 질문: {user_message[:50]}"
+            # 검색한 학교 자료를 예산 안에서 붙여 근거 있는 답변을 받음
+            with metrics.STAGE_LATENCY.time(stage="rag_context"):
+                budget = LONG_CONTEXT_TOKEN_BUDGET if long_answer else CONTEXT_TOKEN_BUDGET
+                context = self.build_rag_context(user_message, budget)
+                messages = self.build_conversation_context(
+                    user_id, truncate_to_tokens(user_message, 200), context=context,
+                    history=list(history))
+            started = time.perf_counter()  # 아래부터 OpenAI 호출 시간만 측정
             
             response = openai.chat.completions.create(
                 model=OPENAI_MODEL,
-                messages=[{"role": "user", "content": simple_prompt}],
+                messages=messages,
                 temperature=0.5,
-                max_tokens=50,  # 토큰 수 더 줄임
+                max_tokens=max_tokens,
                 top_p=1.0,
-                timeout=5  # 5초 타임아웃 설정
+                timeout=timeout
             )
-            
             ai_response = response.choices[0].message.content.strip()
+            elapsed = time.perf_counter() - started
+            metrics.OPENAI_LATENCY.observe(elapsed, outcome="ok")
+            OPENAI_BREAKER.record(True, slow=not long_answer and elapsed > OPENAI_SLOW_SEC)
             
             # 응답이 너무 길면 자르기
-            if len(ai_response) > 100:
-                ai_response = ai_response[:100] + "..."
+            if len(ai_response) > max_chars:
+                ai_response = ai_response[:max_chars] + "..."
             
             # 데이터베이스 저장은 비동기로 처리하거나 생략
             # self.db.save_conversation(user_id, user_message, ai_response)
             return True, ai_response
             
         except Exception as e:
+            metrics.OPENAI_LATENCY.observe(time.perf_counter() - started, outcome=type(e).__name__)
+            OPENAI_BREAKER.record(False, error=f"{type(e).__name__}: {str(e)[:200]}")
             print(f"OpenAI 처리 중 오류: {e}")
             # 타임아웃이나 오류 시 즉시 기본 응답 반환
-            fallback_response = "죄송합니다. 해당 질문에 대한 답변을 찾을 수 없습니다. 다른 질문을 해주세요."
-            return False, fallback_response
+            return False, OPENAI_FALLBACK
     
     def add_image_to_response(self, response: str, qa_match: Dict) -> dict:
         """이미지 첨부 응답에 실제 이미지 URL 추가 (카카오톡 챗봇용)"""
@@ -1,30 +1,39 @@
 import os
 import re
+import hmac
+import time
 import sqlite3
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, request, jsonify, g, Response
 from openai import OpenAI
 
+import metrics
+import kakao_callback
+import rate_limit
+from circuit_breaker import snapshot_all as circuit_snapshot
+from kakao_payloads import PayloadCache, QUICK_REPLIES  # 고정 Quick Replies (수정 금지)
+from usage_stats import UsageStats
+
 app = Flask(__name__)
 # OpenAI는 향후 확장용(지금 로직엔 필수 아님)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 DB_PATH = "school_data.db"
 
-# ------------------------------------------------------
-# 고정 Quick Replies (수정 금지)
-# ------------------------------------------------------
-QUICK_REPLIES = [
-    {"action": "message", "label": "📅 학사일정", "messageText": "📅 학사일정"},
-    {"action": "message", "label": "📋 늘봄/방과후", "messageText": "📋 늘봄/방과후"},
-    {"action": "message", "label": "📖 수업시간/시정표(초등)", "messageText": "📖 수업시간/시정표(초등)"},
-    {"action": "message", "label": "📚 교과서", "messageText": "📚 교과서"},
-    {"action": "message", "label": "🏠 전입/전출", "messageText": "🏠 전입/전출"},
-    {"action": "message", "label": "📋 증명서/서류", "messageText": "📋 증명서/서류"},
-    {"action": "message", "label": "📞 연락처/상담", "messageText": "📞 연락처/상담"},
-    {"action": "message", "label": "🍽️ 급식", "messageText": "🍽️ 급식"},
-    {"action": "message", "label": "🎶 기타", "messageText": "🎶 기타"},
-    {"action": "message", "label": "🧸 유치원", "messageText": "🧸 유치원"},
-]
+# gunicorn.conf.py(preload_app)가 설정: 마스터에서 import 후 fork하므로 스레드는 워커에서 시작
+PRELOADED = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+# 사용 통계 (메모리 카운터 -> usage_rollups 주기 플러시, 타이머는 start_worker_threads에서)
+usage = UsageStats(DB_PATH)
+# /stats, /metrics 조회 토큰 (Authorization: Bearer <토큰>). 비어 있으면 두 엔드포인트 모두 404
+STATS_TOKEN = os.getenv("STATS_TOKEN", "")
+
+# 대화 기록 보존 작업(집계/아카이브/VACUUM) - 매일 새벽 실행
+# gunicorn에선 gunicorn.conf.py가 전용 프로세스로 띄우므로(MAINTENANCE_SCHEDULER=process) 여기선 시작하지 않음
+if (os.getenv("ENABLE_MAINTENANCE", "false").lower() == "true"
+        and os.getenv("MAINTENANCE_SCHEDULER", "thread") == "thread"):
+    from maintenance import start_scheduler
+    start_scheduler()
 
 # 공지/가정통신문 보너스 단어 (환경변수로 커스터마이즈 가능)
 BOARD_BONUS_WORDS = os.getenv(
@@ -34,23 +43,69 @@ BOARD_BONUS_WORDS = os.getenv(
 # ------------------------------------------------------
 # 공통 헬퍼 (항상 200 JSON 보장)
 # ------------------------------------------------------
-def _kakao_ok(text: str):
-    return jsonify({
-        "version": "2.0",
-        "template": {
-            "outputs": [{"simpleText": {"text": text}}],
-            "quickReplies": QUICK_REPLIES
-        }
-    }), 200
+# 응답 JSON은 미리 직렬화한 bytes를 재사용 (QA 답변은 기동 시 전부 생성)
+payloads = PayloadCache(QUICK_REPLIES)
+
+def _kakao_body(body: bytes):
+    return Response(body, status=200, mimetype="application/json")
+
+def _kakao_ok(text: str, cache: bool = True):
+    return _kakao_body(payloads.text(text, cache=cache))
+
+def _user_id(data) -> str:
+    return ((data.get("userRequest") or {}).get("user") or {}).get("id") or "anonymous"
+
+def _rate_limited(endpoint: str, started: float):
+    """사용자별 요청 제한 초과 시 안내 응답 (DB/검색 없이 바로)"""
+    usage.record(endpoint, "rate_limited", (time.perf_counter() - started) * 1000)
+    metrics.ENDPOINT_OUTCOME.inc(endpoint=endpoint, outcome="rate_limited")
+    return _kakao_ok(rate_limit.RATE_LIMITED_TEXT)
+
+def precompile_answers(known=None):
+    """qa_data 답변 전체를 스킬 응답 bytes로 미리 생성 (known: 스냅샷에 이미 있는 것)"""
+    try:
+        # 읽기 전용: DB가 없을 때 빈 파일을 만들지 않게
+        con = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        answers = [r[0] for r in con.execute("SELECT DISTINCT answer FROM qa_data")]
+        con.close()
+    except sqlite3.Error as e:
+        print(f"[PAYLOAD] 사전 생성 건너뜀: {e}")
+        return 0
+    n = payloads.compile_all(answers, known=known)
+    print(f"[PAYLOAD] QA 응답 {n}개 사전 생성 ({payloads.stats()['encoder']})")
+    return n
+
+
+# ------------------------------------------------------
+# 요청 처리 시간 (Prometheus /metrics)
+# ------------------------------------------------------
+@app.before_request
+def _start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def _observe_latency(response):
+    started = g.pop("started", None)
+    if started is not None and request.url_rule is not None:
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - started,
+                                        endpoint=request.url_rule.rule)
+    return response
 
 # ------------------------------------------------------
 # DB 유틸
 # ------------------------------------------------------
+# gthread 워커: 스레드마다 읽기 연결 하나를 열어 두고 재사용 (스레드 간 공유 안 함)
+_db_local = threading.local()
+
 def get_db_connection():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
+    con = getattr(_db_local, "con", None)
+    if con is None:
+        con = sqlite3.connect(DB_PATH, timeout=5)
+        con.row_factory = sqlite3.Row
+        _db_local.con = con
     return con
 
+@metrics.timed_db("search_qa")
 def search_qa(user_text: str, top_k: int = 3):
     con = get_db_connection()
     cur = con.cursor()
@@ -61,15 +116,74 @@ def search_qa(user_text: str, top_k: int = 3):
         "ORDER BY id LIMIT ?",
         (f"%{user_text}%", top_k),
     )
-    rows = cur.fetchall()
-    con.close()
-    return rows
+    return cur.fetchall()
+
+# ------------------------------------------------------
+# 느린 경로 (콜백 모드에서만 사용: 급식/공지/규칙/QA/OpenAI 전체 파이프라인)
+# ------------------------------------------------------
+_ai = None
+_ai_lock = threading.Lock()
+
+def get_ai():
+    global _ai
+    if _ai is None:
+        with _ai_lock:
+            if _ai is None:
+                from ai_logic import AILogic
+                _ai = AILogic()
+    return _ai
+
+def _answer_text(result) -> str:
+    """AILogic 응답(dict 또는 str)을 simpleText 문자열로"""
+    if isinstance(result, dict):
+        text = result.get("text", "")
+        if result.get("link"):
+            text = f"{text}\n{result['link']}"
+        return text
+    return str(result or "")
+
+def _slow_answer(user_text: str, user_id: str) -> str:
+    _, result = get_ai().process_message(user_text, user_id, long_answer=True)
+    return _answer_text(result)
+
+# ------------------------------------------------------
+# 부팅 시 준비 (QA 스냅샷 로드 + 응답 사전 생성) — 첫 사용자가 로딩 비용을 내지 않게
+# ------------------------------------------------------
+def warm_up():
+    known = None
+    if os.getenv("WARM_START", "true").lower() == "true":
+        try:
+            ai = get_ai()
+            ai.warm_up()
+            known = ai.prebuilt_payloads
+        except Exception as e:
+            print(f"[WARMUP] 실패: {type(e).__name__}: {e}")
+    precompile_answers(known)
+
+def start_worker_threads():
+    """워커 프로세스마다 돌아야 하는 백그라운드 스레드 시작
+
+    fork하면 스레드는 따라오지 않으므로 preload 모드에선 gunicorn post_fork 훅에서 호출한다.
+    """
+    usage.start()
+    # QA 파일/DB가 바뀌면 재배포 없이 색인 교체 (처리 중 요청은 이전 버전으로 마무리)
+    if os.getenv("ENABLE_HOT_RELOAD", "true").lower() == "true":
+        try:
+            from hot_reload import QAReloader
+            QAReloader(get_ai(), on_swap=lambda state: precompile_answers(state.get("payloads"))).start()
+        except Exception as e:
+            print(f"[RELOAD] 감시 시작 실패: {type(e).__name__}: {e}")
+
+warm_up()
+if not PRELOADED:
+    start_worker_threads()
 
 # ------------------------------------------------------
 # 기본 QA 엔드포인트 (절대 깨지지 않게 방어)
 # ------------------------------------------------------
 @app.post("/")
 def kakao_skill():
+    started = time.perf_counter()
     data = request.get_json(silent=True) or {}
     user_text = (data.get("userRequest", {}) or {}).get("utterance", "")
     user_text = (user_text or "").strip()
@@ -77,8 +191,14 @@ def kakao_skill():
 
     # 비어도 항상 200
     if not user_text:
+        usage.record("/", "empty", (time.perf_counter() - started) * 1000)
+        metrics.ENDPOINT_OUTCOME.inc(endpoint="/", outcome="empty")
         return _kakao_ok("무엇을 도와드릴까요? 아래 메뉴를 눌러주세요 🙂")
 
+    user_id = _user_id(data)
+    if not rate_limit.LOCAL.allow(user_id):
+        return _rate_limited("/", started)
+
     # DB 검색 (키워드형)
     try:
         results = search_qa(user_text, top_k=3)
@@ -86,16 +206,31 @@ def kakao_skill():
         print(f"[ERROR][QA] {type(e).__name__}: {e}")
         results = []
 
+    callback_url = kakao_callback.get_callback_url(data)
     if results:
         top = results[0]
-        text = top["answer"]
+        body = payloads.answer(top["answer"])
+        stage = "qa"
+    elif callback_url:
+        # 키워드 검색으로 못 찾으면 느린 경로를 백그라운드에서 돌리고 콜백으로 응답
+        # (OpenAI까지 가면 rate_limit.LLM 예산을 따로 씀)
+        kakao_callback.submit(callback_url, lambda: _slow_answer(user_text, user_id),
+                              quick_replies=QUICK_REPLIES)
+        usage.record("/", "callback", (time.perf_counter() - started) * 1000)
+        # 실제 응답 단계는 콜백 작업의 process_message가 chatbot_answered_total에 기록
+        metrics.ENDPOINT_OUTCOME.inc(endpoint="/", outcome="callback")
+        return jsonify(kakao_callback.accepted_response()), 200
     else:
-        text = (
+        body = payloads.text(
             "원하시는 정보를 정확히 찾지 못했어요.\n"
             "아래 메뉴를 눌러보시거나, 더 구체적으로 물어봐 주세요 🙂"
         )
+        stage = "no_match"
 
-    return _kakao_ok(text)
+    usage.record("/", stage, (time.perf_counter() - started) * 1000,
+                 answered=bool(results), utterance=user_text)
+    metrics.ENDPOINT_OUTCOME.inc(endpoint="/", outcome=stage)
+    return _kakao_body(body)
 
 # ------------------------------------------------------
 # 텀 추출 (LIKE 검색용)
@@ -117,6 +252,7 @@ def _extract_terms(text: str):
 # ------------------------------------------------------
 @app.post("/link_reco")
 def link_reco():
+    started = time.perf_counter()
     data = request.get_json(silent=True) or {}
     user_text = (data.get("userRequest", {}) or {}).get("utterance")
     user_text = (user_text or "").strip()
@@ -126,9 +262,13 @@ def link_reco():
     if not user_text:
         return _kakao_ok("스킬 서버 연결 확인: OK")
 
+    if not rate_limit.LOCAL.allow(_user_id(data)):
+        return _rate_limited("/link_reco", started)
+
     terms = _extract_terms(user_text)  # 예: ["감염병"]
     if not terms:
-        return _kakao_ok(f"‘{user_text}’ 관련 링크를 찾지 못했어요. 다른 키워드로 시도해 주세요 🙂")
+        return _kakao_ok(f"‘{user_text}’ 관련 링크를 찾지 못했어요. 다른 키워드로 시도해 주세요 🙂",
+                         cache=False)
 
     # WHERE (title LIKE ? OR snippet LIKE ?) OR ... (발화 토큰별)
     where_blocks = ["(title LIKE ? OR snippet LIKE ?)"] * len(terms)
@@ -170,14 +310,19 @@ def link_reco():
         cur = con.cursor()
         cur.execute(sql, tuple(kw_params + board_params + like_params))
         rows = cur.fetchall()
-        con.close()
     except Exception as e:
         print(f"[ERROR][LINK_RECO LIKE] {type(e).__name__}: {e}")
         rows = []
 
+    usage.record("/link_reco", "link" if rows else "link_no_match",
+                 (time.perf_counter() - started) * 1000,
+                 answered=bool(rows), utterance=user_text)
+    metrics.ENDPOINT_OUTCOME.inc(endpoint="/link_reco", outcome="link" if rows else "link_no_match")
+
     # 후보 없으면 폴백 텍스트
     if not rows:
-        return _kakao_ok(f"‘{user_text}’ 관련 링크를 찾지 못했어요. 다른 키워드로 시도해 주세요 🙂")
+        return _kakao_ok(f"‘{user_text}’ 관련 링크를 찾지 못했어요. 다른 키워드로 시도해 주세요 🙂",
+                         cache=False)
 
     # listCard 구성 (최대 3개)
     items = []
@@ -228,16 +373,56 @@ def health():
             diag["integrity"] = cur.fetchone()[0]
             diag["path"] = os.path.abspath(DB_PATH)
             diag["size"] = os.path.getsize(DB_PATH)
-            con.close()
         except Exception as e:
             diag["error"] = f"{type(e).__name__}: {e}"
 
     return jsonify({
         "status": "healthy" if exists else "no-db",
         "database": "connected" if exists else "missing",
-        "diag": diag
+        "diag": diag,
+        "circuits": circuit_snapshot(),
+        "rate_limit": rate_limit.snapshot_all(),
     }), 200
 
+# ------------------------------------------------------
+# 사용 통계 (사전 집계 테이블에서 바로 응답)
+# ------------------------------------------------------
+def _stats_denied():
+    """STATS_TOKEN이 없으면 404(엔드포인트 비활성), 토큰이 틀리면 403 응답. 통과하면 None"""
+    if not STATS_TOKEN:
+        return jsonify({"error": "not found"}), 404
+    auth = request.headers.get("Authorization", "")
+    given = auth[7:] if auth.startswith("Bearer ") else ""
+    if not hmac.compare_digest(given.encode(), STATS_TOKEN.encode()):
+        return jsonify({"error": "forbidden"}), 403
+    return None
+
+@app.get("/stats")
+def stats():
+    denied = _stats_denied()
+    if denied:
+        return denied
+    try:
+        days = max(1, min(int(request.args.get("days", 7)), 90))
+    except ValueError:
+        days = 7
+    try:
+        return jsonify(usage.summary(days=days)), 200
+    except Exception as e:
+        return jsonify({"error": f"{type(e).__name__}: {e}"}), 200
+
+# ------------------------------------------------------
+# Prometheus 지표 (요청/단계/DB/OpenAI 지연 히스토그램)
+# ------------------------------------------------------
+@app.get("/metrics")
+def prometheus_metrics():
+    # 엔드포인트별 트래픽/오류 추이가 드러나므로 /stats와 같은 토큰으로만 공개
+    denied = _stats_denied()
+    if denied:
+        return denied
+    return Response(metrics.render_prometheus(),
+                    mimetype="text/plain; version=0.0.4; charset=utf-8")
+
 # ------------------------------------------------------
 # 전역 에러 핸들러 (혹시 모를 예외도 200 폴백)
 # ------------------------------------------------------
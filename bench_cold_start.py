@@ -0,0 +1,55 @@
+# bench_cold_start.py
+# 워커 기동 시 QA 준비 시간 비교: 스냅샷 없이(JSON 파싱 + 색인 생성) vs 스냅샷 한 번 읽기
+# 매 측정은 새 파이썬 프로세스에서 실행 (모듈 import 비용은 양쪽 모두 제외하고 준비 구간만 잼)
+# 실행: python bench_cold_start.py [반복 횟수]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import qa_snapshot
+
+CHILD = r"""
+import json, time
+from ai_logic import AILogic
+started = time.perf_counter()
+ai = AILogic()
+ai.warm_up()
+print(json.dumps({"ready_ms": (time.perf_counter() - started) * 1000,
+                  "from_snapshot": ai.loaded_from_snapshot}))
+"""
+
+
+def measure(snapshot_path, rounds):
+    env = dict(os.environ, QA_SNAPSHOT_PATH=snapshot_path, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "bench"))
+    samples = []
+    for _ in range(rounds):
+        out = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    ready = sorted(s["ready_ms"] for s in samples)
+    return {
+        "from_snapshot": all(s["from_snapshot"] for s in samples),
+        "median_ms": round(ready[len(ready) // 2], 2),
+        "min_ms": round(ready[0], 2),
+        "max_ms": round(ready[-1], 2),
+    }
+
+
+def main(rounds=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "qa_snapshot.bin")
+        qa_snapshot.build_snapshot(out_path=snapshot_path)
+        results = {
+            "rounds": rounds,
+            "snapshot_bytes": os.path.getsize(snapshot_path),
+            "without_snapshot": measure(os.path.join(tmp, "missing.bin"), rounds),
+            "with_snapshot": measure(snapshot_path, rounds),
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,69 @@
+# bench_payloads.py
+# 스킬 응답 직렬화 비용 비교: 요청마다 dict 조립 + 링크 분리 + jsonify  vs  사전 생성 bytes
+# 실행: python bench_payloads.py [반복 횟수]
+import json
+import os
+import sys
+import time
+
+from flask import Flask, jsonify
+
+import kakao_payloads
+from kakao_payloads import PayloadCache, QUICK_REPLIES, extract_link_from_text
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_answers():
+    with open(os.path.join(BASE_DIR, "school_dataset.json"), encoding="utf-8") as f:
+        return [qa["answer"] for qa in json.load(f) if qa.get("answer")]
+
+
+def per_call_us(func, answers, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for a in answers:
+            func(a)
+    return (time.perf_counter() - started) / (rounds * len(answers)) * 1e6
+
+
+def main(rounds=200):
+    answers = load_answers()
+    app = Flask(__name__)
+
+    def before(answer):
+        # 기존 방식: 매번 링크 분리 + dict 조립 + jsonify
+        text, link = extract_link_from_text(answer)
+        if link:
+            text = f"{text}\n{link}"
+        return jsonify({
+            "version": "2.0",
+            "template": {"outputs": [{"simpleText": {"text": text}}], "quickReplies": QUICK_REPLIES},
+        }).get_data()
+
+    def stdlib_dumps(answer):
+        text, link = extract_link_from_text(answer)
+        return json.dumps(kakao_payloads.build_payload(text, link, QUICK_REPLIES),
+                          ensure_ascii=False).encode("utf-8")
+
+    cache = PayloadCache(QUICK_REPLIES)
+    compile_started = time.perf_counter()
+    cache.compile_all(answers)
+    compile_ms = (time.perf_counter() - compile_started) * 1000
+
+    with app.app_context():
+        results = {
+            "answers": len(answers),
+            "encoder": cache.stats()["encoder"],
+            "before_jsonify_us": round(per_call_us(before, answers, rounds), 2),
+            "build_and_stdlib_json_us": round(per_call_us(stdlib_dumps, answers, rounds), 2),
+            "build_and_fast_dumps_us": round(per_call_us(cache.compile_answer, answers, rounds), 2),
+            "precompiled_lookup_us": round(per_call_us(cache.answer, answers, rounds), 3),
+            "precompile_all_ms": round(compile_ms, 2),
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
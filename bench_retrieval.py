@@ -0,0 +1,230 @@
+# bench_retrieval.py
+# 오프라인 매칭 정확도 + 지연 벤치마크 (서버 없이 함수 직접 호출)
+# - 정답 쌍: school_dataset.json 질문 -> 답변 (exact), 같은 질문을 띄어쓰기/어미만 바꾼 변형 (variant),
+#   --labels 로 준 파일 (question,answer 열의 CSV 또는 [{"question","answer"}] JSON)
+# - 대상: AILogic.find_qa_match(1순위만), RAG 검색(Retriever, QA 문서 상위 3개),
+#   app.search_qa(DB LIKE 검색, 상위 3개), AILogic.process_message(전체 파이프라인 + 응답 단계)
+# - 기본은 OpenAI를 호출하지 않음 (폴백 단계까지 가면 '못 찾음'으로 집계). --online 이면 실제 호출
+# - school_data.db의 임시 복사본을 씀 (없으면 빈 DB). qa_data 테이블이 비어 있으면 search_qa는 건너뜀
+# - 결과: 대상/세트별 top-1·top-3 정확도, 호출당 지연 p50/p95/p99(ms), 파이프라인 응답 단계 분포 JSON
+# 실행: python bench_retrieval.py [--labels data/gold.csv] [--targets qa_match,retriever,search_qa,pipeline]
+#       [--db school_data.db] [--out report.json]
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import time
+from collections import Counter
+
+import metrics
+from ai_logic import AILogic, OPENAI_FALLBACK
+from kakao_payloads import extract_link_from_text
+from load_test import DB_PATH, temp_db_copy
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ("qa_match", "retriever", "search_qa", "pipeline")
+_WS_RE = re.compile(r"\s+")
+
+
+# ---- 정답 쌍 ------------------------------------------------------
+def _norm(text):
+    return _WS_RE.sub("", text or "")
+
+
+def answer_key(answer):
+    """비교용 답변 본문 (링크 분리, 공백 제거)"""
+    text, _ = extract_link_from_text(answer or "")
+    return _norm(text)
+
+
+def variants(question):
+    """질문 하나를 사용자 말투 변형으로 (문장부호 제거 / 띄어쓰기 제거 / '알려주세요' 붙임)"""
+    base = question.strip().rstrip("?？!.~ ")
+    out = []
+    for v in (base, base.replace(" ", ""), f"{base} 알려주세요"):
+        if v and v != question.strip() and v not in out:
+            out.append(v)
+    return out
+
+
+def load_labels(path):
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    return [(r["question"].strip(), r["answer"]) for r in rows
+            if (r.get("question") or "").strip() and r.get("answer")]
+
+
+def build_sets(labels_path=None):
+    with open(os.path.join(BASE_DIR, "school_dataset.json"), encoding="utf-8") as f:
+        dataset = [(qa["question"], qa["answer"]) for qa in json.load(f)
+                   if qa.get("question") and qa.get("answer")]
+    sets = {
+        "exact": dataset,
+        "variant": [(v, a) for q, a in dataset for v in variants(q)],
+    }
+    if labels_path:
+        sets["labels"] = load_labels(labels_path)
+    return sets
+
+
+# ---- 대상별 호출 (반환: 답변 후보 목록(순위순), 응답 단계) ---------------
+def target_qa_match(ai):
+    def call(question):
+        qa = ai.find_qa_match(question)
+        return ([qa["answer"]] if qa else []), None
+    return call
+
+
+def target_retriever(ai):
+    retriever = ai.get_retriever()
+
+    def call(question):
+        hits = retriever.search(question, k=10)
+        return [doc["text"] for _, doc in hits if doc["kind"] == "qa"][:3], None
+    return call
+
+
+def qa_table_rows(db_path):
+    """qa_data 행 수 (테이블이 없으면 None)"""
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM qa_data").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        con.close()
+
+
+def target_search_qa(db_path):
+    os.environ.setdefault("ENABLE_HOT_RELOAD", "false")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    # import 시 운영 DB로 AILogic을 만들거나 백그라운드 스레드를 띄우지 않게
+    os.environ["WARM_START"] = "false"
+    os.environ["GUNICORN_PRELOAD"] = "true"
+    import app
+
+    app.DB_PATH = db_path
+
+    def call(question):
+        return [row["answer"] for row in app.search_qa(question, top_k=3)], None
+    return call
+
+
+def target_pipeline(ai):
+    def call(question):
+        _, response = ai.process_message(question, "bench")
+        text = response.get("text", "") if isinstance(response, dict) else str(response or "")
+        return ([text] if text and text != OPENAI_FALLBACK else []), metrics.answered_stage()
+    return call
+
+
+# ---- 측정 ---------------------------------------------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _hit(expected, candidate):
+    """후보가 정답 답변인지 (파이프라인 응답엔 추가 안내가 붙을 수 있어 포함 여부로 봄)"""
+    c = _norm(candidate)
+    return bool(expected) and bool(c) and (c == expected or expected in c)
+
+
+def evaluate(call, pairs):
+    top1 = top3 = 0
+    latencies = []
+    stages = Counter()
+    for question, answer in pairs:
+        expected = answer_key(answer)
+        started = time.perf_counter()
+        candidates, stage = call(question)
+        latencies.append((time.perf_counter() - started) * 1000)
+        candidates = [answer_key(c) if c else "" for c in candidates]
+        if candidates and _hit(expected, candidates[0]):
+            top1 += 1
+        if any(_hit(expected, c) for c in candidates[:3]):
+            top3 += 1
+        if stage:
+            stages[stage] += 1
+    latencies.sort()
+    n = len(pairs) or 1
+    result = {
+        "pairs": len(pairs),
+        "top1": round(top1 / n, 4),
+        "top3": round(top3 / n, 4),
+        "p50_ms": round(percentile(latencies, 50) or 0, 3),
+        "p95_ms": round(percentile(latencies, 95) or 0, 3),
+        "p99_ms": round(percentile(latencies, 99) or 0, 3),
+    }
+    if stages:
+        result["answered_by"] = dict(stages.most_common())
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="매칭 정확도/지연 오프라인 벤치마크")
+    parser.add_argument("--labels", help="추가 정답 쌍 파일 (CSV 또는 JSON)")
+    parser.add_argument("--targets", default=",".join(TARGETS), help=f"쉼표 구분: {','.join(TARGETS)}")
+    parser.add_argument("--online", action="store_true", help="파이프라인에서 OpenAI 폴백을 실제로 호출")
+    parser.add_argument("--db", default=DB_PATH, help="복사해서 쓸 DB (원본은 건드리지 않음)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"알 수 없는 대상: {', '.join(sorted(unknown))}")
+
+    sets = build_sets(args.labels)
+    db_path = temp_db_copy(args.db)
+    ai = AILogic(db_path=db_path)
+    ai.warm_up()
+    ai.db.save_conversation = lambda *a, **kw: None  # 벤치마크 질문은 대화 기록에 남기지 않음
+    if not args.online:
+        # 오프라인 측정: 폴백까지 가면 호출 없이 '못 찾음' (네트워크 지연이 매칭 지연에 섞이지 않게)
+        ai.call_openai_api = lambda *a, **kw: (False, OPENAI_FALLBACK)
+
+    factories = {"qa_match": lambda: target_qa_match(ai), "retriever": lambda: target_retriever(ai),
+                 "search_qa": lambda: target_search_qa(db_path), "pipeline": lambda: target_pipeline(ai)}
+    report = {
+        "revision": git_revision(),
+        "data_version": ai.data_version,
+        "online": args.online,
+        "sets": {name: len(pairs) for name, pairs in sets.items()},
+        "targets": {},
+    }
+    for target in targets:
+        if target == "search_qa" and not qa_table_rows(db_path):
+            print(f"[BENCH] search_qa 건너뜀: {args.db}에 qa_data 테이블이 없거나 비어 있음")
+            report["targets"][target] = {"skipped": "qa_data 테이블 없음/비어 있음"}
+            continue
+        call = factories[target]()
+        report["targets"][target] = {name: evaluate(call, pairs) for name, pairs in sets.items()}
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# browser_pool.py
+# 정말 자바스크립트 렌더링이 필요한 페이지용 헤드리스 Chrome 풀
+# - 수집 작업마다 Chrome을 새로 띄우지 않고 오래 사는 세션을 빌려 씀
+# - 이미지/폰트/CSS 요청 차단, eager 페이지 로드 전략
+# - 빌려줄 때 상태 점검, 죽은 세션은 버리고 새로 만듦
+# - 작업 중 예외가 나도 세션이 살아 있으면 (요소 대기 타임아웃 등) 풀에 돌려놓음
+# 평소 수집은 http_client로 충분하므로 Selenium은 이 모듈 안에서만 지연 import 한다.
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 1))
+PAGE_LOAD_TIMEOUT = int(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", 15))
+MAX_USES = int(os.getenv("BROWSER_MAX_USES", 200))  # 메모리 누수 대비 세션 재시작 주기
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf",
+]
+
+
+def _new_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.page_load_strategy = "eager"  # DOMContentLoaded까지만 대기
+
+    # Render 환경에서 ChromeDriver 경로 설정
+    if os.path.exists('/usr/local/bin/chromedriver'):
+        service = Service('/usr/local/bin/chromedriver')
+    else:
+        service = Service()
+
+    driver = webdriver.Chrome(service=service, options=options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except Exception as e:
+        print(f"[BROWSER] 리소스 차단 설정 실패: {e}")
+    return driver
+
+
+class _Session:
+    def __init__(self):
+        self.driver = _new_driver()
+        self.uses = 0
+
+    def healthy(self):
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def reset_tabs(self):
+        """작업 중 열린 탭은 닫고 첫 탭만 재사용"""
+        handles = self.driver.window_handles
+        for h in handles[1:]:
+            self.driver.switch_to.window(h)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """헤드리스 Chrome 세션 풀 (최대 size개, 필요할 때 생성)"""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = []  # 최근에 쓴 세션부터 재사용 (LIFO)
+        self._cond = threading.Condition()
+        self._created = 0
+        self._closed = False
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("browser pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"browser pool: {timeout}초 안에 빈 세션이 없습니다")
+                # 반납/폐기 시 깨어나 빈 세션을 가져가거나 새로 만듦
+                self._cond.wait(remaining)
+        try:
+            return _Session()  # Chrome 기동은 느리므로 잠금 밖에서
+        except Exception:
+            self._forget()
+            raise
+
+    def _release(self, session):
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _forget(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _discard(self, session):
+        session.quit()
+        self._forget()
+
+    @contextmanager
+    def borrow(self, timeout=60):
+        """세션을 빌려 WebDriver를 넘겨줌. 점검에 실패한 세션은 새로 만든다"""
+        session = self._acquire(timeout)
+        if not session.healthy():
+            self._discard(session)
+            session = self._acquire(timeout)
+
+        ok = False
+        try:
+            yield session.driver
+            ok = True
+        finally:
+            session.uses += 1
+            # 작업 쪽 예외는 세션 상태를 한 번 더 보고 드라이버가 죽었을 때만 버림
+            if session.uses < MAX_USES and not self._closed and (ok or session.healthy()):
+                try:
+                    session.reset_tabs()
+                    self._release(session)
+                except Exception:
+                    self._discard(session)
+            else:
+                self._discard(session)
+
+    def render(self, url, wait_css=None, timeout=10):
+        """url을 열어 렌더링된 HTML 반환 (wait_css가 있으면 해당 요소가 뜰 때까지 대기)"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self.borrow() as driver:
+            driver.get(url)
+            if wait_css:
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_css))
+                )
+            return driver.page_source
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in idle:
+            self._discard(session)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """프로세스 공용 풀 (프로세스 종료 시 세션 정리)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.close)
+    return _pool
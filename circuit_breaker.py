@@ -0,0 +1,129 @@
+# circuit_breaker.py
+# 외부 API(OpenAI) 호출용 서킷 브레이커
+# - 최근 WINDOW_SEC 동안(최대 WINDOW_SIZE건)의 실패율/지연 비율이 임계치를 넘으면 open
+# - open 동안은 호출하지 않고 바로 폴백 (요청당 마이크로초 단위 비용)
+# - OPEN_SEC가 지나면 half_open: 시험 호출 몇 건만 통과시켜 성공하면 closed, 실패하면 다시 open
+import os
+import time
+import threading
+from collections import deque
+
+import metrics
+
+WINDOW_SEC = float(os.getenv("CB_WINDOW_SEC", 60))
+WINDOW_SIZE = int(os.getenv("CB_WINDOW_SIZE", 20))
+MIN_CALLS = int(os.getenv("CB_MIN_CALLS", 5))              # 이보다 적게 호출됐으면 판단 보류
+FAILURE_RATIO = float(os.getenv("CB_FAILURE_RATIO", 0.5))
+SLOW_RATIO = float(os.getenv("CB_SLOW_RATIO", 0.8))
+OPEN_SEC = float(os.getenv("CB_OPEN_SEC", 30))
+HALF_OPEN_PROBES = int(os.getenv("CB_HALF_OPEN_PROBES", 1))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    def __init__(self, name, window_sec=WINDOW_SEC, window_size=WINDOW_SIZE, min_calls=MIN_CALLS,
+                 failure_ratio=FAILURE_RATIO, slow_ratio=SLOW_RATIO, open_sec=OPEN_SEC,
+                 half_open_probes=HALF_OPEN_PROBES):
+        self.name = name
+        self.window_sec = window_sec
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_ratio = slow_ratio
+        self.open_sec = open_sec
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window_size)   # (시각, 실패 여부, 느림 여부)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejected = 0
+        self._last_error = None
+        with _breakers_lock:
+            _breakers[name] = self
+        metrics.CIRCUIT_STATE.set(0, name=name)
+
+    def _set_state(self, state, now):
+        if state == self._state:
+            return
+        print(f"[CIRCUIT] {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = now
+        if state != CLOSED:
+            self._probes = 0
+        if state == CLOSED:
+            self._calls.clear()
+        metrics.CIRCUIT_STATE.set(_STATE_VALUE[state], name=self.name)
+
+    def allow(self):
+        """지금 호출해도 되는지. False면 호출하지 말고 바로 폴백"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.open_sec:
+                self._set_state(HALF_OPEN, now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+        metrics.CIRCUIT_REJECTED.inc(name=self.name)
+        return False
+
+    def cancel(self):
+        """allow()가 True였지만 호출하지 않고 끝낸 경우 (half_open 시험 호출 자리 반환)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record(self, success, slow=False, error=None):
+        """호출 결과 기록. slow: 성공했지만 느렸던 호출"""
+        with self._lock:
+            now = time.monotonic()
+            if not success:
+                self._last_error = error
+            if self._state == HALF_OPEN:
+                self._set_state(CLOSED if success and not slow else OPEN, now)
+                return
+            if self._state == OPEN:
+                return  # open 직전에 나간 호출의 늦은 결과
+            self._calls.append((now, not success, slow))
+            while self._calls and now - self._calls[0][0] > self.window_sec:
+                self._calls.popleft()
+            n = len(self._calls)
+            if n < self.min_calls:
+                return
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slows = sum(1 for _, failed, s in self._calls if s and not failed)
+            if failures / n >= self.failure_ratio or slows / n >= self.slow_ratio:
+                self._set_state(OPEN, now)
+
+    def snapshot(self):
+        with self._lock:
+            n = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slows = sum(1 for _, failed, s in self._calls if s and not failed)
+            out = {
+                "state": self._state,
+                "window_calls": n,
+                "failure_ratio": round(failures / n, 3) if n else 0.0,
+                "slow_ratio": round(slows / n, 3) if n else 0.0,
+                "rejected": self._rejected,
+                "last_error": self._last_error,
+            }
+            if self._state == OPEN:
+                out["retry_in_sec"] = round(max(0.0, self.open_sec - (time.monotonic() - self._opened_at)), 1)
+            return out
+
+
+def snapshot_all():
+    """등록된 모든 브레이커 상태 (/health 용)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
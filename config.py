@@ -19,6 +19,14 @@ DEBUG = os.environ.get("DEBUG", "True").lower() == "true"
 TEMPERATURE = float(os.environ.get("TEMPERATURE", 0.7))
 MAX_TOKENS = int(os.environ.get("MAX_TOKENS", 150))
 TOP_P = float(os.environ.get("TOP_P", 1.0))
+# 콜백(useCallback) 모드에서 쓰는 긴 답변용 OpenAI 타임아웃(초)
+LONG_ANSWER_TIMEOUT = float(os.environ.get("LONG_ANSWER_TIMEOUT", 30))
+# OpenAI 폴백 프롬프트에 넣을 학교 자료(검색 결과) 토큰 예산 (짧은 답변 / 콜백 모드)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 500))
+LONG_CONTEXT_TOKEN_BUDGET = int(os.environ.get("LONG_CONTEXT_TOKEN_BUDGET", 1500))
+RAG_TOP_K = int(os.environ.get("RAG_TOP_K", 5))
+# 검색 결과 뒤에 덧붙일 공지 첨부파일 본문(FTS) 조각 수 (0이면 사용 안 함)
+RAG_ATTACHMENT_TOP_K = int(os.environ.get("RAG_ATTACHMENT_TOP_K", 2))
 
 # 금지 단어 목록
 BAN_WORDS = ["욕설", "비속어", "폭력", "자살", "살인", "테러"] 
\ No newline at end of file
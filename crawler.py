@@ -4,9 +4,10 @@ from urllib.parse import urljoin, urlparse
 from collections import deque
 from datetime import datetime
 
-import requests
 from bs4 import BeautifulSoup
 
+import http_client
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "school_data.db")
 
@@ -26,7 +27,6 @@ MAX_PAGES = 200            # 과도한 크롤 방지
 REQUEST_GAP_SEC = 0.5      # 로봇/서버 배려: 요청 간격
 TIMEOUT = 10
 SAME_DOMAIN_ONLY = True    # 시작 도메인(첫 URL) 밖으로는 안 나감
-USER_AGENT = "Mozilla/5.0 (compatible; SchoolBot/1.0; +https://example.com/bot)"
 
 # ---- 유틸 -----------------------------------------------------------
 def same_domain(u, root):
@@ -41,9 +41,8 @@ def clean_text(html):
     return text[:20000]  # 너무 긴 문서는 잘라 저장
 
 def fetch(url):
-    resp = requests.get(url, timeout=TIMEOUT, headers={"User-Agent": USER_AGENT})
-    resp.raise_for_status()
-    return resp.text
+    # 공용 세션(keep-alive + 재시도/백오프) 사용
+    return http_client.fetch(url, timeout=TIMEOUT)
 
 def ensure_tables(con):
     cur = con.cursor()
@@ -90,8 +89,9 @@ def crawl():
 
         try:
             html = fetch(url)
-        except Exception:
-            # 실패한 페이지는 건너뜀
+        except Exception as e:
+            # 재시도 후에도 실패한 페이지는 건너뜀
+            print(f"[CRAWL SKIP] {url} ({type(e).__name__}: {e})")
             continue
 
         visited.add(url)
@@ -114,7 +114,7 @@ def crawl():
         time.sleep(REQUEST_GAP_SEC)
 
     con.close()
-    print(f"[CRAWL DONE] saved_pages={saved}")
+    print(f"[CRAWL DONE] saved_pages={saved}, http={http_client.get_stats()}")
 
 if __name__ == "__main__":
     crawl()
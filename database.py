@@ -1,12 +1,32 @@
 import os
+import re
 import sqlite3
 import json
+import threading
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 
+import metrics
+
+# 다른 스레드/프로세스가 쓰는 중이면 이만큼 기다렸다가 재시도 (database is locked 방지)
+DB_BUSY_TIMEOUT_SEC = float(os.getenv("DB_BUSY_TIMEOUT", 5))
+
 # 한국 시간대 설정 (UTC+9) - 표시용만
 KST = timezone(timedelta(hours=9))
 
+# 자주 실행되는 조회 쿼리 (test_query_plans.py가 인덱스 사용 여부를 검사)
+SQL_CONVERSATION_HISTORY = (
+    'SELECT * FROM conversation_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?'
+)
+SQL_MEAL_INFO = 'SELECT menu FROM meals WHERE date = ? AND meal_type = ?'
+SQL_MEALS_BETWEEN = (
+    'SELECT date, menu FROM meals WHERE date BETWEEN ? AND ? AND meal_type = ? ORDER BY date'
+)
+SQL_LATEST_NOTICES = (
+    'SELECT id, title, content, url, created_at, tags, category '
+    'FROM notices ORDER BY created_at DESC LIMIT ?'
+)
+
 def get_kst_now():
     """현재 한국 시간 반환 (표시용)"""
     return datetime.now(KST)
@@ -19,13 +39,25 @@ class DatabaseManager:
         """
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.db_path = db_path or os.path.join(base_dir, "school_data.db")
+        self._local = threading.local()
         self.init_database()
     
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 연결 (gthread 워커에서 스레드끼리 연결을 공유하지 않고, 요청마다 새로 열지도 않음)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SEC)
+            self._local.conn = conn
+        return conn
+    
     def init_database(self):
         """데이터베이스 초기화 및 테이블 생성"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # 읽기 요청이 대화 기록 저장(쓰기)에 막히지 않도록 WAL 모드 (DB 파일에 유지되는 설정)
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # QA 데이터 테이블
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS qa_data (
@@ -45,7 +77,37 @@ class DatabaseManager:
                 user_id TEXT NOT NULL,
                 message TEXT NOT NULL,
                 response TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                category TEXT,
+                stage TEXT,
+                outcome TEXT
+            )
+        ''')
+        cols = self._table_columns(cursor, "conversation_history")
+        for col in ("category", "stage", "outcome"):
+            if col not in cols:
+                cursor.execute(f"ALTER TABLE conversation_history ADD COLUMN {col} TEXT")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conversation_user_ts
+            ON conversation_history(user_id, timestamp DESC)
+        ''')
+        
+        # 대화 일별 집계 (오래된 원본 행은 maintenance.py가 집계 후 아카이브)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversation_daily_stats (
+                day TEXT NOT NULL,
+                category TEXT NOT NULL DEFAULT '',
+                stage TEXT NOT NULL DEFAULT '',
+                outcome TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, category, stage, outcome)
+            )
+        ''')
+        # 월별 대화 아카이브 파일의 커밋된 길이 (이보다 긴 꼬리는 커밋 전에 중단된 배치라 잘라냄)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversation_archive_files (
+                month TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
             )
         ''')
         
@@ -59,6 +121,7 @@ class DatabaseManager:
                 image_url TEXT
             )
         ''')
+        self._migrate_meals(cursor)
         
         # 공지사항 테이블
         cursor.execute('''
@@ -69,16 +132,133 @@ class DatabaseManager:
                 url TEXT,
                 created_at TEXT,
                 tags TEXT,
-                category TEXT
+                category TEXT,
+                bbs_id TEXT,
+                ntt_sn INTEGER
+            )
+        ''')
+        self._migrate_notices(cursor)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_notices_created_at ON notices(created_at)')
+        
+        # 공지사항 첨부파일 본문 (+ FTS5 전문 검색 색인)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notice_attachments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bbs_id TEXT NOT NULL,
+                ntt_sn INTEGER NOT NULL,
+                file_name TEXT NOT NULL,
+                url TEXT,
+                size INTEGER,
+                content TEXT,
+                extracted_at TEXT,
+                status TEXT NOT NULL DEFAULT 'ok',
+                attempts INTEGER NOT NULL DEFAULT 1,
+                UNIQUE(bbs_id, ntt_sn, file_name)
+            )
+        ''')
+        cols = self._table_columns(cursor, "notice_attachments")
+        if "status" not in cols:
+            # 추출 실패 행은 'failed'로 남겨 다음 수집 때 다시 시도
+            cursor.execute("ALTER TABLE notice_attachments ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+        if "attempts" not in cols:
+            cursor.execute("ALTER TABLE notice_attachments ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1")
+        cursor.executescript('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS notice_attachments_fts USING fts5(
+                file_name, content,
+                content='notice_attachments', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS notice_attachments_ai AFTER INSERT ON notice_attachments BEGIN
+                INSERT INTO notice_attachments_fts(rowid, file_name, content)
+                VALUES (new.id, new.file_name, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS notice_attachments_ad AFTER DELETE ON notice_attachments BEGIN
+                INSERT INTO notice_attachments_fts(notice_attachments_fts, rowid, file_name, content)
+                VALUES ('delete', old.id, old.file_name, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS notice_attachments_au AFTER UPDATE ON notice_attachments BEGIN
+                INSERT INTO notice_attachments_fts(notice_attachments_fts, rowid, file_name, content)
+                VALUES ('delete', old.id, old.file_name, old.content);
+                INSERT INTO notice_attachments_fts(rowid, file_name, content)
+                VALUES (new.id, new.file_name, new.content);
+            END;
+        ''')
+        
+        # 게시판별 수집 워터마크 (마지막으로 수집한 nttSn)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_watermarks (
+                board_id TEXT PRIMARY KEY,
+                last_ntt_sn INTEGER NOT NULL,
+                updated_at TEXT
             )
         ''')
         
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def _table_columns(cursor, table: str) -> List[str]:
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in cursor.fetchall()]
+    
+    def _migrate_notices(self, cursor):
+        """notices를 (bbs_id, ntt_sn) 키로 식별하도록 마이그레이션
+
+        예전 행은 url에 담긴 bbsId/nttSn으로 채우고, 키가 없는 행은 NULL로 남긴다
+        (UNIQUE 인덱스에서 NULL끼리는 충돌하지 않음).
+        """
+        cols = self._table_columns(cursor, "notices")
+        if "bbs_id" not in cols:
+            cursor.execute("ALTER TABLE notices ADD COLUMN bbs_id TEXT")
+        if "ntt_sn" not in cols:
+            cursor.execute("ALTER TABLE notices ADD COLUMN ntt_sn INTEGER")
+        
+        cursor.execute("SELECT bbs_id, ntt_sn FROM notices WHERE ntt_sn IS NOT NULL")
+        taken = set(cursor.fetchall())
+        cursor.execute(
+            "SELECT id, url FROM notices WHERE ntt_sn IS NULL AND url LIKE '%nttSn=%' ORDER BY id"
+        )
+        updates = []
+        for row_id, url in cursor.fetchall():
+            bbs = re.search(r'bbsId=(\d+)', url)
+            ntt = re.search(r'nttSn=(\d+)', url)
+            if not (bbs and ntt):
+                continue
+            key = (bbs.group(1), int(ntt.group(1)))
+            # 같은 글이 여러 번 저장돼 있으면 가장 먼저 저장된 행만 키를 가짐
+            if key not in taken:
+                taken.add(key)
+                updates.append((key[0], key[1], row_id))
+        cursor.executemany('UPDATE notices SET bbs_id = ?, ntt_sn = ? WHERE id = ?', updates)
+        
+        cursor.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS uq_notices_board_ntt ON notices(bbs_id, ntt_sn)'
+        )
+    
+    def _migrate_meals(self, cursor):
+        """meals에 (date, meal_type) 유일성과 날짜 범위 조회용 커버링 인덱스 적용
+
+        유일 인덱스가 아직 없을 때만(최초 1회) 같은 날짜/구분의 중복 행을 가장 최근 것만 남기고 만든다.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_meals_date_type'"
+        )
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                DELETE FROM meals WHERE id NOT IN (
+                    SELECT MAX(id) FROM meals GROUP BY date, meal_type
+                )
+            ''')
+            cursor.execute(
+                'CREATE UNIQUE INDEX uq_meals_date_type ON meals(date, meal_type)'
+            )
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_meals_date_cover ON meals(date, meal_type, menu)'
+        )
+    
+    @metrics.timed_db("qa_data")
     def get_qa_data(self, category: Optional[str] = None) -> List[Dict]:
         """QA 데이터 조회"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         if category:
@@ -87,7 +267,6 @@ class DatabaseManager:
             cursor.execute('SELECT * FROM qa_data')
         
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
@@ -101,9 +280,12 @@ class DatabaseManager:
             for row in results
         ]
     
-    def save_conversation(self, user_id: str, message: str, response):
-        """대화 히스토리 저장"""
-        conn = sqlite3.connect(self.db_path)
+    @metrics.timed_db("save_conversation")
+    def save_conversation(self, user_id: str, message: str, response,
+                          category: Optional[str] = None, stage: Optional[str] = None,
+                          outcome: Optional[str] = None):
+        """대화 히스토리 저장 (category/stage/outcome은 일별 집계용)"""
+        conn = self._connection()
         cursor = conn.cursor()
         
         # response가 dict인 경우 텍스트로 변환
@@ -116,25 +298,22 @@ class DatabaseManager:
             response_text = str(response)
         
         cursor.execute(
-            'INSERT INTO conversation_history (user_id, message, response) VALUES (?, ?, ?)',
-            (user_id, message, response_text)
+            'INSERT INTO conversation_history (user_id, message, response, category, stage, outcome) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (user_id, message, response_text, category, stage, outcome)
         )
         
         conn.commit()
-        conn.close()
     
+    @metrics.timed_db("conversation_history")
     def get_conversation_history(self, user_id: str, limit: int = 5) -> List[Dict]:
         """사용자별 대화 히스토리 조회"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        cursor.execute(
-            'SELECT * FROM conversation_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?',
-            (user_id, limit)
-        )
+        cursor.execute(SQL_CONVERSATION_HISTORY, (user_id, limit))
         
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
@@ -147,28 +326,71 @@ class DatabaseManager:
             for row in results
         ]
     
-    def get_meal_info(self, date: str) -> Optional[str]:
+    @metrics.timed_db("meal_info")
+    def get_meal_info(self, date: str, meal_type: str = "중식") -> Optional[str]:
         """특정 날짜의 식단 정보 조회"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT menu FROM meals WHERE date = ? AND meal_type = "중식"', (date,))
+        cursor.execute(SQL_MEAL_INFO, (date, meal_type))
         result = cursor.fetchone()
         
-        conn.close()
-        
         return result[0] if result else None
     
+    @metrics.timed_db("meals_between")
+    def get_meals_between(self, start: str, end: str, meal_type: str = "중식") -> List[Dict]:
+        """기간(start~end, 양 끝 포함) 식단 조회 - 커버링 인덱스 범위 스캔"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(SQL_MEALS_BETWEEN, (start, end, meal_type))
+        results = cursor.fetchall()
+        
+        return [{'date': row[0], 'menu': row[1]} for row in results]
+    
+    @metrics.timed_db("search_attachments")
+    def search_attachments(self, query: str, limit: int = 3) -> List[Dict]:
+        """첨부파일 본문 전문 검색 (FTS5, 관련도 순)"""
+        terms = [t for t in re.split(r'\s+', query.strip()) if len(t) >= 3]
+        if not terms:
+            return []
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT a.bbs_id, a.ntt_sn, a.file_name, a.url, n.title,
+                   snippet(notice_attachments_fts, 1, '', '', '…', 20)
+            FROM notice_attachments_fts
+            JOIN notice_attachments a ON a.id = notice_attachments_fts.rowid
+            LEFT JOIN notices n ON n.bbs_id = a.bbs_id AND n.ntt_sn = a.ntt_sn
+            WHERE notice_attachments_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        ''', (match, limit))
+        results = cursor.fetchall()
+        
+        return [
+            {
+                'bbs_id': row[0],
+                'ntt_sn': row[1],
+                'file_name': row[2],
+                'url': row[3],
+                'notice_title': row[4],
+                'snippet': row[5]
+            }
+            for row in results
+        ]
+    
+    @metrics.timed_db("latest_notices")
     def get_latest_notices(self, limit: int = 5) -> List[Dict]:
         """최신 공지사항 조회"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM notices ORDER BY created_at DESC LIMIT ?', (limit,))
+        cursor.execute(SQL_LATEST_NOTICES, (limit,))
         results = cursor.fetchall()
         
-        conn.close()
-        
         return [
             {
                 'id': row[0],
@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+# 운영 서버 설정 (gunicorn이 실행 폴더의 이 파일을 자동으로 읽음)
+# - preload_app: 마스터에서 app을 한 번 import해 QA 데이터/검색 색인/응답 bytes를 만든 뒤 fork
+#   -> 워커 여러 개가 읽기 전용 구조를 copy-on-write 페이지로 공유 (워커마다 따로 로드하지 않음)
+# - fork 직전 gc.freeze(): 이미 만들어진 객체를 GC 추적 대상에서 빼서, 워커의 GC가
+#   공유 페이지의 객체 헤더를 건드려 페이지가 복사되는 일을 막음
+# - 스레드는 fork를 따라오지 않으므로 통계 플러시/핫 리로드 타이머는 post_fork에서 워커마다 시작
+# - ENABLE_MAINTENANCE 스케줄러는 마스터/워커 안이 아니라 when_ready에서 띄우는 전용 프로세스 하나에서
+#   실행 (MAINTENANCE_SCHEDULER=off면 띄우지 않음: 외부 cron에서 python maintenance.py 실행할 때)
+# 워커별 메모리 비교: python measure_worker_rss.py
+import gc
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("GUNICORN_PRELOAD", "true")
+if os.getenv("ENABLE_MAINTENANCE", "false").lower() == "true":
+    os.environ.setdefault("MAINTENANCE_SCHEDULER", "process")  # app import 시 스레드로 시작하지 않게
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ["GUNICORN_PRELOAD"].lower() == "true"
+maintenance_process = os.getenv("MAINTENANCE_SCHEDULER") == "process"
+_maintenance = None
+
+
+def when_ready(server):
+    global _maintenance
+    # app import(웜업) 중에 생긴 임시 객체를 정리한 뒤 남은 것 전부 고정
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info("gc.freeze: %d objects", gc.get_freeze_count())
+    if maintenance_process:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maintenance.py")
+        _maintenance = subprocess.Popen([sys.executable, script, "--schedule"])
+        server.log.info("maintenance scheduler pid %d", _maintenance.pid)
+
+
+def pre_fork(server, worker):
+    # 워커 재시작 때도 그 사이 마스터에 생긴 객체까지 고정
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.start_worker_threads()
+
+
+def on_exit(server):
+    if _maintenance is not None and _maintenance.poll() is None:
+        _maintenance.terminate()
+        _maintenance.wait(timeout=10)
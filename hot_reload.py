@@ -0,0 +1,77 @@
+# hot_reload.py
+# QA 데이터/검색 색인 무중단 갱신
+# - school_dataset.json(엑셀 동기화, fix_* 스크립트)이나 school_data.db(야간 크롤링)가 바뀌면
+#   백그라운드 스레드에서 새 색인을 만들고 AILogic의 상태 참조를 한 번에 교체
+# - 처리 중인 요청은 시작할 때 잡은 이전 상태로 끝까지 처리 (ai_logic.process_message 참고)
+# - 매 주기 먼저 파일 mtime/크기만 보고, 달라졌을 때만 내용 지문(해시 + DB 세대)을 계산
+import os
+import threading
+
+from qa_snapshot import DATASET_PATH
+
+RELOAD_INTERVAL_SEC = int(os.getenv("QA_RELOAD_INTERVAL", 60))
+
+
+def _stat_key(paths):
+    """파일 (mtime, 크기) 묶음. 없으면 None"""
+    key = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            key.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+
+class QAReloader:
+    """AILogic 원본 변경 감시 (데몬 타이머)"""
+
+    def __init__(self, ai, on_swap=None, interval=RELOAD_INTERVAL_SEC):
+        self.ai = ai
+        self.on_swap = on_swap          # 교체 직후 호출 (예: 앱의 응답 bytes 다시 생성)
+        self.interval = interval
+        db_path = ai.db.db_path
+        self.paths = (DATASET_PATH, db_path, f"{db_path}-wal")
+        self._last_key = _stat_key(self.paths)
+        self._timer = None
+        self.reloads = 0
+
+    def check(self, force=False) -> bool:
+        """한 번 점검. 새 상태로 교체했으면 True"""
+        key = _stat_key(self.paths)
+        if not force and key == self._last_key:
+            return False
+        self._last_key = key
+        try:
+            swapped = self.ai.reload_if_changed()
+        except Exception as e:
+            # 새 색인 생성에 실패하면 기존 상태를 그대로 유지
+            print(f"[RELOAD] 실패, 기존 데이터 유지: {type(e).__name__}: {e}")
+            return False
+        if swapped:
+            self.reloads += 1
+            if self.on_swap:
+                try:
+                    self.on_swap(self.ai._state)
+                except Exception as e:
+                    print(f"[RELOAD] 교체 후 처리 실패: {type(e).__name__}: {e}")
+        return swapped
+
+    def start(self):
+        """RELOAD_INTERVAL_SEC마다 점검하는 데몬 타이머 시작"""
+        self._schedule()
+        return self
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+
+    def _tick(self):
+        self.check()
+        self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
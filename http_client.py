@@ -0,0 +1,157 @@
+# http_client.py
+# 크롤러/게시판/급식 수집기가 함께 쓰는 HTTP 클라이언트
+# - 호스트별 커넥션 풀 + keep-alive (매 요청마다 TCP/TLS 핸드셰이크 방지)
+# - 멱등 GET에 한해 지수 백오프 재시도
+# - 상태코드별 카운터 (수집 결과 진단용)
+# - 호스트별 동시 요청 수/요청 간격 제한 (학교 서버 배려)
+import os
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ---- 설정 -----------------------------------------------------------
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5))  # 0.5s, 1s, 2s ...
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+PER_HOST_CONCURRENCY = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", 4))
+PER_HOST_INTERVAL = float(os.getenv("HTTP_PER_HOST_INTERVAL", 0.05))  # 같은 호스트 요청 시작 간격(초)
+MAX_WORKERS = int(os.getenv("HTTP_MAX_WORKERS", 8))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "Mozilla/5.0 (compatible; SchoolBot/1.0; +https://example.com/bot)"
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_status_counts = Counter()
+_hosts_lock = threading.Lock()
+_hosts = {}
+
+
+class _HostGate:
+    """호스트 하나에 대한 동시 요청 수와 요청 시작 간격 제한"""
+
+    def __init__(self, concurrency, interval):
+        self.sem = threading.BoundedSemaphore(concurrency)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait_turn(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+@contextmanager
+def host_slot(url):
+    """url의 호스트에 대해 예의 있게(동시 수/간격 제한) 요청 구간을 잡음"""
+    host = urlparse(url).netloc
+    with _hosts_lock:
+        gate = _hosts.get(host)
+        if gate is None:
+            gate = _hosts[host] = _HostGate(PER_HOST_CONCURRENCY, PER_HOST_INTERVAL)
+    with gate.sem:
+        gate.wait_turn()
+        yield
+
+
+def _count(key):
+    with _stats_lock:
+        _status_counts[key] += 1
+
+
+def _build_session():
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),  # 멱등 요청만 재시도
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"User-Agent": USER_AGENT, "Connection": "keep-alive"})
+    return s
+
+
+def get_session():
+    """프로세스 공용 세션 반환 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url, params=None, timeout=None, **kwargs):
+    """공용 세션으로 GET. 재시도 후에도 실패하면 예외를 그대로 올림"""
+    try:
+        with host_slot(url):
+            resp = get_session().get(url, params=params, timeout=timeout or TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        _count(type(e).__name__)
+        raise
+    _count(resp.status_code)
+    return resp
+
+
+def post(url, json=None, timeout=None, **kwargs):
+    """공용 세션으로 POST (멱등이 아니므로 자동 재시도 없음)"""
+    try:
+        with host_slot(url):
+            resp = get_session().post(url, json=json, timeout=timeout or TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        _count(type(e).__name__)
+        raise
+    _count(resp.status_code)
+    return resp
+
+
+def fetch(url, params=None, timeout=None):
+    """GET 후 상태코드 확인, 본문 텍스트 반환"""
+    resp = get(url, params=params, timeout=timeout)
+    resp.raise_for_status()
+    return resp.text
+
+
+def map_bounded(func, items, max_workers=None):
+    """items 각각에 func를 제한된 스레드 풀에서 적용 (입력 순서대로 결과 반환)
+
+    호스트별 제한은 get()에서 걸리므로 워커 수는 전체 동시성 상한 역할만 한다.
+    """
+    items = list(items)
+    if not items:
+        return []
+    workers = max(1, min(max_workers or MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def get_stats():
+    """상태코드(또는 예외 이름)별 누적 요청 수"""
+    with _stats_lock:
+        return {str(k): v for k, v in _status_counts.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _status_counts.clear()
@@ -2,102 +2,128 @@ import sqlite3
 import time
 import json
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
 from datetime import datetime, timezone, timedelta
+from urllib.parse import urljoin
 import os
 
+from bs4 import BeautifulSoup
+
+import http_client
+import notice_attachments
+from database import DatabaseManager
+
 # 한국 시간대 설정 (UTC+9) - 표시용만
 KST = timezone(timedelta(hours=9))
 
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "school_data.db")
+
+# 공지사항 게시판 (selectNttList.do / selectNttInfo.do)
+BOARD_BASE = "https://pajuwaseok-e.goepj.kr/pajuwaseok-e/na/ntt/"
+NOTICE_MI = "8476"
+NOTICE_BBS_ID = "5794"
+NOTICE_MAX_PAGES = int(os.getenv("NOTICE_MAX_PAGES", 10))  # 목록 페이지 최대 확인 수 (안전장치)
+NOTICE_WORKERS = 8         # 상세 페이지 동시 요청 수 (호스트별 제한은 http_client가 담당)
+
+# 급식 식단표 (selectFoodMenuView.do) - 날짜 파라미터로 원하는 주를 직접 조회
+MEAL_URL = "https://pajuwaseok-e.goepj.kr/pajuwaseok-e/ad/fm/foodmenu/selectFoodMenuView.do"
+MEAL_MI = "8432"
+MEAL_DATE_PARAM = os.getenv("MEAL_DATE_PARAM", "schDt")
+MEAL_WEEKS = 10            # 증분 수집 시 이번 주부터 확인할 주 수
+MEAL_TYPES = ("조식", "중식", "석식")
+# HTTP 응답에 식단표가 없을 때(스크립트로 그리는 경우) 헤드리스 브라우저 풀로 재시도
+BROWSER_FALLBACK = os.getenv("BROWSER_FALLBACK", "false").lower() == "true"
+# 식단 칸 안에서 메뉴가 아닌 단락 (영양/알레르기/원산지 등)
+MEAL_NOISE_RE = re.compile(r'(kcal|칼로리|열량|영양|알레르기|알러지|원산지|탄수화물|단백질|지방)', re.I)
+
+DATE_RE = re.compile(r'(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})')
+# 글 번호: nttSn=123 / 'nttSn':'123' 처럼 이름이 붙은 경우를 먼저 보고,
+# 없으면 goView('8476','5794','1286622') 같은 JS 호출의 마지막 숫자 인자 (앞쪽은 메뉴/게시판 id)
+NTT_SN_RE = re.compile(r"nttSn\W{0,3}(\d+)", re.I)
+JS_CALL_RE = re.compile(r"\w+\s*\(([^)]*)\)")
+JS_NUM_ARG_RE = re.compile(r"\s*['\"]?(\d{4,})['\"]?\s*")
+
 def get_kst_now():
     """현재 한국 시간 반환 (표시용)"""
     return datetime.now(KST)
 
-def get_latest_notice_date():
-    """DB에서 최신 공지사항 날짜 조회"""
+def get_notice_watermark(bbs_id):
+    """게시판별 마지막 수집 nttSn 조회 (없으면 notices에 저장된 최대값)"""
     try:
-        conn = sqlite3.connect('school_data.db')
+        conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
-        cursor.execute("SELECT MAX(created_at) FROM notices")
-        latest_date = cursor.fetchone()[0]
+        cursor.execute("SELECT last_ntt_sn FROM crawl_watermarks WHERE board_id = ?", (bbs_id,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("SELECT MAX(ntt_sn) FROM notices WHERE bbs_id = ?", (bbs_id,))
+            row = cursor.fetchone()
         conn.close()
-        return latest_date
+        return row[0] if row and row[0] is not None else 0
     except Exception as e:
         print(f"DB 조회 오류: {e}")
-        return None
+        return 0
+
+def save_notices_to_db(notices_data, watermarks=None):
+    """공지사항 데이터를 (bbs_id, ntt_sn) 기준으로 일괄 업서트하고 워터마크 갱신
 
-def save_notices_to_db(notices_data):
-    """공지사항 데이터를 DB에 저장"""
+    watermarks: {bbs_id: nttSn} 같은 트랜잭션에서 올릴 워터마크. None이면 저장한 글의 최대 nttSn
+    """
+    if not notices_data:
+        return 0
     try:
-        conn = sqlite3.connect('school_data.db')
+        conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         
-        # 기존 제목 목록 (중복 방지)
-        cursor.execute("SELECT title FROM notices")
-        existing_titles = {row[0] for row in cursor.fetchall()}
+        cursor.executemany("""
+            INSERT INTO notices (bbs_id, ntt_sn, title, content, url, created_at, tags, category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(bbs_id, ntt_sn) DO UPDATE SET
+                title = excluded.title,
+                content = excluded.content,
+                url = excluded.url,
+                created_at = excluded.created_at,
+                tags = excluded.tags
+        """, [(
+            notice['bbs_id'],
+            notice['ntt_sn'],
+            notice['title'],
+            notice['content'],
+            notice['url'],
+            notice['created_at'],
+            notice['tags'],
+            notice['category']
+        ) for notice in notices_data])
         
-        new_count = 0
-        for notice in notices_data:
-            if notice['title'] not in existing_titles:
-                cursor.execute("""
-                    INSERT INTO notices (title, content, url, created_at, tags, category)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    notice['title'],
-                    notice['content'],
-                    notice['url'],
-                    notice['created_at'],
-                    notice['tags'],
-                    notice['category']
-                ))
-                new_count += 1
-                print(f"새 공지사항 추가: {notice['title']}")
+        # 게시판별 워터마크는 앞으로만 이동
+        marks = watermarks
+        if marks is None:
+            marks = {}
+            for notice in notices_data:
+                marks[notice['bbs_id']] = max(marks.get(notice['bbs_id'], 0), notice['ntt_sn'])
+        now = get_kst_now().isoformat()
+        cursor.executemany("""
+            INSERT INTO crawl_watermarks (board_id, last_ntt_sn, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(board_id) DO UPDATE SET
+                last_ntt_sn = MAX(last_ntt_sn, excluded.last_ntt_sn),
+                updated_at = excluded.updated_at
+        """, [(bbs_id, ntt_sn, now) for bbs_id, ntt_sn in marks.items()])
         
         conn.commit()
         conn.close()
-        print(f"총 {new_count}개의 새로운 공지사항이 저장되었습니다.")
-        return new_count
+        for notice in notices_data:
+            print(f"공지사항 저장: {notice['title']} (nttSn={notice['ntt_sn']})")
+        print(f"총 {len(notices_data)}개의 공지사항이 저장되었습니다.")
+        return len(notices_data)
         
     except Exception as e:
         print(f"DB 저장 오류: {e}")
         return 0
 
-def setup_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 백그라운드 실행
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-web-security")
-    chrome_options.add_argument("--allow-running-insecure-content")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-plugins")
-    chrome_options.add_argument("--disable-images")
-    chrome_options.add_argument("--disable-javascript")
-    
-    # Render 환경에서 ChromeDriver 경로 설정
-    if os.path.exists('/usr/local/bin/chromedriver'):
-        service = Service('/usr/local/bin/chromedriver')
-    else:
-    service = Service()
-    
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.implicitly_wait(3)
-    return driver
-
-def extract_notice_content(driver):
-    """공지사항 본문 추출"""
-    try:
-        el = driver.find_element(By.CSS_SELECTOR, "div.bbsV_cont")
-        return el.text.strip()
-    except Exception:
-        return ""
+def extract_notice_content(html):
+    """공지사항 상세 HTML에서 본문 추출"""
+    soup = BeautifulSoup(html, "html.parser")
+    el = soup.select_one("div.bbsV_cont")
+    return el.get_text("\n", strip=True) if el else ""
 
 def parse_date(date_str):
     """날짜 문자열을 표준 형식으로 변환"""
@@ -109,257 +135,338 @@ def parse_date(date_str):
     except:
         return date_str
 
+def _extract_ntt_sn(a):
+    """목록 링크의 href/onclick/data-* 속성에서 nttSn 추출"""
+    scripts = [a.get("href") or "", a.get("onclick") or ""]
+    for text in scripts:
+        m = NTT_SN_RE.search(text)
+        if m:
+            return m.group(1)
+    for text in scripts:
+        for call in JS_CALL_RE.finditer(text):
+            nums = [m.group(1) for m in map(JS_NUM_ARG_RE.fullmatch, call.group(1).split(",")) if m]
+            if nums:
+                return nums[-1]
+    # data-ntt-sn="1286622" / data-id="1286622": 속성값 자체가 숫자 (nttSn이 들어간 이름 우선)
+    data = sorted(((k, v.strip()) for k, v in a.attrs.items()
+                   if k.startswith("data-") and isinstance(v, str)),
+                  key=lambda kv: "ntt" not in kv[0].lower())
+    for _, value in data:
+        if JS_NUM_ARG_RE.fullmatch(value):
+            return value
+    return None
+
+def notice_list_url(page=1):
+    return (f"{BOARD_BASE}selectNttList.do?mi={NOTICE_MI}&bbsId={NOTICE_BBS_ID}"
+            f"&currPage={page}")
+
+def notice_detail_url(ntt_sn):
+    return (f"{BOARD_BASE}selectNttInfo.do?mi={NOTICE_MI}&bbsId={NOTICE_BBS_ID}"
+            f"&nttSn={ntt_sn}")
+
+def parse_notice_list(html):
+    """게시판 목록 HTML에서 (nttSn, 제목, 작성일) 목록 추출
+
+    칸 순서에 의존하지 않도록 행 안에서 날짜 형식의 칸을 찾아 작성일로 사용한다.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
+    for row in soup.select("table tbody tr"):
+        a = row.select_one("td.ta_l a") or row.select_one("td a")
+        if a is None:
+            continue
+        title = a.get_text(" ", strip=True)
+        ntt_sn = _extract_ntt_sn(a)
+        if not title or not ntt_sn:
+            continue
+
+        created_at = ""
+        for td in row.find_all("td"):
+            m = DATE_RE.fullmatch(td.get_text(strip=True))
+            if m:
+                y, mo, d = m.groups()
+                created_at = f"{y}-{int(mo):02d}-{int(d):02d}"
+                break
+
+        items.append({"ntt_sn": int(ntt_sn), "title": title, "created_at": created_at})
+    return items
+
+def fetch_notice_detail(item):
+    """상세 페이지를 받아 공지사항 레코드로 변환 (실패 시 None)"""
+    url = notice_detail_url(item["ntt_sn"])
+    try:
+        html = http_client.fetch(url)
+    except Exception as e:
+        print(f"상세 페이지 요청 실패: {item['title']} ({e})")
+        return None
+    return {
+        "bbs_id": NOTICE_BBS_ID,
+        "ntt_sn": item["ntt_sn"],
+        "title": item["title"],
+        "url": url,
+        "content": extract_notice_content(html),
+        "attachments": notice_attachments.find_attachments(html, url),
+        "created_at": item["created_at"],
+        "tags": item["title"],
+        "category": None
+    }
+
+def contiguous_watermark(pending, saved, watermark):
+    """오래된 글부터 빠짐없이 저장된 구간의 마지막 nttSn (중간에 실패한 글이 있으면 그 앞까지)"""
+    for item in sorted(pending, key=lambda i: i["ntt_sn"]):
+        if item["ntt_sn"] not in saved:
+            break
+        watermark = item["ntt_sn"]
+    return watermark
+
 def crawl_incremental_notices(max_new_notices=50):
-    """증분 업데이트 방식으로 공지사항 크롤링"""
-    latest_date = get_latest_notice_date()
-    print(f"DB 최신 공지사항 날짜: {latest_date}")
-    
-    if not latest_date:
-        print("DB에서 최신 날짜를 가져올 수 없습니다.")
-        return
-    
-    url = "https://pajuwaseok-e.goepj.kr/pajuwaseok-e/na/ntt/selectNttList.do?mi=8476&bbsId=5794"
-    driver = setup_driver()
-    new_notices = []
+    """증분 업데이트 방식으로 공지사항 크롤링 (브라우저 없이 HTTP로 직접 조회)
+
+    게시판 워터마크(마지막 nttSn)보다 큰 글만 새 글로 보므로
+    제목이나 작성일이 같은 글도 구분된다.
+    새 글은 오래된 것부터 max_new_notices개씩 처리하고, 워터마크는 빠짐없이 저장된 구간까지만
+    올린다. 상세 조회에 실패한 글과 이번에 처리하지 못한 글은 다음 실행에서 다시 받는다.
+    목록이 NOTICE_MAX_PAGES에서 끊기면(빈 DB, nttSn 없는 예전 행만 있는 DB 등) 그보다 오래된 글은
+    이 크롤러로 닿을 수 없으므로 확인한 가장 오래된 글 바로 앞을 워터마크 시작점으로 삼는다.
+    """
+    DatabaseManager(DB_PATH)  # 스키마/인덱스 보장
+    try:
+        notice_attachments.retry_failed_attachments(DB_PATH)
+    except Exception as e:
+        print(f"첨부파일 재시도 중 오류: {e}")
+    watermark = get_notice_watermark(NOTICE_BBS_ID)
+    print(f"게시판 {NOTICE_BBS_ID} 워터마크: nttSn={watermark}")
     
+    pending = []
+    seen = set()
+    listed_all = False  # 워터마크까지 목록을 끝까지 확인했는지
+    capped = False      # NOTICE_MAX_PAGES에서 목록이 끊겼는지
     try:
-        print("공지사항 페이지 접속 중...")
-        driver.get(url)
-        time.sleep(2)
-        
-        page = 1
-        while len(new_notices) < max_new_notices:
+        for page in range(1, NOTICE_MAX_PAGES + 1):
             print(f"\n=== 페이지 {page} 확인 중 ===")
-            
-            if page > 1:
-                try:
-                    btn = driver.find_element(By.CSS_SELECTOR, f"a[onclick*='goPaging({page})']")
-                    btn.click()
-                    time.sleep(2)
-                except Exception as e:
-                    print(f"페이지 이동 오류: {e}")
-                    break
-            
-            # 현재 페이지의 모든 링크 가져오기
-            links = driver.find_elements(By.CSS_SELECTOR, "table tbody tr td.ta_l > a")
-            print(f"현재 페이지 링크 수: {len(links)}")
+            items = parse_notice_list(http_client.fetch(notice_list_url(page)))
+            print(f"현재 페이지 게시글 수: {len(items)}")
             
             page_has_new = False
-            for i in range(len(links)):
-                if len(new_notices) >= max_new_notices:
-                    break
-                    
-                try:
-                    # 매 반복마다 links 재조회
-                    links = driver.find_elements(By.CSS_SELECTOR, "table tbody tr td.ta_l > a")
-                    a = links[i]
-                    title = a.text.strip()
-                    
-                    if not title:
-                        continue
-                    
-                    row = a.find_element(By.XPATH, "./ancestor::tr")
-                    
-                    try:
-                        created_at = row.find_element(By.CSS_SELECTOR, "td:nth-child(4)").text.strip()
-                        created_at = parse_date(created_at)
-                    except Exception:
-                        created_at = ""
-                    
-                    # 최신 날짜 이후 데이터만 처리
-                    if created_at and created_at <= latest_date:
-                        print(f"이미 처리된 공지사항: {title} ({created_at})")
-                        continue
-                    
-                    print(f"새 공지사항 발견: {title} ({created_at})")
-                    
-                    # 상세 페이지로 이동
-                    a.click()
-                    time.sleep(1)
-                    
-                    detail_url = driver.current_url
-                    content = extract_notice_content(driver)
-                    
-                    driver.back()
-                    time.sleep(1)
-                    
-                    new_notice = {
-                        "title": title,
-                        "url": detail_url,
-                        "content": content,
-                        "created_at": created_at,
-                        "tags": title,
-                        "category": None
-                    }
-                    
-                    new_notices.append(new_notice)
-                    page_has_new = True
-                    
-                except StaleElementReferenceException:
+            for item in items:
+                # 상단 고정 공지는 모든 페이지에 반복되므로 한 번만 확인
+                if item["ntt_sn"] in seen:
                     continue
-                except Exception as e:
-                    print(f"공지사항 처리 중 오류: {str(e)}")
+                seen.add(item["ntt_sn"])
+                
+                if item["ntt_sn"] <= watermark:
                     continue
+                
+                print(f"새 공지사항 발견: {item['title']} ({item['created_at']})")
+                pending.append(item)
+                page_has_new = True
             
             # 현재 페이지에 새로운 공지사항이 없으면 종료
             if not page_has_new:
-                print("더 이상 새로운 공지사항이 없습니다.")
+                listed_all = True
                 break
-                
-            page += 1
-        
-        # 새로운 데이터를 DB에 저장
-        if new_notices:
-            save_notices_to_db(new_notices)
         else:
-            print("새로운 공지사항이 없습니다.")
-            
-    except Exception as e:
-        print(f"크롤링 중 오류 발생: {e}")
-    finally:
-        driver.quit()
-
-def get_latest_meal_date():
-    """DB에서 최신 급식 날짜 조회"""
-    try:
-        conn = sqlite3.connect('school_data.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(date) FROM meals")
-        latest_date = cursor.fetchone()[0]
-        conn.close()
-        return latest_date
+            capped = True
     except Exception as e:
-        print(f"DB 조회 오류: {e}")
-        return None
+        print(f"목록 조회 중 오류 발생: {e}")
+    
+    if not pending:
+        print("새로운 공지사항이 없습니다.")
+        return
+    
+    # 오래된 글부터 처리 (나머지는 다음 실행에서)
+    pending.sort(key=lambda i: i["ntt_sn"])
+    base = watermark
+    if capped:
+        base = max(watermark, pending[0]["ntt_sn"] - 1)
+    if base > watermark:
+        print(f"⚠️ 목록 {NOTICE_MAX_PAGES}페이지까지 새 글이 이어집니다. nttSn {watermark + 1}~{base}는 "
+              f"목록 범위 밖이라 수집하지 않습니다 (필요하면 NOTICE_MAX_PAGES를 늘려 다시 실행하세요)")
+    if len(pending) > max_new_notices:
+        print(f"새 글 {len(pending)}개 중 오래된 {max_new_notices}개만 이번에 처리합니다.")
+        pending = pending[:max_new_notices]
+    
+    # 목록에서 모은 새 글의 상세 페이지를 한꺼번에 동시 조회
+    results = http_client.map_bounded(fetch_notice_detail, pending, max_workers=NOTICE_WORKERS)
+    new_notices = [n for n in results if n]
+    
+    # 목록 조회가 오류로 중간에 끊긴 경우 그 사이 글을 건너뛰지 않도록 워터마크를 올리지 않음
+    mark = watermark
+    if listed_all or capped:
+        mark = contiguous_watermark(pending, {n["ntt_sn"] for n in new_notices}, base)
+    if mark < max((n["ntt_sn"] for n in new_notices), default=0):
+        print(f"워터마크 nttSn={mark}까지만 이동 (실패/미확인 글은 다음 실행에서 재시도)")
+    
+    # 새로운 데이터를 DB에 저장
+    if new_notices:
+        # 워터마크 행이 없으면 notices 최대값을 쓰므로 올리지 않을 때도 현재값으로 기록
+        save_notices_to_db(new_notices, {NOTICE_BBS_ID: mark})
+        # 가정통신문은 첨부파일에 실제 내용이 있는 경우가 많아 본문까지 색인
+        try:
+            notice_attachments.ingest_attachments(new_notices, DB_PATH)
+        except Exception as e:
+            print(f"첨부파일 처리 중 오류: {e}")
+    print(f"HTTP 요청 통계: {http_client.get_stats()}")
 
 def save_meals_to_db(meals_data):
-    """급식 데이터를 DB에 저장"""
+    """급식 데이터를 (date, meal_type) 기준으로 업서트
+
+    이미 있는 날짜는 메뉴/이미지가 바뀐 경우에만 갱신한다.
+    """
+    if not meals_data:
+        return 0
     try:
-        conn = sqlite3.connect('school_data.db')
+        conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         
-        # 기존 데이터 확인을 위한 날짜 목록
-        cursor.execute("SELECT date FROM meals")
-        existing_dates = {row[0] for row in cursor.fetchall()}
-        
-        new_count = 0
-        for meal in meals_data:
-            if meal['date'] not in existing_dates:
-                cursor.execute("""
-                    INSERT INTO meals (date, meal_type, menu, image_url)
-                    VALUES (?, ?, ?, ?)
-                """, (meal['date'], meal['meal_type'], meal['menu'], meal['image_url']))
-                new_count += 1
-                print(f"새 급식 추가: {meal['date']}")
+        before = conn.total_changes
+        cursor.executemany("""
+            INSERT INTO meals (date, meal_type, menu, image_url)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(date, meal_type) DO UPDATE SET
+                menu = excluded.menu,
+                image_url = excluded.image_url
+            WHERE menu IS NOT excluded.menu OR image_url IS NOT excluded.image_url
+        """, [(meal['date'], meal['meal_type'], meal['menu'], meal['image_url']) for meal in meals_data])
+        changed = conn.total_changes - before
         
         conn.commit()
         conn.close()
-        print(f"총 {new_count}개의 새로운 급식 데이터가 저장되었습니다.")
-        return new_count
+        print(f"총 {changed}개의 급식 데이터가 추가/갱신되었습니다. (확인 {len(meals_data)}건)")
+        return changed
         
     except Exception as e:
         print(f"DB 저장 오류: {e}")
         return 0
 
-def extract_weekday_lunch(driver):
-    """현재 페이지의 월~금 중식 데이터 추출"""
+def meal_week_url(monday):
+    return f"{MEAL_URL}?mi={MEAL_MI}&{MEAL_DATE_PARAM}={monday.strftime('%Y-%m-%d')}"
+
+def _cell_date(text):
+    m = DATE_RE.search(text)
+    if not m:
+        return None
+    y, mo, d = m.groups()
+    return f"{y}-{int(mo):02d}-{int(d):02d}"
+
+def _cell_menu(cell):
+    """식단 칸에서 메뉴 단락 추출
+
+    고정된 p 순번 대신 영양/알레르기 정보가 아닌 단락 중 가장 긴 것을 메뉴로 본다.
+    """
+    paragraphs = [p.get_text("\n", strip=True) for p in cell.find_all("p")]
+    if not paragraphs:
+        paragraphs = [cell.get_text("\n", strip=True)]
+    candidates = [t for t in paragraphs if t and not MEAL_NOISE_RE.search(t)]
+    return max(candidates, key=len) if candidates else ""
+
+def parse_meal_table(html, base_url=MEAL_URL):
+    """주간 식단표 HTML을 구조적으로 파싱
+
+    머리행의 날짜 칸 위치로 열을 맞추고, 본문 행의 첫 칸(조식/중식/석식)으로 식사 구분을 정한다.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    if table is None:
+        return []
+    
+    header = table.select_one("thead tr") or table.find("tr")
+    dates = [_cell_date(c.get_text(" ", strip=True)) for c in header.find_all(["th", "td"])]
+    
     results = []
-    try:
-        date_els = driver.find_elements(By.CSS_SELECTOR, 'thead tr th')[1:]
-        dates = [el.text.split('\n')[1] for el in date_els]
+    body_rows = table.select("tbody tr") or table.find_all("tr")[1:]
+    for row in body_rows:
+        cells = row.find_all(["th", "td"])
+        if not cells:
+            continue
+        label = cells[0].get_text(" ", strip=True)
+        meal_type = next((t for t in MEAL_TYPES if t in label), None)
+        if meal_type is None:
+            continue
         
-        for i in range(1, 6):
-            menu = ''
-            img_url = ''
-            try:
-                xpath = f'//*[@id="detailForm"]/div/table/tbody/tr[2]/td[{i+1}]/p[4]'
-                menu = driver.find_element(By.XPATH, xpath).text.strip()
-            except Exception:
+        for col, cell in enumerate(cells):
+            if col >= len(dates) or not dates[col]:
                 continue
-                
-            try:
-                td_xpath = f'//*[@id="detailForm"]/div/table/tbody/tr[2]/td[{i+1}]'
-                td_html = driver.find_element(By.XPATH, td_xpath).get_attribute('innerHTML')
-                img_match = re.search(r'<img[^>]+src=["\"]([^"\"]+)["\"]', td_html)
-                if img_match:
-                    img_url = img_match.group(1)
-            except Exception:
-                pass
-                
-            if menu:  # 메뉴가 있는 경우만 추가
-                results.append({
-                    'date': dates[i],
-                    'meal_type': '중식',
-                    'menu': menu,
-                    'image_url': img_url
-                })
-    except Exception as e:
-        print(f"데이터 추출 오류: {e}")
-    
+            menu = _cell_menu(cell)
+            if not menu:
+                continue
+            img = cell.find("img", src=True)
+            results.append({
+                'date': dates[col],
+                'meal_type': meal_type,
+                'menu': menu,
+                'image_url': urljoin(base_url, img["src"]) if img else ''
+            })
     return results
 
-def crawl_incremental_meals():
-    """증분 업데이트 방식으로 급식 크롤링"""
-    latest_date = get_latest_meal_date()
-    print(f"DB 최신 급식 날짜: {latest_date}")
+def _in_week(meals, monday):
+    """요청한 주(월~일) 날짜만 남김
+
+    날짜 파라미터(MEAL_DATE_PARAM)가 무시되면 사이트가 이번 주 식단을 돌려주므로
+    다른 주 날짜가 섞이면 경고하고 버린다.
+    """
+    first, last = monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+    inside = [m for m in meals if first <= m['date'] <= last]
+    if len(inside) < len(meals):
+        outside = sorted({m['date'] for m in meals if not first <= m['date'] <= last})
+        print(f"⚠️ {monday} 주 식단표에 다른 주 날짜가 있습니다: {', '.join(outside)} "
+              f"(MEAL_DATE_PARAM={MEAL_DATE_PARAM} 확인 필요)")
+    return inside
+
+def fetch_meal_week(monday):
+    """해당 주 식단표를 HTTP로 받아 파싱 (실패 시 빈 목록, 요청한 주 밖의 날짜는 제외)"""
+    url = meal_week_url(monday)
+    try:
+        meals = _in_week(parse_meal_table(http_client.fetch(url)), monday)
+    except Exception as e:
+        print(f"급식 주간 조회 실패 ({monday}): {e}")
+        meals = []
     
-    if not latest_date:
-        print("DB에 급식 데이터가 없습니다. 전체 크롤링을 시작합니다.")
-        latest_date = "1900-01-01"  # 모든 데이터를 가져오기 위한 초기 날짜
+    if not meals and BROWSER_FALLBACK:
+        try:
+            from browser_pool import get_pool
+            meals = _in_week(parse_meal_table(get_pool().render(url, wait_css="table tbody")), monday)
+        except Exception as e:
+            print(f"브라우저 렌더링 실패 ({monday}): {e}")
+    return meals
+
+def fetch_meals(start, end):
+    """start~end 기간의 급식을 주 단위로 동시에 조회 (날짜 기준 중복 제거)"""
+    monday = start - timedelta(days=start.weekday())
+    mondays = []
+    while monday <= end:
+        mondays.append(monday)
+        monday += timedelta(weeks=1)
     
-    driver = setup_driver()
-    new_meals = []
+    meals = {}
+    for week in http_client.map_bounded(fetch_meal_week, mondays):
+        for meal in week:
+            if start.isoformat() <= meal['date'] <= end.isoformat():
+                meals[(meal['date'], meal['meal_type'])] = meal
+    return [meals[k] for k in sorted(meals)]
+
+def backfill_meals(start, end):
+    """학기 단위 등 지정 기간 급식을 한 번에 수집해 저장"""
+    DatabaseManager(DB_PATH)  # 스키마/인덱스 보장
+    meals = fetch_meals(start, end)
+    print(f"{start} ~ {end} 급식 {len(meals)}건 조회")
+    return save_meals_to_db(meals) if meals else 0
+
+def crawl_incremental_meals(weeks=MEAL_WEEKS):
+    """증분 업데이트 방식으로 급식 크롤링 (이번 주부터 weeks주를 동시에 조회)
+
+    이미 저장된 날짜도 다시 받아 업서트하므로 나중에 바뀐 식단이 반영된다.
+    """
+    DatabaseManager(DB_PATH)  # 스키마/인덱스 보장
+    today = get_kst_now().date()
+    meals = fetch_meals(today - timedelta(days=today.weekday()),
+                        today + timedelta(weeks=weeks))
     
-    try:
-        print("급식 페이지 접속 중...")
-        driver.get('https://pajuwaseok-e.goepj.kr/pajuwaseok-e/ad/fm/foodmenu/selectFoodMenuView.do?mi=8432')
-        time.sleep(2)
-        
-        week_count = 0
-        max_weeks = 10  # 최대 10주까지만 확인 (안전장치)
-        
-        while week_count < max_weeks:
-            print(f"\n=== {week_count + 1}번째 주 확인 중 ===")
-            
-            # 현재 페이지의 급식 데이터 추출
-            week_data = extract_weekday_lunch(driver)
-            
-            if not week_data:
-                print("더 이상 급식 데이터가 없습니다.")
-                break
-            
-            # 최신 날짜 이후 데이터만 필터링
-            filtered_data = []
-            for meal in week_data:
-                if meal['date'] > latest_date:
-                    filtered_data.append(meal)
-                    print(f"새 급식 발견: {meal['date']}")
-            
-            new_meals.extend(filtered_data)
-            
-            # 다음 주로 이동
-            try:
-                prev_btn = driver.find_element(By.CSS_SELECTOR, 'a:has(i.xi-angle-right)')
-                prev_btn.click()
-                time.sleep(1)
-                week_count += 1
-            except NoSuchElementException:
-                print("더 이상 이전 주 버튼이 없습니다.")
-                break
-            except Exception as e:
-                print(f"페이지 이동 오류: {e}")
-                break
-        
-        # 새로운 데이터를 DB에 저장
-        if new_meals:
-            save_meals_to_db(new_meals)
-        else:
-            print("새로운 급식 데이터가 없습니다.")
-            
-    except Exception as e:
-        print(f"크롤링 중 오류 발생: {e}")
-    finally:
-        driver.quit()
+    if meals:
+        save_meals_to_db(meals)
+    else:
+        print("새로운 급식 데이터가 없습니다.")
+    print(f"HTTP 요청 통계: {http_client.get_stats()}")
 
 def main():
     """공지사항 크롤링 후 급식 크롤링 실행"""
@@ -0,0 +1,86 @@
+# kakao_callback.py
+# 카카오 스킬 콜백(useCallback) 모드
+# - 스킬 응답은 5초 안에 와야 하므로 느린 경로(OpenAI 등)는 즉시 "처리 중" 응답을 돌려주고
+# - 백그라운드 워커가 답변을 만든 뒤 요청에 담겨 온 callbackUrl로 최종 응답을 POST
+# - callbackUrl은 1분간 한 번만 쓸 수 있으므로 재시도하지 않고, 시간 안에 못 만들면 안내문을 보냄
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+
+CALLBACK_WORKERS = int(os.getenv("CALLBACK_WORKERS", 4))
+CALLBACK_DEADLINE_SEC = float(os.getenv("CALLBACK_DEADLINE_SEC", 55))  # callbackUrl 유효시간(1분) 안쪽
+CALLBACK_POST_TIMEOUT = float(os.getenv("CALLBACK_POST_TIMEOUT", 5))
+MAX_TEXT_LEN = 1000              # simpleText 최대 글자 수
+
+PLACEHOLDER_TEXT = "답변을 준비하고 있어요. 잠시만 기다려 주세요 ⏳"
+FAILED_TEXT = "죄송합니다. 답변을 만드는 데 시간이 너무 오래 걸렸어요. 다시 한번 물어봐 주세요 🙂"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CALLBACK_WORKERS,
+                                               thread_name_prefix="kakao-callback")
+    return _executor
+
+
+def get_callback_url(data):
+    """스킬 요청 본문에서 callbackUrl 추출 (콜백이 켜진 블록에서만 들어옴)"""
+    return ((data or {}).get("userRequest") or {}).get("callbackUrl")
+
+
+def accepted_response(text=PLACEHOLDER_TEXT):
+    """즉시 돌려줄 콜백 대기 응답"""
+    return {"version": "2.0", "useCallback": True, "data": {"text": text}}
+
+
+def callback_payload(text, quick_replies=None):
+    """callbackUrl로 보낼 최종 스킬 응답"""
+    text = (text or "").strip() or FAILED_TEXT
+    if len(text) > MAX_TEXT_LEN:
+        text = text[:MAX_TEXT_LEN - 3] + "..."
+    template = {"outputs": [{"simpleText": {"text": text}}]}
+    if quick_replies:
+        template["quickReplies"] = quick_replies
+    return {"version": "2.0", "template": template}
+
+
+def post_callback(callback_url, payload):
+    """최종 응답 전송. 성공 여부 반환"""
+    try:
+        resp = http_client.post(callback_url, json=payload, timeout=CALLBACK_POST_TIMEOUT)
+    except Exception as e:
+        print(f"[CALLBACK] 전송 실패: {type(e).__name__}: {e}")
+        return False
+    if resp.status_code >= 400:
+        print(f"[CALLBACK] 전송 실패: HTTP {resp.status_code} {resp.text[:200]}")
+        return False
+    return True
+
+
+def _run(callback_url, compute, quick_replies, accepted_at):
+    try:
+        text = compute()
+    except Exception as e:
+        print(f"[CALLBACK] 답변 생성 실패: {type(e).__name__}: {e}")
+        text = FAILED_TEXT
+    if time.monotonic() - accepted_at > CALLBACK_DEADLINE_SEC:
+        print("[CALLBACK] 유효시간이 지나 전송 생략")
+        return False
+    return post_callback(callback_url, callback_payload(text, quick_replies))
+
+
+def submit(callback_url, compute, quick_replies=None):
+    """compute()(-> 답변 문자열)를 백그라운드에서 실행하고 결과를 callbackUrl로 POST
+
+    Future를 반환한다 (결과는 전송 성공 여부).
+    """
+    return _get_executor().submit(_run, callback_url, compute, quick_replies, time.monotonic())
@@ -0,0 +1,152 @@
+# kakao_payloads.py
+# 카카오 스킬 응답 JSON 사전 생성
+# - QA 답변은 로딩 시점에 본문/링크 분리 + 버튼 카드 + quickReplies까지 붙여 bytes로 직렬화해 둠
+# - 요청 처리 중에는 dict 조립/정규식/직렬화 없이 bytes를 그대로 응답 본문으로 사용
+# - 직렬화는 orjson이 설치돼 있으면 orjson, 없으면 표준 json (한글은 이스케이프 없이 UTF-8)
+import json
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+TEXT_CARD_MAX = 400        # textCard description 최대 글자 수
+SIMPLE_TEXT_MAX = 1000     # simpleText 최대 글자 수
+LINK_BUTTON_LABEL = "자세히 보기"
+DYNAMIC_CACHE_SIZE = 256   # 안내/오류 문구처럼 고정된 텍스트 캐시 크기
+
+# ---- 고정 Quick Replies (수정 금지) -------------------------------
+QUICK_REPLIES = [
+    {"action": "message", "label": "📅 학사일정", "messageText": "📅 학사일정"},
+    {"action": "message", "label": "📋 늘봄/방과후", "messageText": "📋 늘봄/방과후"},
+    {"action": "message", "label": "📖 수업시간/시정표(초등)", "messageText": "📖 수업시간/시정표(초등)"},
+    {"action": "message", "label": "📚 교과서", "messageText": "📚 교과서"},
+    {"action": "message", "label": "🏠 전입/전출", "messageText": "🏠 전입/전출"},
+    {"action": "message", "label": "📋 증명서/서류", "messageText": "📋 증명서/서류"},
+    {"action": "message", "label": "📞 연락처/상담", "messageText": "📞 연락처/상담"},
+    {"action": "message", "label": "🍽️ 급식", "messageText": "🍽️ 급식"},
+    {"action": "message", "label": "🎶 기타", "messageText": "🎶 기타"},
+    {"action": "message", "label": "🧸 유치원", "messageText": "🧸 유치원"},
+]
+
+
+def extract_link_from_text(text: str):
+    """텍스트에서 첫 번째 URL을 추출하고, 본문과 링크를 분리"""
+    url_pattern = r'(https?://[\w\-./?%&=:#@]+)'
+    match = re.search(url_pattern, text)
+    if match:
+        url = match.group(1)
+        # 본문에서 URL 제거(공백도 정리)
+        text_wo_url = text.replace(url, '').strip()
+        # 본문 끝에 불필요한 구두점/공백 제거
+        text_wo_url = re.sub(r'[\s\-:·,]+$', '', text_wo_url)
+        
+        # 본문이 비어있으면 기본 안내문 추가
+        if not text_wo_url:
+            if "ktbookmall.com" in url:
+                text_wo_url = "교과서 구매는 아래 링크에서 가능합니다."
+            elif "goepj.kr" in url:
+                text_wo_url = "자세한 내용은 아래 링크에서 확인하실 수 있습니다."
+            elif "docs.google.com" in url:
+                text_wo_url = "학사일정은 아래 링크에서 확인하실 수 있습니다."
+            else:
+                text_wo_url = "자세한 내용은 아래 링크를 참고해주세요."
+        
+        return text_wo_url, url
+    return text, None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_output(text, link=None):
+    """본문(+링크)을 outputs 항목 하나로. 링크가 있으면 버튼 달린 textCard"""
+    text = (text or "").strip()
+    if link and len(text) <= TEXT_CARD_MAX:
+        return {"textCard": {
+            "description": text,
+            "buttons": [{"action": "webLink", "label": LINK_BUTTON_LABEL, "webLinkUrl": link}],
+        }}
+    if link:
+        text = f"{text}\n{link}"
+    if len(text) > SIMPLE_TEXT_MAX:
+        text = text[:SIMPLE_TEXT_MAX - 3] + "..."
+    return {"simpleText": {"text": text}}
+
+
+def build_payload(text, link=None, quick_replies=None):
+    template = {"outputs": [build_output(text, link)]}
+    if quick_replies:
+        template["quickReplies"] = quick_replies
+    return {"version": "2.0", "template": template}
+
+
+class PayloadCache:
+    """답변 텍스트 -> 직렬화된 스킬 응답 bytes"""
+
+    def __init__(self, quick_replies=None):
+        self.quick_replies = quick_replies
+        self._lock = threading.Lock()
+        self._compiled = {}                  # QA 답변 (로딩 시점에 전부 생성)
+        self._dynamic = OrderedDict()        # 그 외 텍스트 (LRU)
+
+    def compile_answer(self, answer) -> bytes:
+        """QA 답변 하나를 본문/링크로 나눠 응답 bytes로"""
+        text, link = extract_link_from_text(answer or "")
+        return dumps(build_payload(text, link, self.quick_replies))
+
+    def compile_all(self, answers, known=None):
+        """QA 답변 전체를 미리 생성 (기존 결과는 통째로 교체)
+
+        known: 이미 만들어 둔 {답변: bytes} (스냅샷). 있는 건 그대로 쓰고 없는 것만 생성
+        """
+        known = known or {}
+        compiled = {a: known.get(a) or self.compile_answer(a) for a in answers if a}
+        with self._lock:
+            self._compiled = compiled
+        return len(compiled)
+
+    def compiled(self):
+        """미리 생성한 QA 응답 {답변: bytes} 사본 (스냅샷 저장용)"""
+        with self._lock:
+            return dict(self._compiled)
+
+    def answer(self, answer) -> bytes:
+        """QA 답변 응답 (미리 만든 게 없으면 만들어서 보관)"""
+        body = self._compiled.get(answer)
+        if body is None:
+            body = self.compile_answer(answer)
+            with self._lock:
+                self._compiled[answer] = body
+        return body
+
+    def text(self, text, cache=True) -> bytes:
+        """링크 분리 없이 simpleText 그대로 (안내/오류 문구용, LRU 캐시)
+
+        사용자 발화를 넣어 만든 문구처럼 다시 쓰이지 않을 텍스트는 cache=False로
+        (캐시에 넣으면 재사용되는 고정 문구가 밀려남)
+        """
+        if not cache:
+            return dumps(build_payload(text, None, self.quick_replies))
+        with self._lock:
+            body = self._dynamic.get(text)
+            if body is not None:
+                self._dynamic.move_to_end(text)
+                return body
+        body = dumps(build_payload(text, None, self.quick_replies))
+        with self._lock:
+            self._dynamic[text] = body
+            while len(self._dynamic) > DYNAMIC_CACHE_SIZE:
+                self._dynamic.popitem(last=False)
+        return body
+
+    def stats(self):
+        with self._lock:
+            return {"compiled": len(self._compiled), "dynamic": len(self._dynamic),
+                    "encoder": "orjson" if orjson is not None else "json"}
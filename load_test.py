@@ -0,0 +1,315 @@
+# load_test.py
+# 부하 테스트: 실제 질문 세트를 스킬 엔드포인트(/, /link_reco)와 AILogic 파이프라인에 재생
+# - 질문 출처: category_questions.json, data/qa_seed.csv, conversation_history(발화만, 개인정보 가림),
+#   school_dataset.json
+# - 동시성(--concurrency)과 도착률(--rate, 초당 요청 수) 지정. rate를 주면 일정 간격으로 요청을 넣고
+#   지연은 예정 시각부터 잼 (서버가 밀리면 대기 시간까지 지연에 포함). rate 0이면 최대한 빨리
+# - --url 을 주지 않으면 이 프로세스 안에 멀티스레드 서버(gthread와 같은 스레드당 요청 처리)를 띄움
+# - 로컬 서버/파이프라인은 school_data.db의 임시 복사본을 씀 (사용 통계/대화 기록이 운영 DB에 남지 않게)
+# - 기본은 OpenAI를 호출하지 않음 (폴백 단계까지 가면 '못 찾음'으로 바로 응답). --online 이면 실제 호출
+# - 결과는 대상별 처리량, p50/p95/p99, 오류율 JSON (--out 으로 저장해 빌드끼리 비교)
+# 실행: python load_test.py --targets skill,link_reco --concurrency 50 --requests 1000 [--rate 100]
+#       [--sources category,seed,history] [--url http://127.0.0.1:10000] [--online] [--out result.json]
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "school_data.db")
+SOURCES = ("category", "seed", "history", "dataset")
+TARGETS = ("skill", "link_reco", "pipeline")
+ENDPOINTS = {"skill": "/", "link_reco": "/link_reco"}
+HISTORY_LIMIT = 2000
+
+_PHONE_RE = re.compile(r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}|0\d{1,2}[-\s]?\d{3,4}[-\s]?\d{4}")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_LONG_NUMBER_RE = re.compile(r"\d{6,}")
+
+
+# ---- 질문 세트 ----------------------------------------------------
+def anonymize(text):
+    """대화 기록 발화에서 연락처/긴 숫자(학번·계좌 등) 가림"""
+    text = _PHONE_RE.sub("010-0000-0000", text)
+    text = _EMAIL_RE.sub("user@example.com", text)
+    return _LONG_NUMBER_RE.sub("000000", text)
+
+
+def _category_questions():
+    with open(os.path.join(BASE_DIR, "category_questions.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    return [q for qs in data.values() for q in qs if isinstance(q, str) and q.strip()]
+
+
+def _seed_questions():
+    with open(os.path.join(BASE_DIR, "data", "qa_seed.csv"), encoding="utf-8-sig", newline="") as f:
+        return [row["question"] for row in csv.DictReader(f) if (row.get("question") or "").strip()]
+
+
+def _history_questions(db_path=DB_PATH, limit=HISTORY_LIMIT):
+    """conversation_history 최근 발화 (사용자 ID는 읽지 않음)"""
+    if not os.path.exists(db_path):
+        return []
+    con = sqlite3.connect(db_path)
+    try:
+        rows = con.execute(
+            "SELECT message FROM conversation_history ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        con.close()
+    return [anonymize(r[0]) for r in rows if r[0] and r[0].strip()]
+
+
+def _dataset_questions():
+    with open(os.path.join(BASE_DIR, "school_dataset.json"), encoding="utf-8") as f:
+        return [qa["question"] for qa in json.load(f) if qa.get("question")]
+
+
+_LOADERS = {"category": _category_questions, "seed": _seed_questions,
+            "history": _history_questions, "dataset": _dataset_questions}
+
+
+def load_questions(sources=SOURCES):
+    """[(출처, 발화)] 목록. 읽을 수 없는 출처는 건너뜀"""
+    out = []
+    for name in sources:
+        try:
+            qs = _LOADERS[name]()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[LOAD] {name} 건너뜀: {type(e).__name__}: {e}")
+            continue
+        out.extend((name, q.strip()) for q in qs)
+    return out
+
+
+# ---- 대상 ---------------------------------------------------------
+def skill_body(utterance, user_id):
+    return {"userRequest": {"utterance": utterance, "user": {"id": user_id}}}
+
+
+def temp_db_copy(src=DB_PATH):
+    """운영 DB의 임시 복사본 경로 (WAL에 남은 내용까지 backup API로 복사)"""
+    dst = os.path.join(tempfile.mkdtemp(prefix="load_test-"), "school_data.db")
+    if os.path.exists(src):
+        source, target = sqlite3.connect(src), sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+    return dst
+
+
+def make_ai(db_path, online=False):
+    """db_path를 쓰는 AILogic. online이 아니면 OpenAI 대신 바로 '못 찾음'"""
+    from ai_logic import AILogic, OPENAI_FALLBACK
+    ai = AILogic(db_path=db_path)
+    if not online:
+        ai.call_openai_api = lambda *a, **kw: (False, OPENAI_FALLBACK)
+    ai.warm_up()
+    return ai
+
+
+def start_local_server(db_path, online=False):
+    """app을 멀티스레드 WSGI 서버로 띄우고 기본 URL 반환 (DB는 db_path 사용)"""
+    from werkzeug.serving import make_server
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # 사용자별 요청 제한에 걸리지 않게 (측정 대상 아님)
+    # import 시 운영 DB로 AILogic을 만들거나 통계 플러시/핫 리로드 스레드를 띄우지 않게
+    os.environ["WARM_START"] = "false"
+    os.environ["GUNICORN_PRELOAD"] = "true"
+    import app as app_module
+    from usage_stats import UsageStats
+
+    app_module.DB_PATH = db_path
+    app_module.usage = UsageStats(db_path)   # 메모리 집계만 (플러시 타이머 없음)
+    app_module._ai = make_ai(db_path, online)
+    app_module.precompile_answers(app_module._ai.prebuilt_payloads)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # 요청마다 찍히는 접근 로그 끔
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def http_caller(base_url, endpoint):
+    local = threading.local()
+
+    def call(utterance, user_id):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            r = session.post(base_url + endpoint, json=skill_body(utterance, user_id), timeout=30)
+            return r.status_code == 200
+        except requests.RequestException:
+            return False
+    return call
+
+
+def pipeline_caller(db_path, online=False):
+    """HTTP 없이 AILogic.process_message 직접 호출 (콜백 모드 느린 경로와 같은 처리)"""
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    ai = make_ai(db_path, online)
+
+    def call(utterance, user_id):
+        try:
+            ai.process_message(utterance, user_id)
+            return True
+        except Exception:
+            return False
+    return call
+
+
+# ---- 실행/집계 -----------------------------------------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(samples, wall):
+    """samples: [(출처, 지연 ms, 성공 여부)]"""
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for s in samples if not s[2])
+
+    def ms(v):
+        return round(v, 2) if v is not None else None
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / wall, 1) if wall else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def run(call, questions, total, concurrency, rate=0.0, users=100, seed=0):
+    """total건을 concurrency 스레드로 실행. rate>0이면 1/rate초 간격으로 도착"""
+    rng = random.Random(seed)
+    plan = [(rng.choice(questions), f"load-{rng.randrange(users)}") for _ in range(total)]
+    samples = []
+    lock = threading.Lock()
+
+    def one(item, scheduled):
+        (source, utterance), user_id = item
+        if scheduled is None:          # 최대 속도 모드: 스레드가 집어 든 시점부터
+            scheduled = time.perf_counter()
+        ok = call(utterance, user_id)
+        elapsed = (time.perf_counter() - scheduled) * 1000
+        with lock:
+            samples.append((source, elapsed, ok))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, item in enumerate(plan):
+            scheduled = None
+            if rate > 0:
+                scheduled = started + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(one, item, scheduled)
+    wall = time.perf_counter() - started
+
+    result = summarize(samples, wall)
+    result["wall_sec"] = round(wall, 3)
+    by_source = {}
+    for s in samples:
+        by_source.setdefault(s[0], []).append(s)
+    result["by_source"] = {name: summarize(group, wall) for name, group in sorted(by_source.items())}
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="실제 질문 세트 재생 부하 테스트")
+    parser.add_argument("--url", help="대상 서버 기본 URL (없으면 로컬 멀티스레드 서버)")
+    parser.add_argument("--targets", default="skill,link_reco", help=f"쉼표 구분: {','.join(TARGETS)}")
+    parser.add_argument("--sources", default="category,seed,history", help=f"쉼표 구분: {','.join(SOURCES)}")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시 처리 스레드 수")
+    parser.add_argument("--requests", type=int, default=1000, help="대상별 요청 수")
+    parser.add_argument("--rate", type=float, default=0.0, help="초당 도착 요청 수 (0이면 최대한 빨리)")
+    parser.add_argument("--users", type=int, default=100, help="가상 사용자 ID 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--online", action="store_true", help="폴백 단계에서 OpenAI를 실제로 호출")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"알 수 없는 대상: {', '.join(sorted(unknown))}")
+    questions = load_questions([s for s in args.sources.split(",") if s in SOURCES])
+    if not questions:
+        parser.error("재생할 질문이 없습니다")
+
+    server = None
+    base_url = (args.url or "").rstrip("/")
+    db_path = None
+    if "pipeline" in targets or (not base_url and any(t in ENDPOINTS for t in targets)):
+        db_path = temp_db_copy()
+    if not base_url and any(t in ENDPOINTS for t in targets):
+        base_url, server = start_local_server(db_path, args.online)
+
+    report = {
+        "revision": git_revision(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "url": args.url or "local",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "online": args.online,
+        "questions": {name: sum(1 for q in questions if q[0] == name)
+                      for name in sorted({q[0] for q in questions})},
+        "targets": {},
+    }
+    try:
+        for target in targets:
+            if target == "pipeline":
+                call = pipeline_caller(db_path, args.online)
+            else:
+                call = http_caller(base_url, ENDPOINTS[target])
+            report["targets"][target] = run(call, questions, args.requests, args.concurrency,
+                                            rate=args.rate, users=args.users, seed=args.seed)
+    finally:
+        if server:
+            server.shutdown()
+        if db_path:
+            shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
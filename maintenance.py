@@ -0,0 +1,196 @@
+# maintenance.py
+# conversation_history 보존 정책
+# 1) 보존 기간(RETENTION_DAYS)보다 오래된 행을 일별 집계(conversation_daily_stats)에 합산 (KST 날짜,
+#    usage_stats.py와 같은 기준)
+# 2) 같은 행을 월별(KST) gzip NDJSON 아카이브 파일 하나에 이어 붙인 뒤 삭제
+# 3) 증분 VACUUM으로 DB 파일 공간 회수
+# 수동 실행: python maintenance.py / 정기 실행: python maintenance.py --schedule (gunicorn.conf.py가 전용
+# 프로세스로 띄움) 또는 start_scheduler() (gunicorn 밖에서 app 프로세스 안 스레드로)
+import os
+import sys
+import glob
+import gzip
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from database import DatabaseManager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "school_data.db")
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 90))
+BATCH_SIZE = 5000
+VACUUM_PAGES = 2000        # 한 번에 돌려줄 최대 페이지 수 (0이면 전부)
+COLUMNS = ("id", "user_id", "message", "response", "timestamp", "category", "stage", "outcome")
+KST = timezone(timedelta(hours=9))
+KST_SHIFT = "+9 hours"     # conversation_history.timestamp(UTC CURRENT_TIMESTAMP) -> KST (SQLite 수식어)
+
+
+def _kst_month(timestamp):
+    """UTC 타임스탬프 문자열의 KST 기준 월(YYYY-MM). 형식이 다르면 앞 7글자"""
+    try:
+        utc = datetime.strptime(str(timestamp)[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return str(timestamp)[:7]
+    return utc.astimezone(KST).strftime("%Y-%m")
+
+
+def _archive_path(month):
+    return os.path.join(ARCHIVE_DIR, f"conversation_history-{month}.ndjson.gz")
+
+
+def archive_files(month="*"):
+    """월(YYYY-MM)의 아카이브 파일 목록 (월 순)"""
+    return sorted(glob.glob(os.path.join(ARCHIVE_DIR, f"conversation_history-{month}.ndjson.gz")))
+
+
+def _append_archive(conn, rows):
+    """배치 행들을 월별 파일 끝에 gzip 멤버 하나로 이어 붙이고 {월: 새 파일 길이} 반환
+
+    파일이 conversation_archive_files에 기록된 길이보다 길면, 삭제가 커밋되기 전에 중단된 배치가
+    남긴 꼬리이므로 먼저 잘라낸다. 그래서 같은 배치를 다시 처리해도 아카이브에 두 번 들어가지 않는다.
+    """
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_kst_month(row["timestamp"]), []).append(row)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    sizes = {}
+    for month, items in by_month.items():
+        path = _archive_path(month)
+        found = conn.execute("SELECT size FROM conversation_archive_files WHERE month = ?", (month,)).fetchone()
+        committed = found[0] if found else 0
+        with open(path, "ab") as f:
+            if f.tell() > committed:
+                f.truncate(committed)
+                f.seek(committed)
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                for item in items:
+                    gz.write((json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            sizes[month] = f.tell()
+    return sizes
+
+
+def archive_conversations(conn, cutoff):
+    """cutoff 이전 행을 집계+아카이브+삭제. 처리한 행 수 반환
+
+    conn은 autocommit(isolation_level=None) 연결. 배치마다 집계 반영, 삭제, 아카이브 파일 길이 기록을
+    BEGIN IMMEDIATE ~ COMMIT 한 트랜잭션으로 묶어 같은 행이 두 번 집계되지 않게 한다.
+    아카이브는 그 전에 이어 쓰지만 커밋되지 않은 꼬리는 다음 처리 때 잘라내므로 중복되지 않는다.
+    """
+    total = 0
+    while True:
+        cur = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM conversation_history "
+            "WHERE timestamp < ? ORDER BY id LIMIT ?",
+            (cutoff, BATCH_SIZE)
+        )
+        rows = [dict(zip(COLUMNS, r)) for r in cur.fetchall()]
+        if not rows:
+            break
+
+        sizes = _append_archive(conn, rows)
+        max_id = rows[-1]["id"]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT INTO conversation_daily_stats (day, category, stage, outcome, count)
+                SELECT date(timestamp, ?), COALESCE(category, ''), COALESCE(stage, ''),
+                       COALESCE(outcome, ''), COUNT(*)
+                FROM conversation_history
+                WHERE timestamp < ? AND id <= ?
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT(day, category, stage, outcome) DO UPDATE SET
+                    count = count + excluded.count
+            """, (KST_SHIFT, cutoff, max_id))
+            conn.execute(
+                "DELETE FROM conversation_history WHERE timestamp < ? AND id <= ?",
+                (cutoff, max_id)
+            )
+            conn.executemany("""
+                INSERT INTO conversation_archive_files (month, size) VALUES (?, ?)
+                ON CONFLICT(month) DO UPDATE SET size = excluded.size
+            """, sizes.items())
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        total += len(rows)
+    return total
+
+
+def reclaim_space(conn, pages=VACUUM_PAGES):
+    """증분 VACUUM. auto_vacuum이 꺼진 DB는 한 번만 전체 VACUUM으로 전환"""
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:  # 2 = INCREMENTAL
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+
+
+def run_maintenance(db_path=DB_PATH, retention_days=RETENTION_DAYS):
+    """보존 정책 1회 실행. 처리 결과 dict 반환"""
+    DatabaseManager(db_path)  # 스키마 보장
+    # CURRENT_TIMESTAMP(UTC)와 같은 형식으로 비교
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        archived = archive_conversations(conn, cutoff)
+        freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        reclaim_space(conn)
+        freelist_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+    result = {
+        "cutoff": cutoff,
+        "archived_rows": archived,
+        "freed_pages": max(0, freelist_before - freelist_after),
+        "db_size": os.path.getsize(db_path),
+    }
+    print(f"[MAINTENANCE] {result}")
+    return result
+
+
+def start_scheduler(hour=4, minute=30):
+    """매일 hour:minute(KST)에 run_maintenance 실행하는 백그라운드 스케줄러 시작"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler(timezone="Asia/Seoul", daemon=True)
+    scheduler.add_job(run_maintenance, "cron", hour=hour, minute=minute,
+                      id="conversation_maintenance", coalesce=True, max_instances=1)
+    scheduler.start()
+    return scheduler
+
+
+def _exit_if_orphaned(parent_pid):
+    if os.getppid() != parent_pid:
+        print("[MAINT] 부모 프로세스가 종료되어 스케줄러를 멈춥니다")
+        os._exit(0)
+
+
+def run_scheduler(hour=4, minute=30):
+    """전용 프로세스에서 스케줄러를 포그라운드로 실행 (gunicorn.conf.py when_ready가 띄움)
+
+    부모(gunicorn 마스터)가 없어지면 같이 종료한다.
+    """
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    scheduler = BlockingScheduler(timezone="Asia/Seoul")
+    scheduler.add_job(run_maintenance, "cron", hour=hour, minute=minute,
+                      id="conversation_maintenance", coalesce=True, max_instances=1)
+    scheduler.add_job(_exit_if_orphaned, "interval", args=(os.getppid(),), seconds=60,
+                      id="parent_watch")
+    print(f"[MAINT] 스케줄러 시작 (매일 {hour:02d}:{minute:02d} KST, pid={os.getpid()})")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--schedule"]:
+        run_scheduler()
+    else:
+        run_maintenance()
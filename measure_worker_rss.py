@@ -0,0 +1,114 @@
+# measure_worker_rss.py
+# 워커별 메모리(RSS/PSS/Private) 비교: gunicorn 워커처럼 fork한 자식 프로세스에서 요청을 처리시킨 뒤 측정
+# - per_worker     : fork 후 워커마다 app import (preload 없음, 예전 방식)
+# - preload        : 마스터에서 app import 후 fork (gc.freeze 없음)
+# - preload_freeze : 마스터에서 app import + gc.freeze() 후 fork (gunicorn.conf.py 방식)
+# 각 모드는 새 파이썬 프로세스에서 실행. 리눅스 /proc/<pid>/smaps_rollup 필요
+# 실행: python measure_worker_rss.py [워커 수]
+import gc
+import json
+import os
+import subprocess
+import sys
+
+MODES = ("per_worker", "preload", "preload_freeze")
+QUERIES = ["방과후 신청", "전학 서류", "급식 메뉴", "학교 전화번호", "체험학습 신청서", "교과서 구입"]
+
+
+def smaps_rollup(pid="self"):
+    """/proc/<pid>/smaps_rollup 값(kB) 중 필요한 것만"""
+    wanted = {"Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"}
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in wanted:
+                out[key] = int(rest.split()[0])
+    out["Private"] = out.pop("Private_Clean", 0) + out.pop("Private_Dirty", 0)
+    out["Shared"] = out.pop("Shared_Clean", 0) + out.pop("Shared_Dirty", 0)
+    return out
+
+
+def serve_some(app_module):
+    """워커가 받는 요청 흉내: 스킬 엔드포인트 + RAG 검색, 중간에 GC도 돎"""
+    client = app_module.app.test_client()
+    ai = app_module.get_ai()
+    for _ in range(20):
+        for q in QUERIES:
+            client.post("/", json={"userRequest": {"utterance": q, "user": {"id": "rss"}}})
+            ai.get_retriever().search(q, k=5)
+        gc.collect()
+
+
+def worker(mode, ready_w, go_r, result_w):
+    if mode == "per_worker":
+        import app as app_module
+    else:
+        app_module = sys.modules["app"]
+    serve_some(app_module)
+    os.write(ready_w, b"1")
+    os.read(go_r, 1)                      # 모든 워커가 일을 마친 뒤 동시에 측정
+    os.write(result_w, (json.dumps(smaps_rollup()) + "\n").encode())
+    os._exit(0)
+
+
+def run_mode(mode, workers):
+    os.environ["GUNICORN_PRELOAD"] = "true"   # 백그라운드 스레드 없이 import (fork 전에 스레드 금지)
+    if mode != "per_worker":
+        import app  # noqa: F401
+        if mode == "preload_freeze":
+            gc.collect()
+            gc.freeze()
+    master = smaps_rollup()
+
+    ready_r, ready_w = os.pipe()
+    go_r, go_w = os.pipe()
+    result_r, result_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            worker(mode, ready_w, go_r, result_w)
+        pids.append(pid)
+    for _ in range(workers):
+        os.read(ready_r, 1)
+    os.write(go_w, b"1" * workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    os.close(result_w)
+    with os.fdopen(result_r) as f:
+        per_worker = [json.loads(line) for line in f if line.strip()]
+
+    def avg(key):
+        return round(sum(w[key] for w in per_worker) / len(per_worker))
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "master_rss_kb": master["Rss"],
+        "worker_rss_kb": avg("Rss"),
+        "worker_pss_kb": avg("Pss"),
+        "worker_private_kb": avg("Private"),
+        "worker_shared_kb": avg("Shared"),
+        "total_pss_kb": sum(w["Pss"] for w in per_worker) + master["Pss"],
+    }
+
+
+def main(workers=4):
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for mode in MODES:
+        out = subprocess.run([sys.executable, __file__, "--mode", mode, str(workers)],
+                             capture_output=True, text=True, check=True, cwd=here,
+                             env=dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "rss")))
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        print(json.dumps(run_mode(sys.argv[2], workers)))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
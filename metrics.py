@@ -0,0 +1,210 @@
+# metrics.py
+# 가벼운 카운터/히스토그램 + Prometheus 텍스트 포맷 출력 (/metrics)
+# 외부 라이브러리 없이 락 하나로 값만 올리므로 요청 경로에 넣어도 부담이 없다.
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_local = threading.local()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}  # key -> [bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slot = self._values.get(key)
+            if slot is None:
+                slot = self._values[key] = [0] * (len(self.buckets) + 2)
+            slot[idx] += 1
+            slot[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, slot in items:
+            cumulative = 0
+            for le, n in zip((*self.buckets, float("inf")), slot[:-1]):
+                cumulative += n
+                lines.append(
+                    f"{self.name}_bucket{_fmt_labels(self.labelnames, key, ('le', _fmt_value(le)))} {cumulative}"
+                )
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt_value(slot[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_prometheus():
+    """등록된 모든 지표를 Prometheus 텍스트 포맷(0.0.4)으로"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---- 챗봇 지표 -------------------------------------------------------
+REQUEST_LATENCY = Histogram(
+    "chatbot_request_seconds", "HTTP 엔드포인트 처리 시간", ("endpoint",)
+)
+STAGE_LATENCY = Histogram(
+    "chatbot_stage_seconds", "AILogic.process_message 단계별 처리 시간", ("stage",)
+)
+ANSWERED_BY = Counter(
+    "chatbot_answered_total", "AILogic.process_message에서 응답을 만든 단계별 메시지 수", ("stage",)
+)
+ENDPOINT_OUTCOME = Counter(
+    "chatbot_endpoint_outcome_total", "HTTP 엔드포인트 처리 결과별 요청 수", ("endpoint", "outcome")
+)
+DB_LATENCY = Histogram(
+    "chatbot_db_seconds", "DB 호출 시간", ("op",)
+)
+OPENAI_LATENCY = Histogram(
+    "chatbot_openai_seconds", "OpenAI 호출 시간", ("outcome",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 4.0, 5.0, 10.0, 30.0),
+)
+
+CIRCUIT_STATE = Gauge(
+    "chatbot_circuit_state", "서킷 브레이커 상태 (0=closed, 1=half_open, 2=open)", ("name",)
+)
+CIRCUIT_REJECTED = Counter(
+    "chatbot_circuit_rejected_total", "서킷이 열려 바로 폴백한 호출 수", ("name",)
+)
+RATE_LIMITED = Counter(
+    "chatbot_rate_limited_total", "사용자별 요청 제한으로 거절한 수", ("scope",)
+)
+COALESCED = Counter(
+    "chatbot_coalesced_total", "같은 질문을 동시에 처리 중이라 결과를 함께 받은 요청 수", ("name",)
+)
+
+
+def begin_message():
+    """process_message 시작 시 호출. 스레드별 단계 기록 초기화"""
+    _local.stage = None
+    _local.started = None
+
+
+def enter_stage(name):
+    """다음 단계로 넘어감. 직전 단계 소요 시간을 기록"""
+    now = time.perf_counter()
+    _close_stage(now)
+    _local.stage, _local.started = name, now
+
+
+def finish_message():
+    """마지막 단계(= 응답을 만든 단계)를 닫고 응답 단계 카운터 증가. 단계 이름 반환"""
+    name = getattr(_local, "stage", None)
+    _close_stage(time.perf_counter())
+    if name:
+        ANSWERED_BY.inc(stage=name)
+    _local.stage = _local.started = None
+    _local.answered = name
+    return name
+
+
+def last_stage():
+    return getattr(_local, "stage", None)
+
+
+def answered_stage():
+    """이 스레드에서 마지막으로 끝난 메시지를 응답한 단계 (벤치마크/진단용)"""
+    return getattr(_local, "answered", None)
+
+
+def _close_stage(now):
+    name, started = getattr(_local, "stage", None), getattr(_local, "started", None)
+    if name and started is not None:
+        STAGE_LATENCY.observe(now - started, stage=name)
+
+
+def timed_db(op):
+    """DatabaseManager 메서드용 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with DB_LATENCY.time(op=op):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
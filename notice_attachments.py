@@ -0,0 +1,320 @@
+# notice_attachments.py
+# 공지사항/가정통신문 첨부파일(PDF/HWP/HWPX/XLSX) 본문 수집
+# - 크기 상한을 둔 스트리밍 다운로드 (http_client 공용 세션)
+# - 확장자별 텍스트 추출기 (PDF: pdfminer, XLSX: openpyxl read-only, HWP: 교체 가능, HWPX: zip 안의 XML)
+# - 파일마다 다운로드가 끝나는 대로 별도 프로세스에서 추출, 제한 시간을 넘기면 프로세스를 종료
+# - 결과는 notice_attachments 테이블(+ FTS5 색인)에 저장. 실패한 파일은 'failed'로 남겨 다음에 재시도
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urljoin, unquote
+
+from bs4 import BeautifulSoup
+
+import http_client
+
+MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", 20 * 1024 * 1024))
+MAX_TEXT_CHARS = 50000            # 첨부 하나당 저장할 최대 글자 수
+EXTRACT_WORKERS = int(os.getenv("ATTACHMENT_EXTRACT_WORKERS", 2))
+EXTRACT_TIMEOUT = 60              # 파일 하나 추출 제한 시간(초)
+MAX_ATTEMPTS = int(os.getenv("ATTACHMENT_MAX_ATTEMPTS", 3))  # 실패한 파일 재시도 상한
+CHUNK_SIZE = 64 * 1024
+
+FILE_EXT_RE = re.compile(r'\.(pdf|hwp|hwpx|xlsx|txt)\b', re.I)
+DOWNLOAD_HREF_RE = re.compile(r'(FileDown|fileDown|download|atchFile)', re.I)
+
+
+# ---- 첨부 링크 찾기 -------------------------------------------------
+def find_attachments(html, base_url):
+    """상세 페이지 HTML에서 첨부파일 (이름, 주소) 목록 추출"""
+    soup = BeautifulSoup(html, "html.parser")
+    found = {}
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if href.startswith(("javascript:", "#", "mailto:")):
+            continue
+        if not (DOWNLOAD_HREF_RE.search(href) or FILE_EXT_RE.search(unquote(href))):
+            continue
+        # "파일명.pdf (123KB)" 같은 표시에서 파일명만 남김
+        name = a.get_text(" ", strip=True)
+        m = FILE_EXT_RE.search(name)
+        if m:
+            name = name[:m.end()]
+        else:
+            name = unquote(href).rsplit("/", 1)[-1].split("?", 1)[0]
+            if not FILE_EXT_RE.search(name):
+                continue
+        url = urljoin(base_url, href)
+        found.setdefault(url, {"file_name": name.strip(), "url": url})
+    return list(found.values())
+
+
+# ---- 다운로드 -------------------------------------------------------
+def download(url, max_bytes=MAX_BYTES):
+    """스트리밍 다운로드. 상한을 넘으면 중단하고 None 반환"""
+    resp = http_client.get(url, stream=True)
+    try:
+        resp.raise_for_status()
+        length = resp.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            print(f"[ATTACH] 크기 초과로 건너뜀: {url} ({length} bytes)")
+            return None
+        buf = io.BytesIO()
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            buf.write(chunk)
+            if buf.tell() > max_bytes:
+                print(f"[ATTACH] 크기 초과로 중단: {url}")
+                return None
+        return buf.getvalue()
+    finally:
+        resp.close()
+
+
+# ---- 텍스트 추출기 --------------------------------------------------
+def extract_pdf(data):
+    from pdfminer.high_level import extract_text
+    return extract_text(io.BytesIO(data))
+
+
+def extract_xlsx(data):
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    lines = []
+    try:
+        for ws in wb.worksheets:
+            lines.append(f"[{ws.title}]")
+            for row in ws.iter_rows(values_only=True):
+                cells = [str(v).strip() for v in row if v is not None and str(v).strip()]
+                if cells:
+                    lines.append(" ".join(cells))
+    finally:
+        wb.close()
+    return "\n".join(lines)
+
+
+def extract_hwp(data):
+    """HWP 기본 추출기: hwp5txt(pyhwp)가 있으면 사용, 없으면 미리보기 텍스트(PrvText)"""
+    if shutil.which("hwp5txt"):
+        with tempfile.NamedTemporaryFile(suffix=".hwp", delete=False) as f:
+            f.write(data)
+            path = f.name
+        try:
+            out = subprocess.run(["hwp5txt", path], capture_output=True, timeout=EXTRACT_TIMEOUT)
+            if out.returncode == 0:
+                return out.stdout.decode("utf-8", errors="ignore")
+        finally:
+            os.unlink(path)
+
+    import olefile
+    ole = olefile.OleFileIO(io.BytesIO(data))
+    try:
+        if ole.exists("PrvText"):
+            return ole.openstream("PrvText").read().decode("utf-16-le", errors="ignore")
+    finally:
+        ole.close()
+    return ""
+
+
+def extract_hwpx(data):
+    """HWPX(zip + OWPML XML): Contents/section*.xml의 글자(<hp:t>)를 문단(<hp:p>)마다 한 줄로"""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        sections = [n for n in zf.namelist() if re.fullmatch(r"Contents/section\d+\.xml", n)]
+        sections.sort(key=lambda n: int(re.search(r"\d+", n).group()))
+        lines = []
+        for name in sections:
+            line = []
+            with zf.open(name) as f:
+                for _, el in ET.iterparse(f):
+                    tag = el.tag.rsplit("}", 1)[-1]
+                    if tag == "t" and el.text:
+                        line.append(el.text)
+                    elif tag == "p":
+                        # 표 안의 문단이 먼저 끝나므로 바깥 문단과 섞이지 않음
+                        if line:
+                            lines.append("".join(line))
+                            line = []
+                        el.clear()
+    return "\n".join(lines)
+
+
+def extract_txt(data):
+    for enc in ("utf-8", "cp949"):
+        try:
+            return data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="ignore")
+
+
+EXTRACTORS = {
+    "pdf": extract_pdf,
+    "xlsx": extract_xlsx,
+    "hwp": extract_hwp,
+    "hwpx": extract_hwpx,
+    "txt": extract_txt,
+}
+
+
+def register_extractor(ext, func):
+    """확장자별 추출기 등록/교체 (예: 외부 HWP 변환기). func(bytes) -> str
+
+    별도 프로세스로 넘겨 실행되므로 func는 모듈 최상위 함수여야 한다.
+    """
+    EXTRACTORS[ext.lower().lstrip(".")] = func
+
+
+def _ext(file_name):
+    m = FILE_EXT_RE.search(file_name)
+    return m.group(1).lower() if m else ""
+
+
+def extract_text(file_name, data, func=None):
+    """파일명 확장자에 맞는 추출기로 텍스트 추출 (공백 정리, 길이 제한)"""
+    func = func or EXTRACTORS.get(_ext(file_name))
+    if func is None or not data:
+        return ""
+    text = func(data) or ""
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r"\n\s*\n+", "\n", text).strip()
+    return text[:MAX_TEXT_CHARS]
+
+
+# 다운로드 스레드가 도는 중에 자식 프로세스를 만들므로 fork 대신 spawn
+_MP = multiprocessing.get_context("spawn")
+_EXTRACT_SLOTS = threading.BoundedSemaphore(EXTRACT_WORKERS)
+
+
+def _extract_worker(conn, file_name, data, func):
+    try:
+        conn.send((True, extract_text(file_name, data, func)))
+    except Exception as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def extract_in_process(file_name, data, timeout=EXTRACT_TIMEOUT):
+    """extract_text를 별도 프로세스에서 실행. 제한 시간을 넘기면 프로세스를 종료하고 TimeoutError
+
+    동시에 도는 추출 프로세스는 EXTRACT_WORKERS개까지.
+    """
+    func = EXTRACTORS.get(_ext(file_name))
+    if func is None or not data:
+        return ""
+    with _EXTRACT_SLOTS:
+        recv, send = _MP.Pipe(duplex=False)
+        proc = _MP.Process(target=_extract_worker, args=(send, file_name, data, func), daemon=True)
+        proc.start()
+        send.close()
+        try:
+            if not recv.poll(timeout):
+                raise TimeoutError(f"{timeout}초 초과")
+            ok, result = recv.recv()
+        except EOFError:
+            raise RuntimeError(f"추출 프로세스 비정상 종료 (exitcode={proc.exitcode})") from None
+        finally:
+            recv.close()
+            if proc.is_alive():
+                proc.kill()
+            proc.join()
+    if not ok:
+        raise RuntimeError(result)
+    return result
+
+
+# ---- 저장 -----------------------------------------------------------
+def _existing_keys(conn, notices):
+    """이미 처리한 첨부 (실패해 재시도할 것은 제외)"""
+    keys = set()
+    for n in notices:
+        rows = conn.execute(
+            "SELECT file_name FROM notice_attachments "
+            "WHERE bbs_id = ? AND ntt_sn = ? AND (status = 'ok' OR attempts >= ?)",
+            (n["bbs_id"], n["ntt_sn"], MAX_ATTEMPTS)
+        ).fetchall()
+        keys.update((n["bbs_id"], n["ntt_sn"], r[0]) for r in rows)
+    return keys
+
+
+def _process(job):
+    """첨부 하나: 다운로드 후 바로 추출 (파일 내용은 이 함수 안에서만 메모리에 머묾)"""
+    bbs_id, ntt_sn, file_name, url = job
+    size, text, status = None, None, "failed"
+    try:
+        data = download(url)
+        if data is None:
+            raise RuntimeError("다운로드 실패 또는 크기 초과")
+        size = len(data)
+        text = extract_in_process(file_name, data)
+        status = "ok"
+    except Exception as e:
+        print(f"[ATTACH] 처리 실패: {file_name} ({type(e).__name__}: {e})")
+    return (bbs_id, ntt_sn, file_name, url, size, text,
+            datetime.now(timezone.utc).isoformat(), status)
+
+
+def _ingest_jobs(conn, jobs):
+    rows = http_client.map_bounded(_process, jobs)
+    conn.executemany("""
+        INSERT INTO notice_attachments
+            (bbs_id, ntt_sn, file_name, url, size, content, extracted_at, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(bbs_id, ntt_sn, file_name) DO UPDATE SET
+            url = excluded.url,
+            size = excluded.size,
+            content = excluded.content,
+            extracted_at = excluded.extracted_at,
+            status = excluded.status,
+            attempts = notice_attachments.attempts + 1
+    """, rows)
+    conn.commit()
+    failed = sum(1 for r in rows if r[7] != "ok")
+    print(f"[ATTACH] 첨부파일 {len(rows) - failed}건 저장, 실패 {failed}건 (대상 {len(jobs)}건)")
+    return len(rows) - failed
+
+
+def ingest_attachments(notices, db_path):
+    """공지사항들의 새 첨부파일을 내려받아 텍스트를 추출하고 저장. 저장 건수 반환
+
+    notices: bbs_id, ntt_sn, attachments([{file_name, url}])를 가진 dict 목록
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        existing = _existing_keys(conn, notices)
+        jobs = [
+            (n["bbs_id"], n["ntt_sn"], att["file_name"], att["url"])
+            for n in notices
+            for att in n.get("attachments") or []
+            if (n["bbs_id"], n["ntt_sn"], att["file_name"]) not in existing
+            and _ext(att["file_name"]) in EXTRACTORS
+        ]
+        if not jobs:
+            return 0
+        return _ingest_jobs(conn, jobs)
+    finally:
+        conn.close()
+
+
+def retry_failed_attachments(db_path):
+    """예전 수집에서 실패한 첨부를 다시 처리 (MAX_ATTEMPTS번까지). 저장 건수 반환"""
+    conn = sqlite3.connect(db_path)
+    try:
+        jobs = conn.execute(
+            "SELECT bbs_id, ntt_sn, file_name, url FROM notice_attachments "
+            "WHERE status = 'failed' AND attempts < ?", (MAX_ATTEMPTS,)
+        ).fetchall()
+        if not jobs:
+            return 0
+        print(f"[ATTACH] 실패한 첨부 {len(jobs)}건 재시도")
+        return _ingest_jobs(conn, [tuple(j) for j in jobs])
+    finally:
+        conn.close()
@@ -0,0 +1,130 @@
+# qa_snapshot.py
+# QA 매칭/검색용 파생 구조를 한 파일로 미리 만들어 두는 빌드 단계
+# - qa_data, 데이터 버전, QA 매칭용 소문자 질문 목록, 검색 역색인(Retriever), 의미 캐시 IDF,
+#   사전 생성 응답 bytes
+# - 파일 형식: MAGIC + 형식 버전(2바이트) + pickle 본문. 부팅 시 한 번 읽어 그대로 복원
+# - 원본(school_dataset.json 내용 + DB 세대)이 바뀌었으면 스냅샷을 쓰지 않고 예전처럼 직접 생성
+# 빌드: python qa_snapshot.py  (render.yaml buildCommand에서 실행)
+# 스냅샷은 이 서버가 직접 만든 빌드 산출물만 읽는다 (외부에서 받은 파일을 넣지 말 것: pickle).
+import os
+import sys
+import json
+import time
+import pickle
+import struct
+import hashlib
+import sqlite3
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BASE_DIR, "school_dataset.json")
+DB_PATH = os.path.join(BASE_DIR, "school_data.db")
+SNAPSHOT_PATH = os.getenv("QA_SNAPSHOT_PATH", os.path.join(BASE_DIR, "qa_snapshot.bin"))
+
+MAGIC = b"WSQASNAP"
+FORMAT_VERSION = 3          # 2: 검색 색인 postings를 array로 보관, 3: QA 매칭용 질문 목록 추가
+
+
+def db_generation(db_path=DB_PATH):
+    """검색 색인에 들어가는 DB 테이블(pages, notices)의 세대 문자열. 내용이 바뀌면 달라짐
+
+    DB/테이블이 없거나 비어 있으면 모두 "-"로 같게 취급 (빌드 환경엔 DB가 없을 수 있음)
+    """
+    queries = ("SELECT COUNT(*), MAX(fetched_at) FROM pages",
+               "SELECT COUNT(*), MAX(id), MAX(created_at) FROM notices")
+    parts = ["-"] * len(queries)
+    if not os.path.exists(db_path):
+        return "|".join(parts)
+    try:
+        con = sqlite3.connect(db_path)
+    except sqlite3.Error:
+        return "|".join(parts)
+    try:
+        for i, sql in enumerate(queries):
+            try:
+                row = con.execute(sql).fetchone()
+            except sqlite3.Error:
+                continue
+            if row and row[0]:
+                parts[i] = repr(row)
+    finally:
+        con.close()
+    return "|".join(parts)
+
+
+def source_fingerprint(dataset_path=DATASET_PATH, db_path=DB_PATH):
+    """스냅샷 원본 지문: QA 파일 내용 해시 + DB 세대"""
+    try:
+        with open(dataset_path, "rb") as f:
+            dataset_hash = hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        dataset_hash = "no-dataset"
+    return f"{dataset_hash}:{db_generation(db_path)}"
+
+
+def compute_data_version(qa_data):
+    """QA 데이터 내용 해시 (바뀌면 캐시 무효화)"""
+    raw = json.dumps(qa_data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def build_state(qa_data, db_path=DB_PATH):
+    """qa_data로부터 파생 구조 전부 생성 (스냅샷 내용과 같은 dict)"""
+    from kakao_payloads import PayloadCache, QUICK_REPLIES
+    from retrieval import Retriever
+    from semantic_cache import build_idf
+
+    payloads = PayloadCache(QUICK_REPLIES)
+    payloads.compile_all(qa.get("answer") for qa in qa_data)
+    return {
+        "qa_data": qa_data,
+        "data_version": compute_data_version(qa_data),
+        "questions_lower": [qa.get("question", "").lower() for qa in qa_data],  # find_qa_match용
+        "retriever": Retriever.build(qa_data, db_path),
+        "idf": build_idf([qa.get("question", "") for qa in qa_data]),
+        "payloads": payloads.compiled(),
+    }
+
+
+def build_snapshot(dataset_path=DATASET_PATH, db_path=DB_PATH, out_path=SNAPSHOT_PATH):
+    """스냅샷 파일 생성 (임시 파일에 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓴 파일을 보지 않게 함)"""
+    started = time.perf_counter()
+    fingerprint = source_fingerprint(dataset_path, db_path)
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        qa_data = json.load(f)
+    state = build_state(qa_data, db_path)
+    state["fingerprint"] = fingerprint
+
+    body = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack(">H", FORMAT_VERSION) + body)
+    os.replace(tmp_path, out_path)
+    print(f"[SNAPSHOT] {out_path} 생성: QA {len(qa_data)}개, 검색 문서 {len(state['retriever'].docs)}개, "
+          f"{len(body) // 1024}KB, {(time.perf_counter() - started) * 1000:.0f}ms")
+    return out_path
+
+
+def load_snapshot(path=SNAPSHOT_PATH, dataset_path=DATASET_PATH, db_path=DB_PATH):
+    """스냅샷을 한 번에 읽어 복원. 없거나 형식/원본이 다르면 None"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    header = len(MAGIC) + 2
+    if len(raw) < header or raw[:len(MAGIC)] != MAGIC or struct.unpack(">H", raw[len(MAGIC):header])[0] != FORMAT_VERSION:
+        print(f"[SNAPSHOT] 형식이 달라 무시: {path}")
+        return None
+    try:
+        state = pickle.loads(raw[header:])
+    except Exception as e:
+        print(f"[SNAPSHOT] 읽기 실패: {type(e).__name__}: {e}")
+        return None
+    if state.get("fingerprint") != source_fingerprint(dataset_path, db_path):
+        print("[SNAPSHOT] 원본이 바뀌어 무시 (다시 빌드 필요)")
+        return None
+    return state
+
+
+if __name__ == "__main__":
+    build_snapshot(out_path=sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH)
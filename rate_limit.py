@@ -0,0 +1,70 @@
+# rate_limit.py
+# 사용자별 토큰 버킷 요청 제한 (카카오 userRequest.user.id 기준)
+# - 한 사용자가 도배해도 그 사용자만 느려지고 다른 학부모 응답/OpenAI 한도는 지켜짐
+# - 예산 두 가지: LOCAL(키워드 검색 등 가벼운 경로, 넉넉하게) / LLM(OpenAI 호출, 빡빡하게)
+# - 사용자 버킷은 LRU로 최대 RATE_MAX_USERS개만 보관 (메모리 상한, 밀려난 사용자는 가득 찬 버킷으로 다시 시작)
+# - 거절은 dict 조회 + 산술 몇 번이라 마이크로초 단위
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import metrics
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LOCAL_PER_MIN = float(os.getenv("RATE_LOCAL_PER_MIN", 30))   # 가벼운 경로: 분당 보충량
+RATE_LOCAL_BURST = int(os.getenv("RATE_LOCAL_BURST", 15))         # 한 번에 몰아 쓸 수 있는 양
+RATE_LLM_PER_MIN = float(os.getenv("RATE_LLM_PER_MIN", 5))
+RATE_LLM_BURST = int(os.getenv("RATE_LLM_BURST", 3))
+RATE_MAX_USERS = int(os.getenv("RATE_MAX_USERS", 10000))
+
+RATE_LIMITED_TEXT = "질문이 너무 빠르게 이어지고 있어요. 잠시 후 다시 물어봐 주세요 🙂"
+
+
+class TokenBucketLimiter:
+    def __init__(self, name, per_min, burst, max_keys=RATE_MAX_USERS, clock=time.monotonic):
+        self.name = name
+        self.rate = per_min / 60.0          # 초당 보충 토큰
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()       # key -> [남은 토큰, 마지막 갱신 시각]
+        self._rejected = 0
+
+    def allow(self, key, cost=1) -> bool:
+        """key의 버킷에서 cost만큼 꺼낼 수 있으면 꺼내고 True"""
+        if not RATE_LIMIT_ENABLED:
+            return True
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True
+            self._rejected += 1
+        metrics.RATE_LIMITED.inc(scope=self.name)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._buckets), "rejected": self._rejected,
+                    "per_min": self.rate * 60, "burst": self.burst}
+
+
+LOCAL = TokenBucketLimiter("local", RATE_LOCAL_PER_MIN, RATE_LOCAL_BURST)
+LLM = TokenBucketLimiter("llm", RATE_LLM_PER_MIN, RATE_LLM_BURST)
+
+
+def snapshot_all():
+    """/health 표시용"""
+    return {"local": LOCAL.stats(), "llm": LLM.stats()}
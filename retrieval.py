@@ -0,0 +1,177 @@
+# retrieval.py
+# OpenAI 폴백용 검색 + 프롬프트 컨텍스트 구성 (RAG)
+# - QA 쌍과 페이지/공지 본문 문단을 메모리 역색인(단어 + 문자 2-gram, BM25)으로 검색
+# - 로컬 토큰 추정기로 예산(토큰 수)을 넘지 않게 상위 결과를 채워 넣음
+# - 색인은 QA 데이터 버전이 바뀔 때만 다시 만들고, 검색+조립은 수 ms 안에 끝남
+import math
+import re
+import sqlite3
+from array import array
+from collections import Counter, defaultdict
+
+from semantic_cache import normalize
+
+PASSAGE_CHARS = 300          # 페이지 본문 문단 길이(글자)
+MAX_PASSAGES_PER_PAGE = 20
+BM25_K1, BM25_B = 1.2, 0.75
+QA_BOOST = 1.5               # 같은 점수면 학교가 직접 작성한 QA를 우선
+
+_HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_WS_RE = re.compile(r"\s+")
+
+
+# ---- 토큰 추정 ------------------------------------------------------
+def estimate_tokens(text):
+    """토크나이저 없이 빠르게 토큰 수를 (넉넉하게) 추정
+
+    cl100k 기준 한글 한 글자는 대략 1~2토큰, 그 밖의 문자는 4글자에 1토큰 정도라
+    한글은 1.5토큰, 나머지는 0.3토큰으로 잡아 예산을 넘기지 않는 쪽으로 어림한다.
+    """
+    if not text:
+        return 0
+    hangul = len(_HANGUL_RE.findall(text))
+    other = len(text) - hangul
+    return int(math.ceil(hangul * 1.5 + other * 0.3))
+
+
+def truncate_to_tokens(text, budget):
+    """추정 토큰 수가 budget 이하가 되도록 뒤를 자름"""
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) + 1 <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + "…" if lo else ""
+
+
+# ---- 색인 -----------------------------------------------------------
+def _features(text):
+    feats = Counter()
+    for word in normalize(text).split():
+        feats["w:" + word] += 1
+        for i in range(len(word) - 1):
+            feats[word[i:i + 2]] += 1
+    return feats
+
+
+def split_passages(text, size=PASSAGE_CHARS):
+    """본문을 문장 경계 근처에서 size 글자 안팎의 문단으로 나눔"""
+    text = _WS_RE.sub(" ", text or "").strip()
+    out = []
+    while text and len(out) < MAX_PASSAGES_PER_PAGE:
+        if len(text) <= size:
+            out.append(text)
+            break
+        cut = max(text.rfind(". ", 0, size), text.rfind("다 ", 0, size))
+        cut = cut + 1 if cut > size // 2 else size
+        out.append(text[:cut].strip())
+        text = text[cut:].strip()
+    return out
+
+
+class Retriever:
+    """QA 쌍 + 페이지 문단 역색인"""
+
+    def __init__(self, docs):
+        # docs: [{"kind": "qa"|"page", "title", "text", "url"(선택)}]
+        self.docs = docs
+        postings = defaultdict(list)           # 특징 -> [(문서 번호, tf)]
+        lengths = []
+        for i, doc in enumerate(docs):
+            feats = _features(f"{doc['title']} {doc['text'] if doc['kind'] == 'page' else ''}")
+            lengths.append(sum(feats.values()) or 1)
+            for f, tf in feats.items():
+                postings[f].append((i, tf))
+        n = len(docs) or 1
+        self._avg_len = sum(lengths) / n if lengths else 1.0
+        self._idf = {f: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+                     for f, p in postings.items()}
+        # 숫자는 파이썬 객체 대신 array 버퍼에 보관: 검색 중 참조 카운트 갱신이 없어
+        # preload 후 fork한 워커들이 이 메모리 페이지를 계속 공유함 (copy-on-write)
+        self._postings = {f: (array("i", [i for i, _ in p]), array("i", [tf for _, tf in p]))
+                          for f, p in postings.items()}
+        self._lengths = array("i", lengths)
+        self._is_qa = bytes(doc["kind"] == "qa" for doc in docs)
+
+    @classmethod
+    def build(cls, qa_data, db_path=None):
+        docs = [
+            {"kind": "qa", "title": qa.get("question", ""), "text": qa.get("answer", ""),
+             "url": None}
+            for qa in qa_data or [] if qa.get("question") and qa.get("answer")
+        ]
+        if db_path:
+            docs.extend(_load_page_docs(db_path))
+        return cls(docs)
+
+    def search(self, query, k=5):
+        """BM25 점수 상위 k개 (점수, 문서) 목록"""
+        scores = defaultdict(float)
+        for f, qtf in _features(query).items():
+            postings = self._postings.get(f)
+            if not postings:
+                continue
+            idf = self._idf[f]
+            for i, tf in zip(*postings):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[i] / self._avg_len)
+                scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        for i in scores:
+            if self._is_qa[i]:
+                scores[i] *= QA_BOOST
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+        return [(score, self.docs[i]) for i, score in top]
+
+
+def _load_page_docs(db_path):
+    """pages(크롤러)와 notices 테이블 본문을 문단으로 나눠 문서 목록으로. 테이블이 없으면 건너뜀"""
+    docs = []
+    try:
+        con = sqlite3.connect(db_path)
+    except sqlite3.Error:
+        return docs
+    try:
+        for table, sql in (
+            ("pages", "SELECT title, content, url FROM pages"),
+            ("notices", "SELECT title, content, url FROM notices ORDER BY created_at DESC LIMIT 200"),
+        ):
+            try:
+                rows = con.execute(sql).fetchall()
+            except sqlite3.Error:
+                continue
+            for title, content, url in rows:
+                for passage in split_passages(content):
+                    docs.append({"kind": "page", "title": title or "", "text": passage, "url": url})
+    finally:
+        con.close()
+    return docs
+
+
+# ---- 컨텍스트 조립 ---------------------------------------------------
+def format_hit(doc):
+    if doc["kind"] == "qa":
+        return f"Q: {doc['title']}\nA: {doc['text']}"
+    head = f"[{doc['title']}]" if doc["title"] else ""
+    return f"{head} {doc['text']}".strip()
+
+
+def pack_context(hits, budget):
+    """검색 결과를 점수 순서대로 예산(추정 토큰) 안에 채워 넣은 문자열 반환
+
+    마지막 항목이 예산을 넘으면 남은 만큼만 잘라 넣는다.
+    """
+    parts, used = [], 0
+    for _, doc in hits:
+        block = format_hit(doc)
+        cost = estimate_tokens(block) + 1  # 구분 줄바꿈
+        if used + cost > budget:
+            rest = budget - used - 1
+            if rest >= 20:
+                parts.append(truncate_to_tokens(block, rest))
+            break
+        parts.append(block)
+        used += cost
+    return "\n".join(parts)
@@ -0,0 +1,168 @@
+# semantic_cache.py
+# LLM 폴백 답변 의미 캐시
+# - 질문을 로컬 희소 벡터(어미 제거한 단어 IDF + 문자 2-gram)로 바꿔 이전에 답한 질문들과 코사인 유사도 비교
+# - 임계치 이상이면 저장된 답변을 그대로 반환 (네트워크 호출 없음, 수백 건 기준 1ms 안팎)
+# - LRU + TTL 로 크기/신선도 제한, QA 데이터 버전이 바뀌면 전체 무효화
+import os
+import re
+import math
+import time
+import threading
+from collections import OrderedDict, Counter
+
+MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_SIZE", 512))
+TTL_SEC = float(os.getenv("SEMANTIC_CACHE_TTL", 24 * 3600))
+THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.8))
+
+# 의미에 거의 영향이 없는 어미/조사 (단어 끝에서 제거, 최소 2글자는 남김)
+_SUFFIXES = sorted([
+    "인가요", "한가요", "나요", "까요", "어요", "에요", "예요", "이에요", "해요", "해주세요",
+    "주세요", "합니까", "입니까", "습니까", "인지", "는지", "요",
+    "에서", "에게", "으로", "은", "는", "이", "가", "을", "를", "에", "의", "도", "로",
+], key=len, reverse=True)
+_STOPWORDS = {"알려주세요", "알려줘", "궁금해요", "궁금합니다", "혹시", "좀", "그", "저"}
+# 같은 뜻으로 묻는 표현을 하나로 모음
+_SYNONYMS = [
+    (re.compile(r"몇\s*시"), "시간"),
+    (re.compile(r"언제"), "시간"),
+    (re.compile(r"어디|위치"), "장소"),
+    (re.compile(r"얼마|비용|가격"), "비용"),
+    (re.compile(r"전화번호|연락처|번호"), "연락처"),
+]
+_NON_WORD_RE = re.compile(r"[^\w가-힣]+")
+BIGRAM_WEIGHT = 0.3   # 띄어쓰기/오타 대응용 문자 2-gram 가중치
+
+
+def _stem(word):
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize(text):
+    text = _NON_WORD_RE.sub(" ", (text or "").lower())
+    for pattern, repl in _SYNONYMS:
+        text = pattern.sub(f" {repl} ", text)
+    words = [_stem(w) for w in text.split() if w not in _STOPWORDS]
+    # 동의어 치환 뒤 남은 어미 조각("어디에요" -> "장소 에요")은 버림
+    return " ".join(w for w in words if w not in _SUFFIXES)
+
+
+def text_vector(text, idf=None):
+    """단어(+IDF 가중) + 단어 내부 문자 2-gram 특징의 L2 정규화 희소 벡터"""
+    idf = idf or {}
+    unseen = idf.get("", 1.0)
+    feats = Counter()
+    for word in normalize(text).split():
+        feats["w:" + word] += idf.get(word, unseen)
+        for i in range(len(word) - 1):
+            feats[word[i:i + 2]] += BIGRAM_WEIGHT
+    norm = math.sqrt(sum(v * v for v in feats.values()))
+    if not norm:
+        return {}
+    return {k: v / norm for k, v in feats.items()}
+
+
+def build_idf(questions):
+    """QA 질문 목록에서 단어 IDF 계산 (흔한 단어일수록 유사도에 덜 기여)
+
+    "" 키는 질문에 한 번도 안 나온 단어의 가중치(가장 드문 단어로 취급).
+    """
+    df = Counter()
+    for q in questions:
+        df.update(set(normalize(q).split()))
+    n = len(questions)
+    idf = {w: math.log((n + 1) / (c + 1)) + 1.0 for w, c in df.items()}
+    idf[""] = math.log(n + 1) + 1.0
+    return idf
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class SemanticCache:
+    """질문 유사도 기반 답변 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl_sec=TTL_SEC, threshold=THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (scope, 정규화 질문) -> (벡터, 답변, 저장 시각)
+        self._version = None
+        self._idf = {}
+        self.hits = self.misses = 0
+
+    def set_version(self, version, questions=(), idf=None):
+        """QA 데이터 버전 갱신. 바뀌었으면 캐시 전체 무효화하고 IDF를 새 질문 목록으로 다시 계산
+
+        idf: 미리 계산해 둔 IDF (스냅샷). 주면 questions 대신 사용
+        """
+        with self._lock:
+            if version == self._version:
+                return
+            if self._entries:
+                print(f"[CACHE] 데이터 버전 변경({self._version} -> {version}), {len(self._entries)}건 무효화")
+            self._entries.clear()
+            self._version = version
+            if idf is not None:
+                self._idf = idf
+            else:
+                self._idf = build_idf(list(questions)) if questions else {}
+
+    def get(self, question, scope=""):
+        """유사한 질문의 답변 반환 (없으면 None)"""
+        vec = text_vector(question, self._idf)
+        if not vec:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, 0.0
+            expired = []
+            for key, (other, _, stored_at) in self._entries.items():
+                if now - stored_at > self.ttl_sec:
+                    expired.append(key)
+                    continue
+                if key[0] != scope:
+                    continue
+                score = cosine(vec, other)
+                if score > best_score:
+                    best_key, best_score = key, score
+            for key in expired:
+                del self._entries[key]
+            if best_key is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][1]
+
+    def put(self, question, answer, scope=""):
+        vec = text_vector(question, self._idf)
+        if not vec or not answer:
+            return
+        key = (scope, normalize(question))
+        with self._lock:
+            self._entries[key] = (vec, answer, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,68 @@
+# single_flight.py
+# 같은 질문이 동시에 여러 건 들어오면 한 건만 계산하고 나머지는 그 결과를 기다려 같이 씀
+# - 공지 직후 학부모 수십 명이 같은 질문을 보낼 때 OpenAI 호출/검색을 한 번으로 줄임
+# - 키는 호출하는 쪽이 정함 (ai_logic: 답변 모드 + QA 데이터 버전 + 정규화한 발화)
+# - 먼저 온 요청(leader)이 예외로 끝나면 기다리던 요청도 같은 예외를 받음
+# - 기다리다 WAIT_SEC가 지나면 더 기다리지 않고 직접 계산 (leader가 멈춰도 같이 묶이지 않게)
+import os
+import threading
+
+import metrics
+
+WAIT_SEC = float(os.getenv("SINGLE_FLIGHT_WAIT_SEC", 40))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name, wait_sec=WAIT_SEC):
+        self.name = name
+        self.wait_sec = wait_sec
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, on_wait=None):
+        """key로 진행 중인 계산이 있으면 그 결과를, 없으면 fn()을 직접 실행한 결과를 반환
+
+        반환: (결과, 다른 요청의 결과를 받았는지). on_wait는 기다리기 직전에 호출됨
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            if on_wait:
+                on_wait()
+            if call.done.wait(self.wait_sec):
+                metrics.COALESCED.inc(name=self.name)
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            print(f"[SINGLE_FLIGHT] {self.name}: {self.wait_sec:.0f}초 대기 초과, 직접 처리")
+            return fn(), False
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
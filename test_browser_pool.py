@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import browser_pool
+
+
+class FakeDriver:
+    created = 0
+
+    def __init__(self):
+        FakeDriver.created += 1
+        self.alive = True
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise ConnectionError("chrome not reachable")
+        return 1
+
+    def window(self, handle):
+        pass
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeDriver.created = 0
+    monkeypatch.setattr(browser_pool, "_new_driver", FakeDriver)
+    pool = browser_pool.BrowserPool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_session_is_reused(pool):
+    with pool.borrow() as first:
+        pass
+    with pool.borrow() as second:
+        pass
+    assert first is second
+    assert FakeDriver.created == 1
+
+
+def test_error_in_body_keeps_healthy_session(pool):
+    with pytest.raises(TimeoutError):
+        with pool.borrow() as first:
+            raise TimeoutError("table tbody not found")
+    with pool.borrow() as second:
+        pass
+    assert first is second and not first.quit_called
+
+
+def test_dead_driver_is_discarded(pool):
+    with pytest.raises(ConnectionError):
+        with pool.borrow() as first:
+            first.alive = False
+            first.execute_script("return 1")
+    with pool.borrow() as second:
+        pass
+    assert second is not first and first.quit_called
+    assert FakeDriver.created == 2
+
+
+def test_session_restarts_after_max_uses(pool, monkeypatch):
+    monkeypatch.setattr(browser_pool, "MAX_USES", 2)
+    drivers = []
+    for _ in range(3):
+        with pool.borrow() as driver:
+            drivers.append(driver)
+    assert drivers[0] is drivers[1] is not drivers[2]
+    assert drivers[0].quit_called
+
+
+def test_waiter_wakes_up_after_discard(pool):
+    got = []
+    started = threading.Event()
+
+    def waiter():
+        started.set()
+        with pool.borrow(timeout=5) as driver:
+            got.append(driver)
+
+    with pytest.raises(ConnectionError):
+        with pool.borrow() as first:
+            thread = threading.Thread(target=waiter)
+            thread.start()
+            started.wait()
+            time.sleep(0.05)
+            first.alive = False
+            raise ConnectionError("chrome crashed")
+    began = time.monotonic()
+    thread.join(timeout=5)
+    # 세션이 버려지면 대기 중이던 쪽이 바로 새 세션을 만들어 가져감
+    assert time.monotonic() - began < 1
+    assert got and got[0] is not first
+
+
+def test_borrow_times_out_when_pool_is_busy(pool):
+    with pool.borrow():
+        with pytest.raises(TimeoutError):
+            with pool.borrow(timeout=0.05):
+                pass
@@ -0,0 +1,90 @@
+import time
+
+from circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+
+def _breaker(**kw):
+    opts = dict(window_sec=60, window_size=10, min_calls=4, failure_ratio=0.5,
+                slow_ratio=0.75, open_sec=0.2, half_open_probes=1)
+    opts.update(kw)
+    return CircuitBreaker("test", **opts)
+
+
+def test_opens_after_failure_ratio():
+    cb = _breaker()
+    for ok in (True, False, True):
+        assert cb.allow()
+        cb.record(ok)
+    assert cb.snapshot()["state"] == CLOSED  # min_calls 미만
+    cb.record(False, error="Timeout")
+    snap = cb.snapshot()
+    assert snap["state"] == OPEN
+    assert snap["last_error"] == "Timeout"
+    assert not cb.allow()
+    assert cb.snapshot()["rejected"] == 1
+
+
+def test_opens_when_calls_are_slow():
+    cb = _breaker()
+    for _ in range(4):
+        cb.record(True, slow=True)
+    assert cb.snapshot()["state"] == OPEN
+
+
+def test_half_open_probe_closes_on_success():
+    cb = _breaker()
+    for _ in range(4):
+        cb.record(False)
+    assert not cb.allow()
+    time.sleep(0.25)
+    assert cb.allow()            # 시험 호출 1건만 통과
+    assert cb.snapshot()["state"] == HALF_OPEN
+    assert not cb.allow()
+    cb.record(True)
+    assert cb.snapshot()["state"] == CLOSED
+    assert cb.allow()
+
+
+def test_half_open_probe_reopens_on_failure():
+    cb = _breaker()
+    for _ in range(4):
+        cb.record(False)
+    time.sleep(0.25)
+    assert cb.allow()
+    cb.record(False)
+    assert cb.snapshot()["state"] == OPEN
+    assert not cb.allow()
+
+
+def test_old_calls_leave_the_window():
+    cb = _breaker(window_sec=0.1)
+    for _ in range(3):
+        cb.record(False)
+    time.sleep(0.15)
+    cb.record(True)
+    assert cb.snapshot()["state"] == CLOSED
+    assert cb.snapshot()["window_calls"] == 1
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    cb = _breaker()
+    for _ in range(4):
+        cb.record(False)
+    time.sleep(0.25)
+    assert cb.allow()
+    cb.cancel()                  # 통과는 했지만 호출하지 않음 (예: 사용자 예산 초과)
+    assert cb.allow()
+    cb.record(True)
+    assert cb.snapshot()["state"] == CLOSED
+
+
+def test_open_breaker_does_not_spend_user_budget(tmp_path, monkeypatch):
+    import rate_limit
+    from ai_logic import AILogic, OPENAI_BREAKER, OPENAI_FALLBACK
+
+    spent = []
+    monkeypatch.setattr(OPENAI_BREAKER, "allow", lambda: False)
+    monkeypatch.setattr(rate_limit.LLM, "allow", lambda key, cost=1: spent.append(key) or True)
+    ai = AILogic(db_path=str(tmp_path / "school_data.db"))
+    assert ai.call_openai_api("방과후 신청", "parent-a") == (False, OPENAI_FALLBACK)
+    assert spent == []
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import ai_logic
+import hot_reload
+from ai_logic import AILogic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """임시 폴더의 QA 파일/DB로 만든 (ai, dataset, reloader)"""
+    dataset = str(tmp_path / "school_dataset.json")
+    shutil.copy(os.path.join(BASE_DIR, "school_dataset.json"), dataset)
+    monkeypatch.setattr(ai_logic, "DATASET_PATH", dataset)
+    monkeypatch.setattr(hot_reload, "DATASET_PATH", dataset)
+    monkeypatch.setattr(ai_logic, "load_snapshot", lambda **kw: None)
+    ai = AILogic(db_path=str(tmp_path / "school_data.db"))
+    ai.warm_up()
+    return ai, dataset, hot_reload.QAReloader(ai, interval=3600)
+
+
+def _add_qa(dataset, question, answer):
+    with open(dataset, encoding="utf-8") as f:
+        data = json.load(f)
+    data.append({"question": question, "answer": answer, "category": "기타"})
+    with open(dataset, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_unchanged_source_is_not_reloaded(env):
+    ai, dataset, reloader = env
+    before = ai._state
+    assert reloader.check(force=True) is False
+    assert ai._state is before
+
+
+def test_changed_dataset_swaps_state(env):
+    ai, dataset, reloader = env
+    old_version = ai.data_version
+    _add_qa(dataset, "핫리로드 확인 질문", "핫리로드 확인 답변")
+    swapped = []
+    reloader.on_swap = swapped.append
+    assert reloader.check(force=True) is True
+    assert ai.data_version != old_version
+    assert swapped and swapped[0]["data_version"] == ai.data_version
+    assert ai.get_retriever().search("핫리로드 확인 질문", k=1)[0][1]["title"] == "핫리로드 확인 질문"
+
+
+def test_in_flight_request_keeps_old_state(env):
+    ai, dataset, reloader = env
+    old_version = ai.data_version
+    ai._pinned.state = ai._state          # process_message 시작 시점과 같은 상태
+    try:
+        _add_qa(dataset, "새 질문", "새 답변")
+        assert ai.reload_if_changed() is True
+        assert ai.data_version == old_version
+    finally:
+        ai._pinned.state = None
+    assert ai.data_version != old_version
@@ -0,0 +1,116 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        server = self.server
+        server.hits.append((self.command, self.path))
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = f"ok {self.path}".encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """요청마다 statuses 앞에서부터 상태코드를 꺼내 응답하는 로컬 서버 (비면 200)"""
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 2)
+    monkeypatch.setattr(http_client, "BACKOFF_FACTOR", 0)
+    monkeypatch.setattr(http_client, "PER_HOST_INTERVAL", 0)
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_client, "_hosts", {})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits, httpd.statuses = [], []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_session_is_shared(server):
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+    assert session.get_adapter(server.url).max_retries.total == 2
+    assert http_client.fetch(server.url + "/a") == "ok /a"
+    assert http_client.fetch(server.url + "/b") == "ok /b"
+
+
+def test_get_retries_listed_statuses(server):
+    server.statuses = [503, 502]
+    assert http_client.fetch(server.url + "/menu") == "ok /menu"
+    assert len(server.hits) == 3
+
+
+def test_get_gives_up_after_max_retries(server):
+    server.statuses = [503] * 5
+    with pytest.raises(requests.HTTPError):
+        http_client.fetch(server.url + "/down")
+    assert len(server.hits) == 3   # 첫 요청 + 재시도 2번
+
+
+def test_unlisted_status_and_post_are_not_retried(server):
+    server.statuses = [404]
+    with pytest.raises(requests.HTTPError):
+        http_client.fetch(server.url + "/missing")
+    assert len(server.hits) == 1
+
+    server.statuses = [503]
+    assert http_client.post(server.url + "/callback", json={}).status_code == 503
+    assert len(server.hits) == 2
+
+
+def test_host_slot_caps_concurrency(monkeypatch):
+    monkeypatch.setattr(http_client, "PER_HOST_CONCURRENCY", 2)
+    monkeypatch.setattr(http_client, "PER_HOST_INTERVAL", 0)
+    monkeypatch.setattr(http_client, "_hosts", {})
+    lock = threading.Lock()
+    now, peak = {}, {}
+
+    def work(url):
+        host = url.split("/")[2]
+        with http_client.host_slot(url):
+            with lock:
+                now[host] = now.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), now[host])
+            time.sleep(0.02)
+            with lock:
+                now[host] -= 1
+
+    urls = ["http://school.example/a"] * 6 + ["http://other.example/b"] * 3
+    http_client.map_bounded(work, urls, max_workers=9)
+    assert peak == {"school.example": 2, "other.example": 2}
+
+
+def test_map_bounded_keeps_order_and_caps_workers():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def square(n):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+        return n * n
+
+    assert http_client.map_bounded(square, range(10), max_workers=3) == [n * n for n in range(10)]
+    assert state["peak"] <= 3
+    assert http_client.map_bounded(square, []) == []
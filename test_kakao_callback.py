@@ -0,0 +1,88 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import kakao_callback
+
+
+class _CallbackServer:
+    """카카오 callbackUrl 대신 받는 로컬 서버 (받은 본문을 모아둠)"""
+
+    def __init__(self, status=200):
+        received = self.received = []
+        self.done = threading.Event()
+        done = self.done
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                received.append(json.loads(self.rfile.read(length).decode("utf-8")))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"taskId": "test", "status": "SUCCESS"}')
+                done.set()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/callback"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_accepted_response_uses_callback():
+    body = kakao_callback.accepted_response()
+    assert body["version"] == "2.0"
+    assert body["useCallback"] is True
+    assert body["data"]["text"]
+
+
+def test_get_callback_url():
+    data = {"userRequest": {"utterance": "안녕", "callbackUrl": "https://example.com/cb"}}
+    assert kakao_callback.get_callback_url(data) == "https://example.com/cb"
+    assert kakao_callback.get_callback_url({"userRequest": {}}) is None
+    assert kakao_callback.get_callback_url(None) is None
+
+
+def test_submit_posts_answer_to_callback_url():
+    srv = _CallbackServer()
+    try:
+        fut = kakao_callback.submit(srv.url, lambda: "긴 답변입니다", quick_replies=[{"label": "급식"}])
+        assert fut.result(timeout=10) is True
+        assert srv.done.wait(5)
+    finally:
+        srv.close()
+    payload = srv.received[0]
+    assert payload["template"]["outputs"][0]["simpleText"]["text"] == "긴 답변입니다"
+    assert payload["template"]["quickReplies"] == [{"label": "급식"}]
+
+
+def test_submit_sends_fallback_when_compute_fails():
+    def boom():
+        raise RuntimeError("OpenAI down")
+
+    srv = _CallbackServer()
+    try:
+        assert kakao_callback.submit(srv.url, boom).result(timeout=10) is True
+    finally:
+        srv.close()
+    text = srv.received[0]["template"]["outputs"][0]["simpleText"]["text"]
+    assert text == kakao_callback.FAILED_TEXT
+
+
+def test_submit_reports_rejected_callback():
+    srv = _CallbackServer(status=400)
+    try:
+        assert kakao_callback.submit(srv.url, lambda: "답변").result(timeout=10) is False
+    finally:
+        srv.close()
+
+
+def test_long_text_is_truncated():
+    payload = kakao_callback.callback_payload("가" * 2000)
+    assert len(payload["template"]["outputs"][0]["simpleText"]["text"]) == kakao_callback.MAX_TEXT_LEN
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+from kakao_payloads import PayloadCache, extract_link_from_text
+
+
+def test_link_is_split_from_answer():
+    text, link = extract_link_from_text("신청서는 여기 https://pajuwaseok-e.goepj.kr/a?b=1 -")
+    assert (text, link) == ("신청서는 여기", "https://pajuwaseok-e.goepj.kr/a?b=1")
+    assert extract_link_from_text("https://www.ktbookmall.com")[0] == "교과서 구매는 아래 링크에서 가능합니다."
+
+
+def test_echoed_text_does_not_evict_fixed_templates():
+    cache = PayloadCache()
+    fixed = cache.text("무엇을 도와드릴까요?")
+    for i in range(1000):
+        body = cache.text(f"‘질문 {i}’ 관련 링크를 찾지 못했어요.", cache=False)
+    text = json.loads(body)["template"]["outputs"][0]["simpleText"]["text"]
+    assert text == "‘질문 999’ 관련 링크를 찾지 못했어요."
+    assert cache.stats()["dynamic"] == 1
+    assert cache.text("무엇을 도와드릴까요?") is fixed
+
+
+def test_import_does_not_pull_in_ai_logic():
+    code = "import sys, kakao_payloads; print('ai_logic' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.strip() == "False"
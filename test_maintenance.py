@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import sqlite3
+
+import pytest
+
+import maintenance
+from database import DatabaseManager
+
+OLD = "2020-01-15 09:00:00"
+OLD_FEB = "2020-02-03 09:00:00"
+NEW = "2999-01-01 00:00:00"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(maintenance, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    path = str(tmp_path / "school_data.db")
+    DatabaseManager(path)
+    con = sqlite3.connect(path)
+    rows = [("u1", f"질문{i}", "답", OLD, "급식", "qa", "answered") for i in range(3)]
+    rows += [("u2", "질문", "답", OLD_FEB, "방과후", "openai", "answered"),
+             ("u3", "최근 질문", "답", NEW, "급식", "qa", "answered")]
+    con.executemany(
+        "INSERT INTO conversation_history (user_id, message, response, timestamp, category, stage, outcome) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+    return path
+
+
+def _archived_ids():
+    ids = []
+    for path in maintenance.archive_files():
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            ids.extend(json.loads(line)["id"] for line in f)
+    return sorted(ids)
+
+
+def _daily_counts(path):
+    con = sqlite3.connect(path)
+    rows = con.execute("SELECT day, category, count FROM conversation_daily_stats ORDER BY day").fetchall()
+    con.close()
+    return rows
+
+
+def test_old_rows_are_rolled_up_archived_and_deleted(db):
+    result = maintenance.run_maintenance(db, retention_days=30)
+    assert result["archived_rows"] == 4
+    assert _daily_counts(db) == [("2020-01-15", "급식", 3), ("2020-02-03", "방과후", 1)]
+    assert _archived_ids() == [1, 2, 3, 4]
+    assert len(maintenance.archive_files("2020-01")) == 1
+    con = sqlite3.connect(db)
+    assert [r[0] for r in con.execute("SELECT message FROM conversation_history")] == ["최근 질문"]
+    con.close()
+
+
+def test_failed_delete_rolls_back_rollup_and_retry_does_not_duplicate(db):
+    con = sqlite3.connect(db)
+    con.execute("CREATE TRIGGER boom BEFORE DELETE ON conversation_history "
+                "BEGIN SELECT RAISE(ABORT, 'boom'); END")
+    con.commit()
+    con.close()
+    with pytest.raises(sqlite3.DatabaseError):
+        maintenance.run_maintenance(db, retention_days=30)
+    assert _daily_counts(db) == []            # 집계도 같이 롤백
+
+    con = sqlite3.connect(db)
+    con.execute("DROP TRIGGER boom")
+    con.commit()
+    con.close()
+    maintenance.run_maintenance(db, retention_days=30)
+    assert _daily_counts(db) == [("2020-01-15", "급식", 3), ("2020-02-03", "방과후", 1)]
+    assert _archived_ids() == [1, 2, 3, 4]    # 첫 시도에 이어 쓴 꼬리는 잘려 중복 없음
+    assert len(maintenance.archive_files()) == 2
+
+
+def test_batches_append_to_one_file_per_month(db, monkeypatch):
+    monkeypatch.setattr(maintenance, "BATCH_SIZE", 2)
+    assert maintenance.run_maintenance(db, retention_days=30)["archived_rows"] == 4
+    assert [os.path.basename(p) for p in maintenance.archive_files()] == [
+        "conversation_history-2020-01.ndjson.gz", "conversation_history-2020-02.ndjson.gz"]
+    assert _archived_ids() == [1, 2, 3, 4]
+
+
+def test_rollup_and_archive_use_kst_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr(maintenance, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    path = str(tmp_path / "school_data.db")
+    DatabaseManager(path)
+    con = sqlite3.connect(path)
+    con.execute("INSERT INTO conversation_history (user_id, message, response, timestamp, category) "
+                "VALUES ('u1', '질문', '답', '2020-03-31 16:00:00', '급식')")   # KST 2020-04-01 01:00
+    con.commit()
+    con.close()
+    maintenance.run_maintenance(path, retention_days=30)
+    assert _daily_counts(path) == [("2020-04-01", "급식", 1)]
+    assert maintenance.archive_files("2020-04") and not maintenance.archive_files("2020-03")
@@ -0,0 +1,50 @@
+import re
+
+import metrics
+
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="[^"]*",?)*\})? [-+0-9.eInf]+$')
+
+
+def _samples(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_render_prometheus_exposition_format():
+    metrics.begin_message()
+    metrics.enter_stage("expo_test_rule")
+    metrics.enter_stage("expo_test_qa")
+    assert metrics.finish_message() == "expo_test_qa"
+    metrics.RATE_LIMITED.inc(scope="expo_test")
+    metrics.RATE_LIMITED.inc(2, scope="expo_test")
+    metrics.DB_LATENCY.observe(0.003, op="expo_test")
+    metrics.DB_LATENCY.observe(0.2, op="expo_test")
+    metrics.DB_LATENCY.observe(30, op="expo_test")
+
+    text = metrics.render_prometheus()
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE_RE.match(line), line
+    # 지표마다 HELP/TYPE가 한 번씩, 샘플보다 앞에
+    for metric in metrics._registry:
+        lines = text.splitlines()
+        help_at = lines.index(next(l for l in lines if l.startswith(f"# HELP {metric.name} ")))
+        assert lines[help_at + 1].startswith(f"# TYPE {metric.name} ")
+
+    assert 'chatbot_rate_limited_total{scope="expo_test"} 3' in text
+    assert 'chatbot_answered_total{stage="expo_test_qa"} 1' in text
+    assert _samples(text, 'chatbot_stage_seconds_count{stage="expo_test_rule"}') == [
+        'chatbot_stage_seconds_count{stage="expo_test_rule"} 1']
+
+    buckets = _samples(text, 'chatbot_db_seconds_bucket{op="expo_test"')
+    les = [re.search(r'le="([^"]+)"', b).group(1) for b in buckets]
+    assert les == [metrics._fmt_value(b) for b in metrics.DEFAULT_BUCKETS] + ["+Inf"]
+    counts = [int(b.rsplit(" ", 1)[1]) for b in buckets]
+    assert counts == sorted(counts)                  # 누적 값
+    assert counts[0] == 1 and counts[les.index("0.25")] == 2 and counts[-1] == 3
+    assert 'chatbot_db_seconds_count{op="expo_test"} 3' in text
+    assert 'chatbot_db_seconds_sum{op="expo_test"} 30.203' in text
+
+
+def test_label_values_are_escaped():
+    metrics.ENDPOINT_OUTCOME.inc(endpoint='/a"b\\c', outcome="x\ny")
+    assert 'endpoint="/a\\"b\\\\c",outcome="x\\ny"' in metrics.render_prometheus()
@@ -0,0 +1,93 @@
+import sqlite3
+import time
+
+import pytest
+
+import http_client
+import notice_attachments
+from database import DatabaseManager
+
+
+def _hang(data):
+    time.sleep(60)
+
+
+def _boom(data):
+    raise ValueError("깨진 파일")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "school_data.db")
+    DatabaseManager(path)
+    files = {"http://x/a.txt": "가정통신문 본문".encode("utf-8"), "http://x/b.pdf": b"%PDF"}
+    monkeypatch.setattr(notice_attachments, "download", lambda url, max_bytes=None: files.get(url))
+    monkeypatch.setattr(http_client, "map_bounded", lambda func, items, max_workers=None: [func(i) for i in items])
+    return path
+
+
+NOTICE = {"bbs_id": "5794", "ntt_sn": 1286622, "attachments": [
+    {"file_name": "a.txt", "url": "http://x/a.txt"},
+    {"file_name": "b.pdf", "url": "http://x/b.pdf"},
+]}
+
+
+def _rows(path):
+    return sqlite3.connect(path).execute(
+        "SELECT file_name, status, attempts, content FROM notice_attachments ORDER BY file_name"
+    ).fetchall()
+
+
+def test_hung_extraction_is_killed_at_timeout():
+    notice_attachments.register_extractor("pdf", _hang)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            notice_attachments.extract_in_process("b.pdf", b"%PDF", timeout=1)
+        assert time.monotonic() - started < 30
+    finally:
+        notice_attachments.register_extractor("pdf", notice_attachments.extract_pdf)
+
+
+def test_failed_extraction_is_marked_and_retried(db):
+    notice_attachments.register_extractor("pdf", _boom)
+    try:
+        assert notice_attachments.ingest_attachments([NOTICE], db) == 1
+        assert _rows(db) == [("a.txt", "ok", 1, "가정통신문 본문"), ("b.pdf", "failed", 1, None)]
+        # 같은 글이 다시 들어와도 성공한 첨부는 건너뛰고 실패한 것만 다시 시도
+        assert notice_attachments.ingest_attachments([NOTICE], db) == 0
+        assert _rows(db)[1][1:3] == ("failed", 2)
+    finally:
+        notice_attachments.register_extractor("pdf", notice_attachments.extract_pdf)
+
+    notice_attachments.register_extractor("pdf", notice_attachments.extract_txt)
+    try:
+        assert notice_attachments.retry_failed_attachments(db) == 1
+        assert _rows(db)[1] == ("b.pdf", "ok", 3, "%PDF")
+    finally:
+        notice_attachments.register_extractor("pdf", notice_attachments.extract_pdf)
+
+
+def test_hwpx_text_is_extracted():
+    import io
+    import zipfile
+
+    section = ('<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section" '
+               'xmlns:hp="http://www.hancom.co.kr/hwpml/2011/paragraph">'
+               '<hp:p><hp:run><hp:t>현장체험학습 </hp:t></hp:run><hp:run><hp:t>안내</hp:t></hp:run></hp:p>'
+               '<hp:p><hp:run><hp:t>준비물: 도시락</hp:t></hp:run></hp:p></hs:sec>')
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("mimetype", "application/hwp+zip")
+        zf.writestr("Contents/section0.xml", section)
+    text = notice_attachments.extract_text("안내문.hwpx", buf.getvalue())
+    assert text == "현장체험학습 안내\n준비물: 도시락"
+
+
+def test_attachment_text_is_in_rag_context(db):
+    from ai_logic import AILogic
+
+    notice_attachments.ingest_attachments([NOTICE], db)
+    ai = AILogic(db_path=db)
+    context = ai.build_rag_context("가정통신문 본문 알려줘", budget=500)
+    assert "a.txt" in context and "가정통신문 본문" in context
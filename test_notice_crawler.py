@@ -0,0 +1,227 @@
+# 목록 HTML은 공지 게시판(td.ta_l 링크 + goView onclick) 목록 구조를 본뜸
+import sqlite3
+from datetime import date
+
+import pytest
+from bs4 import BeautifulSoup
+
+import incremental_notice_crawler as crawler
+
+LIST_HTML = """
+<table class="bbs_list">
+  <thead><tr><th>번호</th><th>제목</th><th>작성자</th><th>등록일</th><th>조회수</th></tr></thead>
+  <tbody>
+    <tr class="notice">
+      <td>공지</td>
+      <td class="ta_l"><a href="#" onclick="goView('8476','5794','1286001'); return false;">2026학년도 학사일정 안내</a></td>
+      <td>교무실</td><td>2026.03.02</td><td>812</td>
+    </tr>
+    <tr>
+      <td>152</td>
+      <td class="ta_l"><a href="javascript:void(0);" onclick="goView('8476','5794','1286622');">체험학습 신청서 제출 안내</a></td>
+      <td>교무실</td><td>2026.10.14</td><td>57</td>
+    </tr>
+    <tr>
+      <td>151</td>
+      <td class="ta_l"><a href="selectNttInfo.do?mi=8476&amp;bbsId=5794&amp;nttSn=1286500">가정통신문(급식 안내)</a></td>
+      <td>행정실</td><td>2026-10-10</td><td>33</td>
+    </tr>
+    <tr>
+      <td>150</td>
+      <td class="ta_l"><a href="#" data-id="1286420">방과후학교 수강 신청</a></td>
+      <td>방과후</td><td>2026/10/7</td><td>21</td>
+    </tr>
+    <tr><td colspan="5">등록된 게시물이 없습니다.</td></tr>
+  </tbody>
+</table>
+"""
+
+
+def test_parse_notice_list_reads_ntt_sn_title_and_date():
+    items = crawler.parse_notice_list(LIST_HTML)
+    assert [(i["ntt_sn"], i["title"], i["created_at"]) for i in items] == [
+        (1286001, "2026학년도 학사일정 안내", "2026-03-02"),
+        (1286622, "체험학습 신청서 제출 안내", "2026-10-14"),
+        (1286500, "가정통신문(급식 안내)", "2026-10-10"),
+        (1286420, "방과후학교 수강 신청", "2026-10-07"),
+    ]
+
+
+def test_goview_takes_last_numeric_argument_not_menu_id():
+    a = BeautifulSoup("""<a onclick="goView('8476','5794','1286622')">x</a>""", "html.parser").a
+    assert crawler._extract_ntt_sn(a) == "1286622"
+
+
+def test_named_ntt_sn_wins_over_other_arguments():
+    a = BeautifulSoup("""<a href="#" onclick="fnView({nttSn: '1286700', mi: '8476'})">x</a>""",
+                      "html.parser").a
+    assert crawler._extract_ntt_sn(a) == "1286700"
+
+
+def test_link_without_post_number_is_skipped():
+    html = LIST_HTML.replace("data-id=\"1286420\"", "data-idx=\"3\"")
+    assert 1286420 not in [i["ntt_sn"] for i in crawler.parse_notice_list(html)]
+    assert len(crawler.parse_notice_list(html)) == 3
+
+
+# ---- 워터마크 ----------------------------------------------------
+def _list_page(ntt_sns):
+    rows = "".join(
+        f"""<tr><td class="ta_l"><a onclick="goView('8476','5794','{n}')">공지 {n}</a></td>"""
+        f"""<td>2026.10.01</td></tr>""" for n in ntt_sns)
+    return f"<table><tbody>{rows}</tbody></table>"
+
+
+@pytest.fixture
+def board(tmp_path, monkeypatch):
+    """nttSn 목록(최신순, 페이지당 3개)을 돌려주는 가짜 게시판. failing에 넣은 글은 상세 조회 실패"""
+    import http_client
+    import notice_attachments
+
+    path = str(tmp_path / "school_data.db")
+    monkeypatch.setattr(crawler, "DB_PATH", path)
+    monkeypatch.setattr(notice_attachments, "ingest_attachments", lambda *a, **kw: None)
+    state = {"posts": [], "failing": set()}
+
+    def fetch(url, params=None, timeout=None):
+        if "selectNttList.do" in url:
+            page = int(url.rsplit("currPage=", 1)[1])
+            posts = sorted(state["posts"], reverse=True)
+            return _list_page(posts[(page - 1) * 3:page * 3])
+        ntt_sn = int(url.rsplit("nttSn=", 1)[1])
+        if ntt_sn in state["failing"]:
+            raise OSError("timeout")
+        return f'<div class="bbsV_cont">본문 {ntt_sn}</div>'
+
+    monkeypatch.setattr(http_client, "fetch", fetch)
+    monkeypatch.setattr(http_client, "map_bounded", lambda func, items, max_workers=None: [func(i) for i in items])
+    state["saved"] = lambda: {r[0] for r in sqlite3.connect(path).execute("SELECT ntt_sn FROM notices")}
+    return state
+
+
+def test_failed_detail_holds_watermark_and_is_retried(board):
+    board["posts"] = [1001, 1002, 1003, 1004]
+    board["failing"] = {1002}
+    crawler.crawl_incremental_notices()
+    assert board["saved"]() == {1001, 1003, 1004}
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 1001
+
+    board["failing"] = set()
+    crawler.crawl_incremental_notices()
+    assert board["saved"]() == {1001, 1002, 1003, 1004}
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 1004
+
+
+def test_backlog_over_cap_is_processed_oldest_first(board):
+    board["posts"] = list(range(2001, 2008))
+    crawler.crawl_incremental_notices(max_new_notices=3)
+    assert board["saved"]() == {2001, 2002, 2003}
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 2003
+
+    crawler.crawl_incremental_notices(max_new_notices=3)
+    crawler.crawl_incremental_notices(max_new_notices=3)
+    assert board["saved"]() == set(range(2001, 2008))
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 2007
+
+
+def test_listing_cut_at_max_pages_seeds_watermark(board, monkeypatch):
+    monkeypatch.setattr(crawler, "NOTICE_MAX_PAGES", 2)
+    board["posts"] = list(range(100001, 100031))   # 10페이지 분량, 빈 DB
+    for _ in range(3):
+        crawler.crawl_incremental_notices(max_new_notices=4)
+    # 목록 범위(2페이지 = 최신 6개) 안의 글은 모두 받고 워터마크가 끝까지 올라감
+    assert board["saved"]() == set(range(100025, 100031))
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 100030
+
+    board["posts"].append(100031)
+    crawler.crawl_incremental_notices(max_new_notices=4)
+    assert 100031 in board["saved"]()
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 100031
+
+
+def test_legacy_rows_without_ntt_sn_do_not_stall(board, monkeypatch):
+    from database import DatabaseManager
+
+    monkeypatch.setattr(crawler, "NOTICE_MAX_PAGES", 2)
+    DatabaseManager(crawler.DB_PATH)
+    with sqlite3.connect(crawler.DB_PATH) as conn:
+        conn.execute("INSERT INTO notices (title, url) VALUES ('예전 공지', 'https://example.com/old')")
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 0
+
+    board["posts"] = list(range(100001, 100031))
+    crawler.crawl_incremental_notices(max_new_notices=4)
+    assert board["saved"]() >= {100025, 100026, 100027, 100028}
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 100028
+
+    crawler.crawl_incremental_notices(max_new_notices=4)
+    assert board["saved"]() >= set(range(100025, 100031))
+    assert crawler.get_notice_watermark(crawler.NOTICE_BBS_ID) == 100030
+
+
+# ---- 급식 --------------------------------------------------------
+MEAL_HTML = """
+<table>
+  <thead><tr><th>구분</th><th>2026.10.12(월)</th><th>2026.10.13(화)</th></tr></thead>
+  <tbody>
+    <tr><th>중식</th><td><p>현미밥\n미역국</p><p>열량 650kcal</p></td><td><p>카레라이스</p></td></tr>
+  </tbody>
+</table>
+"""
+
+
+def test_meal_week_keeps_requested_week(monkeypatch):
+    import http_client
+    monkeypatch.setattr(http_client, "fetch", lambda url, params=None, timeout=None: MEAL_HTML)
+    meals = crawler.fetch_meal_week(date(2026, 10, 12))
+    assert [(m["date"], m["meal_type"], m["menu"]) for m in meals] == [
+        ("2026-10-12", "중식", "현미밥\n미역국"),
+        ("2026-10-13", "중식", "카레라이스"),
+    ]
+
+
+def test_meal_week_drops_dates_outside_requested_week(monkeypatch, capsys):
+    import http_client
+    monkeypatch.setattr(http_client, "fetch", lambda url, params=None, timeout=None: MEAL_HTML)
+    monkeypatch.setattr(crawler, "BROWSER_FALLBACK", False)
+    assert crawler.fetch_meal_week(date(2026, 10, 19)) == []
+    assert "다른 주 날짜" in capsys.readouterr().out
+
+
+def _meal(day, menu, image_url=None):
+    return {"date": day, "meal_type": "중식", "menu": menu, "image_url": image_url}
+
+
+def test_meal_upsert_counts_only_real_changes(tmp_path, monkeypatch):
+    from database import DatabaseManager
+
+    path = str(tmp_path / "school_data.db")
+    monkeypatch.setattr(crawler, "DB_PATH", path)
+    DatabaseManager(path)
+    week = [_meal("2026-10-12", "현미밥\n미역국"), _meal("2026-10-13", "카레라이스")]
+    assert crawler.save_meals_to_db(week) == 2
+    assert crawler.save_meals_to_db(week) == 0   # 같은 주 재저장은 변경 없음
+
+    week[1] = _meal("2026-10-13", "짜장밥")
+    assert crawler.save_meals_to_db(week) == 1
+    rows = sqlite3.connect(path).execute("SELECT date, menu FROM meals ORDER BY date").fetchall()
+    assert rows == [("2026-10-12", "현미밥\n미역국"), ("2026-10-13", "짜장밥")]
+
+
+def test_legacy_duplicate_meals_are_migrated(tmp_path):
+    from database import DatabaseManager
+
+    path = str(tmp_path / "school_data.db")
+    con = sqlite3.connect(path)
+    con.execute("""CREATE TABLE meals (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL,
+                   meal_type TEXT, menu TEXT, image_url TEXT)""")
+    con.executemany("INSERT INTO meals (date, meal_type, menu) VALUES (?, ?, ?)", [
+        ("2026-10-12", "중식", "예전 메뉴"), ("2026-10-12", "중식", "최근 메뉴"), ("2026-10-13", "중식", "카레라이스"),
+    ])
+    con.commit()
+    con.close()
+
+    DatabaseManager(path)   # IntegrityError 없이 유일 인덱스 생성
+    rows = sqlite3.connect(path).execute("SELECT date, menu FROM meals ORDER BY date").fetchall()
+    assert rows == [("2026-10-12", "최근 메뉴"), ("2026-10-13", "카레라이스")]
+    indexes = {r[1] for r in sqlite3.connect(path).execute("PRAGMA index_list(meals)")}
+    assert "uq_meals_date_type" in indexes
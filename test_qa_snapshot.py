@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import qa_snapshot
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _copy_dataset(tmp):
+    path = os.path.join(tmp, "school_dataset.json")
+    shutil.copy(os.path.join(BASE_DIR, "school_dataset.json"), path)
+    return path
+
+
+def test_snapshot_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = _copy_dataset(tmp)
+        db_path = os.path.join(tmp, "none.db")
+        out = qa_snapshot.build_snapshot(dataset, db_path, os.path.join(tmp, "snap.bin"))
+        state = qa_snapshot.load_snapshot(out, dataset, db_path)
+    assert state is not None
+    with open(os.path.join(BASE_DIR, "school_dataset.json"), encoding="utf-8") as f:
+        assert len(state["qa_data"]) == len(json.load(f))
+    question = state["qa_data"][0]["question"]
+    assert state["retriever"].search(question, k=1)[0][1]["title"] == question
+    assert state["payloads"]
+    assert state["questions_lower"] == [qa["question"].lower() for qa in state["qa_data"]]
+
+
+def test_changed_dataset_invalidates_snapshot():
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = _copy_dataset(tmp)
+        db_path = os.path.join(tmp, "none.db")
+        out = qa_snapshot.build_snapshot(dataset, db_path, os.path.join(tmp, "snap.bin"))
+        with open(dataset, "a", encoding="utf-8") as f:
+            f.write("\n")
+        assert qa_snapshot.load_snapshot(out, dataset, db_path) is None
+
+
+def test_bad_file_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snap.bin")
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+        assert qa_snapshot.load_snapshot(path) is None
+        assert qa_snapshot.load_snapshot(os.path.join(tmp, "missing.bin")) is None
+
+
+
+def test_ai_reports_whether_snapshot_was_used(tmp_path, monkeypatch):
+    import ai_logic
+
+    db_path = str(tmp_path / "school_data.db")
+    snap = str(tmp_path / "snap.bin")
+    monkeypatch.setattr(ai_logic, "load_snapshot",
+                        lambda db_path: qa_snapshot.load_snapshot(snap, qa_snapshot.DATASET_PATH, db_path))
+
+    ai = ai_logic.AILogic(db_path=db_path)
+    ai.warm_up()
+    assert ai.prebuilt_payloads and not ai.loaded_from_snapshot
+
+    qa_snapshot.build_snapshot(qa_snapshot.DATASET_PATH, db_path, snap)
+    ai = ai_logic.AILogic(db_path=db_path)
+    ai.warm_up()
+    assert ai.loaded_from_snapshot
+    question = ai.qa_data[0]["question"]
+    assert ai.find_qa_match(question) is ai.qa_data[0]
+
+
+def test_build_state_does_not_import_ai_logic(tmp_path):
+    db_path = str(tmp_path / "none.db")
+    code = (f"import sys, qa_snapshot; qa_snapshot.build_state([{{'question': 'q', 'answer': 'a'}}], {db_path!r}); "
+            "print('ai_logic' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=BASE_DIR)
+    assert out.stdout.strip().splitlines()[-1] == "False"
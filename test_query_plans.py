@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+
+from database import (
+    DatabaseManager,
+    SQL_CONVERSATION_HISTORY,
+    SQL_MEAL_INFO,
+    SQL_MEALS_BETWEEN,
+    SQL_LATEST_NOTICES,
+)
+
+# 자주 실행되는 쿼리 -> (파라미터, 반드시 사용해야 하는 인덱스)
+HOT_QUERIES = {
+    "conversation_history": (SQL_CONVERSATION_HISTORY, ("user", 5), "idx_conversation_user_ts"),
+    "meal_info": (SQL_MEAL_INFO, ("2025-07-07", "중식"), "uq_meals_date_type"),
+    "meals_between": (SQL_MEALS_BETWEEN, ("2025-07-01", "2025-07-31", "중식"), "idx_meals_date_cover"),
+    "latest_notices": (SQL_LATEST_NOTICES, (5,), "idx_notices_created_at"),
+}
+
+
+def explain(conn, sql, params):
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def check_query_plans(db_path):
+    """모든 핫 쿼리가 기대한 인덱스를 쓰고 전체 스캔/임시 정렬이 없는지 검사. 문제 목록 반환"""
+    DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    problems = []
+    try:
+        for name, (sql, params, index) in HOT_QUERIES.items():
+            plan = explain(conn, sql, params)
+            text = " | ".join(plan)
+            if index not in text:
+                problems.append(f"{name}: {index} 미사용 ({text})")
+            if "USE TEMP B-TREE" in text:
+                problems.append(f"{name}: 임시 정렬 발생 ({text})")
+            if any(p.startswith("SCAN") and "INDEX" not in p for p in plan):
+                problems.append(f"{name}: 전체 테이블 스캔 ({text})")
+    finally:
+        conn.close()
+    return problems
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        problems = check_query_plans(os.path.join(tmp, "plans.db"))
+    assert not problems, "\n".join(problems)
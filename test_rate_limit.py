@@ -0,0 +1,49 @@
+from rate_limit import TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter("t", per_min=60, burst=3, clock=clock)
+    assert all(limiter.allow("u1") for _ in range(3))
+    assert limiter.allow("u1") is False
+    clock.now += 1.0                      # 분당 60 -> 1초에 1개 보충
+    assert limiter.allow("u1") is True
+    assert limiter.allow("u1") is False
+    assert limiter.stats()["rejected"] == 2
+
+
+def test_one_user_does_not_affect_others():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter("t", per_min=6, burst=2, clock=clock)
+    for _ in range(10):
+        limiter.allow("spammer")
+    assert limiter.allow("spammer") is False
+    assert limiter.allow("parent") is True
+
+
+def test_refill_is_capped_at_burst():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter("t", per_min=60, burst=2, clock=clock)
+    limiter.allow("u1")
+    clock.now += 3600
+    assert limiter.allow("u1") and limiter.allow("u1")
+    assert limiter.allow("u1") is False
+
+
+def test_lru_bounds_memory():
+    limiter = TokenBucketLimiter("t", per_min=60, burst=1, max_keys=3, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        limiter.allow(key)
+    limiter.allow("a")                    # a는 최근 사용 -> b가 밀려남
+    limiter.allow("d")
+    assert limiter.stats()["users"] == 3
+    assert limiter.allow("a") is False    # 남아 있어 예산 소진 상태 유지
+    assert limiter.allow("b") is True     # 밀려났다가 가득 찬 버킷으로 다시 시작
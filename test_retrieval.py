@@ -0,0 +1,58 @@
+import json
+import os
+import time
+
+from retrieval import Retriever, estimate_tokens, pack_context, split_passages, truncate_to_tokens
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _qa_data():
+    with open(os.path.join(BASE_DIR, "school_dataset.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_estimate_tokens_is_conservative_for_korean():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("방과후") >= 3
+    assert estimate_tokens("hello world") < estimate_tokens("안녕하세요 세계")
+
+
+def test_truncate_to_tokens_respects_budget():
+    text = "와석초등학교 방과후 프로그램 안내입니다. " * 20
+    cut = truncate_to_tokens(text, 50)
+    assert estimate_tokens(cut) <= 50
+    assert cut.endswith("…")
+    assert truncate_to_tokens("짧은 글", 50) == "짧은 글"
+
+
+def test_pack_context_never_exceeds_budget():
+    docs = [{"kind": "qa", "title": f"질문 {i}", "text": "답변 내용 " * 30, "url": None} for i in range(10)]
+    hits = [(1.0, d) for d in docs]
+    for budget in (30, 100, 400):
+        packed = pack_context(hits, budget)
+        assert estimate_tokens(packed) <= budget, budget
+
+
+def test_search_finds_relevant_qa():
+    qa_data = _qa_data()
+    retriever = Retriever.build(qa_data)
+    target = qa_data[0]["question"]
+    hits = retriever.search(target, k=3)
+    assert hits and hits[0][1]["title"] == target
+
+
+def test_split_passages():
+    text = "첫 문장입니다. " * 100
+    passages = split_passages(text, size=100)
+    assert len(passages) > 1
+    assert all(len(p) <= 100 for p in passages)
+
+
+def test_retrieval_and_packing_is_fast():
+    retriever = Retriever.build(_qa_data())
+    started = time.perf_counter()
+    for _ in range(50):
+        pack_context(retriever.search("방과후 신청은 어떻게 하나요", k=5), 500)
+    per_call_ms = (time.perf_counter() - started) / 50 * 1000
+    assert per_call_ms < 5, per_call_ms
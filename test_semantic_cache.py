@@ -0,0 +1,109 @@
+import time
+
+from semantic_cache import SemanticCache
+
+QUESTIONS = [
+    "방과후 신청 방법", "방과후 시작 시간", "전학 서류", "학교 주차 가능한가요",
+    "보건실 위치", "급식 알레르기 정보", "체험학습 신청서",
+]
+
+
+def _cache(**kw):
+    cache = SemanticCache(**kw)
+    cache.set_version("v1", QUESTIONS)
+    return cache
+
+
+def test_paraphrase_hits():
+    cache = _cache()
+    cache.put("방과후 끝나는 시간 언제에요", "오후 4시 40분에 끝나요.")
+    assert cache.get("방과후 몇시에 끝나요?") == "오후 4시 40분에 끝나요."
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_question_misses():
+    cache = _cache()
+    cache.put("학교 주차장 어디에요", "정문 옆입니다.")
+    assert cache.get("학교 보건실 어디에요") is None
+    cache.put("주차 가능한가요", "방문 차량은 가능합니다.")
+    assert cache.get("전학 가능한가요") is None
+
+
+def test_scope_is_separate():
+    cache = _cache()
+    cache.put("급식 알레르기 정보", "짧은 답", scope="short")
+    assert cache.get("급식 알레르기 정보", scope="long") is None
+    assert cache.get("급식 알레르기 정보", scope="short") == "짧은 답"
+
+
+def test_version_change_invalidates():
+    cache = _cache()
+    cache.put("급식 알레르기 정보", "답")
+    cache.set_version("v1", QUESTIONS)
+    assert cache.get("급식 알레르기 정보") == "답"
+    cache.set_version("v2", QUESTIONS)
+    assert cache.get("급식 알레르기 정보") is None
+
+
+def test_lru_and_ttl():
+    cache = _cache(max_entries=2, ttl_sec=0.1)
+    cache.put("전학 서류", "a")
+    cache.put("보건실 위치", "b")
+    assert cache.get("전학 서류") == "a"          # 최근 사용으로 갱신
+    cache.put("급식 알레르기 정보", "c")           # 가장 오래된 '보건실 위치' 제거
+    assert cache.get("보건실 위치") is None
+    assert cache.get("전학 서류") == "a"
+    time.sleep(0.15)
+    assert cache.get("전학 서류") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lookup_is_fast():
+    cache = _cache()
+    for i in range(500):
+        cache.put(f"질문 {i}번 관련 문의 내용 {i * 7}", f"답 {i}")
+    started = time.perf_counter()
+    for _ in range(20):
+        cache.get("방과후 몇시에 끝나요")
+    per_lookup_ms = (time.perf_counter() - started) / 20 * 1000
+    assert per_lookup_ms < 20, per_lookup_ms
+
+
+def _fake_ai(tmp_path):
+    from ai_logic import AILogic
+
+    ai = AILogic(db_path=str(tmp_path / "school_data.db"))
+    calls = []
+
+    def fake_openai(message, user_id, long_answer=False, history=()):
+        calls.append((user_id, len(history)))
+        return True, f"{user_id}에게 답변"
+
+    ai.call_openai_api = fake_openai
+    ai.find_qa_match = lambda *a, **kw: None
+    return ai, calls
+
+
+def test_returning_user_still_hits_cache(tmp_path):
+    ai, calls = _fake_ai(tmp_path)
+    ai.db.save_conversation("parent-a", "학교 준비물", "실내화와 물통이에요")
+
+    question = "학교 운동장 주말 개방 여부 알려줘 zq"
+    answers = {u: ai.process_message(question, u, long_answer=True)[1]
+               for u in ("parent-b", "parent-a", "parent-c")}
+    # 이전 대화가 있어도 후속 질문이 아니면 기록 없이 답하고 다른 사용자와 캐시를 나눔
+    assert set(answers.values()) == {"parent-b에게 답변"}
+    assert calls == [("parent-b", 0)]
+
+
+def test_follow_up_with_history_is_not_shared(tmp_path):
+    ai, calls = _fake_ai(tmp_path)
+    ai.db.save_conversation("parent-a", "체험학습 신청서 zq", "행정실에서 받을 수 있어요")
+
+    question = "그럼 그건 언제까지 내야 돼 zq"
+    answers = {u: ai.process_message(question, u, long_answer=True)[1]
+               for u in ("parent-a", "parent-b", "parent-c")}
+    # 후속 질문은 이 사용자 대화가 들어간 전용 답변이라 캐시에 남지 않음
+    assert answers["parent-a"] == "parent-a에게 답변"
+    assert answers["parent-b"] == answers["parent-c"] == "parent-b에게 답변"
+    assert calls == [("parent-a", 1), ("parent-b", 0)]
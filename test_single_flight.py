@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_duplicates_share_one_call():
+    flight = SingleFlight("t")
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "답변"
+
+    def request(_):
+        return flight.do("방과후 시간", slow)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        first = pool.submit(request, 0)
+        started.wait(1)
+        rest = list(pool.map(request, range(9)))
+    assert len(calls) == 1
+    assert first.result() == ("답변", False)
+    assert all(r == ("답변", True) for r in rest)
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("t")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.do("a", lambda: 3) == (3, False)  # 끝난 계산은 재사용하지 않음 (캐시 아님)
+
+
+def test_leader_error_reaches_waiters():
+    flight = SingleFlight("t")
+    started = threading.Event()
+    errors = []
+
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("실패")
+
+    def request():
+        try:
+            flight.do("k", boom)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=request)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+
+
+def test_waiter_gives_up_after_timeout():
+    flight = SingleFlight("t", wait_sec=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def stuck():
+        started.set()
+        release.wait(2)
+        return "늦은 답"
+
+    leader = threading.Thread(target=lambda: flight.do("k", stuck))
+    leader.start()
+    started.wait(1)
+    waited = []
+    assert flight.do("k", lambda: "직접", on_wait=lambda: waited.append(1)) == ("직접", False)
+    assert waited == [1]
+    release.set()
+    leader.join()
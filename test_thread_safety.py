@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_logic import AILogic
+from database import DatabaseManager
+
+
+def test_connection_per_thread(tmp_path):
+    db = DatabaseManager(str(tmp_path / "school_data.db"))
+    main_conn = db._connection()
+    assert db._connection() is main_conn
+    other = []
+    t = threading.Thread(target=lambda: other.append(db._connection()))
+    t.start()
+    t.join()
+    assert other[0] is not main_conn
+
+
+def test_concurrent_writes_and_reads(tmp_path):
+    db = DatabaseManager(str(tmp_path / "school_data.db"))
+
+    def work(i):
+        db.save_conversation(f"user-{i % 5}", f"질문 {i}", f"답변 {i}")
+        return len(db.get_conversation_history(f"user-{i % 5}", limit=100))
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(work, range(200)))
+    assert sum(len(db.get_conversation_history(f"user-{u}", limit=100)) for u in range(5)) == 200
+
+
+def test_lazy_init_runs_once(tmp_path):
+    ai = AILogic(db_path=str(tmp_path / "school_data.db"))
+    calls = []
+    original = ai.load_qa_data
+
+    def counted():
+        calls.append(1)
+        original()
+
+    ai.load_qa_data = counted
+    barrier = threading.Barrier(8)
+
+    def init():
+        barrier.wait()
+        ai._ensure_initialized()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: init(), range(8)))
+    assert len(calls) == 1
+    assert ai.qa_data
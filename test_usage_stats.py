@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from usage_stats import UsageStats
+
+
+@pytest.fixture
+def usage(tmp_path):
+    return UsageStats(str(tmp_path / "school_data.db"))
+
+
+def test_flushed_counts_show_up_in_summary(usage):
+    usage.record("/", "qa", 40)
+    usage.record("/", "qa", 300)
+    usage.record("/", "no_match", 90, answered=False, utterance="급식 알레르기 표")
+    assert usage.flush() > 0
+
+    s = usage.summary(days=1)
+    assert list(s["requests_per_day"].values())[0] == {"/": 3, "total": 3}
+    assert s["stage_hits"] == {"qa": 2, "no_match": 1}
+    assert s["top_unanswered"] == [{"utterance": "급식 알레르기 표", "count": 1}]
+    assert s["latency"]["/"]["count"] == 3
+
+
+def test_summary_is_read_only(usage, tmp_path):
+    usage.record("/", "qa", 10)
+    s = usage.summary()
+    assert s["stage_hits"] == {} and s["top_unanswered"] == []
+    assert not (tmp_path / "school_data.db").exists()
+
+    sqlite3.connect(usage.db_path).close()      # 테이블 없는 빈 DB
+    assert usage.summary()["stage_hits"] == {}
+    tables = sqlite3.connect(usage.db_path).execute("SELECT name FROM sqlite_master").fetchall()
+    assert tables == []
+    assert usage._pending                        # 조회가 플러시하지 않음
+
+
+def test_unanswered_utterances_are_masked(usage):
+    usage.record("/", "no_match", 10, answered=False,
+                 utterance="010-1234-5678로 연락 주세요 학번 2026123456 a.b@school.kr")
+    usage.flush()
+    text = usage.summary()["top_unanswered"][0]["utterance"]
+    assert "1234-5678" not in text and "2026123456" not in text and "a.b@school.kr" not in text
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("GUNICORN_PRELOAD", "true")     # 통계 플러시 타이머 등 백그라운드 스레드 없이
+    monkeypatch.setenv("WARM_START", "false")          # 기본 경로 DB로 AILogic을 만들지 않게
+    monkeypatch.chdir(tmp_path)                        # app의 DB_PATH(상대 경로)가 tmp_path를 가리키게
+    import app
+    monkeypatch.setattr(app, "usage", UsageStats(str(tmp_path / "school_data.db")))
+    return app
+
+
+def test_stats_endpoint_requires_token(client, monkeypatch):
+    http = client.app.test_client()
+    monkeypatch.setattr(client, "STATS_TOKEN", "")
+    assert http.get("/stats").status_code == 404
+    assert http.get("/stats", headers={"Authorization": "Bearer "}).status_code == 404
+
+    monkeypatch.setattr(client, "STATS_TOKEN", "s3cret")
+    assert http.get("/stats").status_code == 403
+    assert http.get("/stats", headers={"Authorization": "Bearer nope"}).status_code == 403
+    r = http.get("/stats", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200 and "top_unanswered" in r.get_json()
+
+
+def test_metrics_endpoint_requires_token(client, monkeypatch):
+    http = client.app.test_client()
+    monkeypatch.setattr(client, "STATS_TOKEN", "")
+    assert http.get("/metrics").status_code == 404
+    monkeypatch.setattr(client, "STATS_TOKEN", "s3cret")
+    assert http.get("/metrics").status_code == 403
+    r = http.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200 and "# TYPE chatbot_request_seconds histogram" in r.get_data(as_text=True)
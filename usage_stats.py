@@ -0,0 +1,194 @@
+# usage_stats.py
+# 사용 통계 사전 집계
+# - 요청 처리 중에는 메모리 카운터만 올림 (락 하나, dict 증가 연산)
+# - 주기적으로 usage_rollups 테이블에 (일자, 지표, 키) 단위로 합산 저장
+# - /stats는 원본 대화 기록이 아니라 집계 테이블만 읽으므로 기록 양과 무관하게 일정한 비용
+#   (읽기 전용 연결, 아직 플러시 안 된 최근 FLUSH_INTERVAL_SEC초 분량은 빠짐)
+# - 미응답 발화는 연락처/긴 숫자를 가린 뒤에만 메모리/DB에 둠
+import os
+import re
+import atexit
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+FLUSH_INTERVAL_SEC = int(os.getenv("STATS_FLUSH_INTERVAL", 30))
+MAX_UNANSWERED_KEYS = 500          # 플러시 사이에 모을 미응답 발화 종류 상한
+MAX_UTTERANCE_LEN = 100
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 5000)
+
+_PHONE_RE = re.compile(r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}|0\d{1,2}[-\s]?\d{3,4}[-\s]?\d{4}")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_LONG_NUMBER_RE = re.compile(r"\d{6,}")
+
+
+def ensure_tables(con):
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS usage_rollups (
+      day TEXT NOT NULL,
+      metric TEXT NOT NULL,
+      key TEXT NOT NULL,
+      value INTEGER NOT NULL DEFAULT 0,
+      PRIMARY KEY (day, metric, key)
+    ) WITHOUT ROWID
+    """)
+    con.commit()
+
+
+def mask_utterance(text):
+    """발화에서 전화번호/이메일/긴 숫자(학번·계좌 등) 가림"""
+    text = _PHONE_RE.sub("010-****-****", text)
+    text = _EMAIL_RE.sub("***@***", text)
+    return _LONG_NUMBER_RE.sub("******", text)
+
+
+def _today():
+    return datetime.now(KST).strftime("%Y-%m-%d")
+
+
+def _bucket(latency_ms):
+    for le in LATENCY_BUCKETS_MS:
+        if latency_ms <= le:
+            return str(le)
+    return "inf"
+
+
+class UsageStats:
+    """요청별 카운터를 메모리에 모았다가 usage_rollups에 합산"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pending = Counter()      # (day, metric, key) -> 증가분
+        self._unanswered_keys = 0
+        self._timer = None
+
+    def record(self, endpoint, stage, latency_ms, answered=True, utterance=None):
+        day = _today()
+        with self._lock:
+            p = self._pending
+            p[(day, "requests", endpoint)] += 1
+            p[(day, "stage", stage)] += 1
+            p[(day, "latency", f"{endpoint}|{_bucket(latency_ms)}")] += 1
+            p[(day, "latency_sum_ms", endpoint)] += round(latency_ms)
+            if not answered and utterance:
+                key = (day, "unanswered", mask_utterance(utterance.strip())[:MAX_UTTERANCE_LEN])
+                if key in p or self._unanswered_keys < MAX_UNANSWERED_KEYS:
+                    if key not in p:
+                        self._unanswered_keys += 1
+                    p[key] += 1
+
+    def flush(self):
+        """모인 증가분을 DB에 합산 (실패하면 다음 플러시에 다시 시도)"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._unanswered_keys = 0
+        if not pending:
+            return 0
+        try:
+            con = sqlite3.connect(self.db_path, timeout=5)
+            ensure_tables(con)
+            con.executemany("""
+                INSERT INTO usage_rollups (day, metric, key, value) VALUES (?, ?, ?, ?)
+                ON CONFLICT(day, metric, key) DO UPDATE SET value = value + excluded.value
+            """, [(d, m, k, v) for (d, m, k), v in pending.items()])
+            con.commit()
+            con.close()
+        except Exception as e:
+            print(f"[STATS] flush 실패: {type(e).__name__}: {e}")
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return len(pending)
+
+    def start(self):
+        """FLUSH_INTERVAL_SEC마다 플러시하는 데몬 타이머 시작 (종료 시 마지막 플러시)"""
+        self._schedule()
+        atexit.register(self.flush)
+        return self
+
+    def _tick(self):
+        self.flush()
+        self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(FLUSH_INTERVAL_SEC, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def summary(self, days=7, top_n=10):
+        """최근 days일 집계 (집계 테이블 범위 조회만, 읽기 전용이라 DB에 쓰지 않음)"""
+        since = (datetime.now(KST) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        rows, unanswered = [], []
+        if os.path.exists(self.db_path):
+            con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=5)
+            try:
+                rows = con.execute(
+                    "SELECT day, metric, key, value FROM usage_rollups "
+                    "WHERE day >= ? AND metric != 'unanswered'",
+                    (since,)
+                ).fetchall()
+                unanswered = con.execute(
+                    "SELECT key, SUM(value) AS n FROM usage_rollups "
+                    "WHERE day >= ? AND metric = 'unanswered' "
+                    "GROUP BY key ORDER BY n DESC LIMIT ?",
+                    (since, top_n)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):   # 첫 플러시 전
+                    raise
+            finally:
+                con.close()
+
+        per_day = {}
+        stages = Counter()
+        latency = {}
+        latency_sum = Counter()
+        for day, metric, key, value in rows:
+            if metric == "requests":
+                per_day.setdefault(day, Counter())[key] += value
+            elif metric == "stage":
+                stages[key] += value
+            elif metric == "latency":
+                endpoint, le = key.split("|", 1)
+                latency.setdefault(endpoint, Counter())[le] += value
+            elif metric == "latency_sum_ms":
+                latency_sum[key] += value
+
+        total_stage = sum(stages.values()) or 1
+        latency_out = {}
+        for endpoint, buckets in latency.items():
+            n = sum(buckets.values())
+            latency_out[endpoint] = {
+                "count": n,
+                "avg_ms": round(latency_sum[endpoint] / n, 1) if n else 0,
+                "p50_ms": _percentile(buckets, 0.50),
+                "p95_ms": _percentile(buckets, 0.95),
+                "p99_ms": _percentile(buckets, 0.99),
+                "buckets": {le: buckets.get(le, 0) for le in [*map(str, LATENCY_BUCKETS_MS), "inf"]},
+            }
+
+        return {
+            "since": since,
+            "requests_per_day": {d: dict(c, total=sum(c.values())) for d, c in sorted(per_day.items())},
+            "stage_hits": dict(stages),
+            "stage_hit_rate": {k: round(v / total_stage, 4) for k, v in stages.items()},
+            "top_unanswered": [{"utterance": k, "count": n} for k, n in unanswered],
+            "latency": latency_out,
+        }
+
+
+def _percentile(buckets, q):
+    """히스토그램 버킷 상한으로 근사한 분위수(ms). inf 버킷이면 None"""
+    n = sum(buckets.values())
+    if not n:
+        return None
+    target, seen = q * n, 0
+    for le in [*map(str, LATENCY_BUCKETS_MS), "inf"]:
+        seen += buckets.get(le, 0)
+        if seen >= target:
+            return None if le == "inf" else int(le)
+    return None